@@ -0,0 +1,139 @@
+"""Compare src.db connection profiles on ingest and UI query workloads.
+
+    python -m benchmarks.profiles --posts 2000 --snapshots 30
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from src import db
+
+BASE = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def _ingest(db_path: str, profile: str, n_posts: int, n_snapshots: int, commit_every: int, compact: bool) -> dict:
+    rnd = random.Random(0)
+    conn = db.connect_db(db_path, profile)
+    db.init_db(conn)
+    if compact:
+        from src.compact import compact_snapshots
+
+        # Every snapshot below is then written through the view's trigger.
+        compact_snapshots(conn)
+    db.upsert_account(conn, "main", 1)
+
+    started = time.perf_counter()
+    for i in range(n_posts):
+        created = BASE + timedelta(hours=i * 7)
+        db.upsert_post(
+            conn,
+            {
+                "account_id": "main",
+                "illust_id": 10_000_000 + i,
+                "create_date": created.isoformat(),
+                "tags_json": '["a"]',
+                "type": "illust" if i % 2 else "manga",
+                "title": f"t{i}",
+            },
+        )
+        final = rnd.randint(50, 2000)
+        for k in range(n_snapshots):
+            hours = 1 + k * 24
+            value = int(final * (1 - 0.5 ** (hours / 30.0)))
+            db.insert_snapshot(
+                conn,
+                {
+                    "account_id": "main",
+                    "illust_id": 10_000_000 + i,
+                    "captured_at": (created + timedelta(hours=hours)).isoformat(),
+                    "bookmark_count": value,
+                    "like_count": value // 2,
+                    "view_count": value * 8,
+                    "comment_count": 0,
+                    "source_mode": "daily",
+                },
+            )
+        if (i + 1) % commit_every == 0:
+            db.commit(conn)
+    for d in range(n_snapshots):
+        day = BASE + timedelta(days=d)
+        db.upsert_account_daily(conn, "main", day.date().isoformat(), 1000 + d, 10, day.isoformat())
+    db.commit(conn)
+    ingest_sec = time.perf_counter() - started
+
+    wal_path = Path(f"{db_path}-wal")
+    wal_bytes = wal_path.stat().st_size if wal_path.exists() else 0
+    started = time.perf_counter()
+    db.checkpoint(conn)
+    checkpoint_sec = time.perf_counter() - started
+    conn.close()
+    return {
+        "ingest_sec": ingest_sec,
+        "checkpoint_sec": checkpoint_sec,
+        "wal_mb": wal_bytes / 1e6,
+        "db_mb": Path(db_path).stat().st_size / 1e6,
+    }
+
+
+def _query(db_path: str, profile: str, repeat: int, explain: bool = False) -> dict:
+    # ui.data_access pulls in pandas; only the query half of the benchmark needs it.
+    from ui import data_access, profiling
+
+    os.environ["UI_DB_PROFILE"] = profile
+    workloads = {
+        "posts_page": lambda: data_access.load_posts_page(db_path, "main", page_size=100),
+        "growth_24h": lambda: data_access.load_growth_benchmark(db_path, "main", 24.0, "bookmark_count", limit=500),
+        "followers": lambda: data_access.load_follower_daily(db_path, "main"),
+    }
+    result = {}
+    # Timed through the same hooks as the UI profiling panel.
+    with profiling.profiling(profiling.Profiler()) as profiler:
+        for name, fn in workloads.items():
+            first = len(profiler.records)
+            for _ in range(repeat):
+                fn()
+            calls = [r for r in profiler.records[first:] if r.depth == 0]
+            result[f"{name}_ms"] = statistics.median(r.seconds for r in calls) * 1000
+            if explain:
+                print(f"--- {profile} / {name} ({calls[0].rows} rows) ---")
+                for statement in calls[0].statements:
+                    for line in profiling.explain(db_path, statement.sql):
+                        print(f"  {line}")
+    return result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="SQLite connection profile benchmark")
+    parser.add_argument("--posts", type=int, default=2000)
+    parser.add_argument("--snapshots", type=int, default=30)
+    parser.add_argument("--commit-every", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--profiles", nargs="*", default=list(db.CONNECTION_PROFILES))
+    parser.add_argument("--explain", action="store_true", help="Print the query plans of each UI workload")
+    parser.add_argument("--compact", action="store_true", help="Use the compact post_snapshots layout (src.compact)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        rows = []
+        for profile in args.profiles:
+            db_path = str(Path(tmp) / f"{profile}.db")
+            row = {"profile": profile}
+            row.update(_ingest(db_path, profile, args.posts, args.snapshots, args.commit_every, args.compact))
+            row.update(_query(db_path, profile, args.repeat, args.explain))
+            rows.append(row)
+
+    headers = list(rows[0])
+    print("  ".join(f"{h:>16}" for h in headers))
+    for row in rows:
+        print("  ".join(f"{v:>16.3f}" if isinstance(v, float) else f"{v:>16}" for v in row.values()))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,127 @@
+"""Compare per-illust normalization in the collector: the previous dict path
+(three create_date parses, a clock read per illust and per upsert, one
+execute per row) against PostRecord + RunClock + executemany.
+
+    python -m benchmarks.records --posts 5000 --repeat 5 --profile
+"""
+
+import argparse
+import cProfile
+import json
+import pstats
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from src import db
+from src.pixiv_client import extract_post_meta
+from src.records import PostRecord, RunClock
+
+BASE = datetime(2024, 1, 1, tzinfo=timezone(timedelta(hours=9)))
+MAX_AGE_DAYS = 60
+
+
+def _illusts(n: int) -> list:
+    return [
+        {
+            "id": 10_000_000 + i,
+            "create_date": (BASE + timedelta(hours=i * 3)).isoformat(),
+            "tags": [{"name": f"tag{i % 7}"}, {"name": "オリジナル"}],
+            "type": "illust" if i % 2 else "manga",
+            "page_count": 1,
+            "x_restrict": 0,
+            "title": f"title {i}",
+        }
+        for i in range(n)
+    ]
+
+
+def _legacy_to_utc_iso(raw: str) -> str:
+    parsed = datetime.fromisoformat(raw)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).replace(microsecond=0).isoformat()
+
+
+def _legacy_is_within_days(create_date_iso: str, days: int) -> bool:
+    create_dt = datetime.fromisoformat(create_date_iso)
+    if create_dt.tzinfo is None:
+        create_dt = create_dt.replace(tzinfo=timezone.utc)
+    return create_dt.astimezone(timezone.utc) >= datetime.now(timezone.utc) - timedelta(days=days)
+
+
+def legacy(conn, illusts: list) -> list:
+    candidates = []
+    for illust in illusts:
+        meta = extract_post_meta(illust)
+        create_date_iso = _legacy_to_utc_iso(meta["create_date"])
+        db.upsert_post(
+            conn,
+            {
+                "account_id": "main",
+                "illust_id": int(meta["illust_id"]),
+                "create_date": create_date_iso,
+                "tags_json": json.dumps(meta.get("tags", []), ensure_ascii=False),
+                "type": meta.get("type"),
+                "page_count": meta.get("page_count"),
+                "x_restrict": meta.get("x_restrict"),
+                "title": meta.get("title"),
+            },
+        )
+        if _legacy_is_within_days(create_date_iso, MAX_AGE_DAYS):
+            candidates.append((int(meta["illust_id"]), db.iso_to_epoch(create_date_iso)))
+    return candidates
+
+
+def records(conn, illusts: list) -> list:
+    clock = RunClock.start()
+    rows = [r for r in (PostRecord.from_illust("main", illust) for illust in illusts) if r is not None]
+    db.upsert_posts(conn, [r.db_row(clock.updated_at) for r in rows])
+    return [r for r in rows if clock.is_within_days(r.create_ts, MAX_AGE_DAYS)]
+
+
+def _run(fn, db_path: str, illusts: list, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        conn = db.connect_db(db_path)
+        db.init_db(conn)
+        started = time.perf_counter()
+        fn(conn, illusts)
+        timings.append(time.perf_counter() - started)
+        conn.rollback()
+        conn.close()
+    return statistics.median(timings) * 1000
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Collector post normalization benchmark")
+    parser.add_argument("--posts", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--profile", action="store_true", help="Print the top cProfile entries for each path")
+    args = parser.parse_args()
+
+    illusts = _illusts(args.posts)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / "bench.db")
+        results = {name: _run(fn, db_path, illusts, args.repeat) for name, fn in (("legacy", legacy), ("records", records))}
+        for name, ms in results.items():
+            print(f"{name:>8}: {ms:9.2f} ms  ({ms * 1000 / args.posts:6.2f} us/post)")
+        print(f" speedup: {results['legacy'] / results['records']:.2f}x")
+
+        if args.profile:
+            for name, fn in (("legacy", legacy), ("records", records)):
+                conn = db.connect_db(db_path)
+                db.init_db(conn)
+                profiler = cProfile.Profile()
+                profiler.runcall(fn, conn, illusts)
+                conn.rollback()
+                conn.close()
+                print(f"\n--- {name} ---")
+                pstats.Stats(profiler).sort_stats("tottime").print_stats(8)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,116 @@
+"""Memory and load time of the columnar snapshot store against the pandas
+DataFrame the analytics paths used to build.
+
+    python -m benchmarks.store --posts 20000 --snapshots 50
+"""
+
+import argparse
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from src import db
+from src.analytics.store import SnapshotStore, load_snapshot_store
+
+BASE = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+# Column set of ui.data_access.load_snapshots_for_posts, the frame growth
+# curves are built from.
+DATAFRAME_SQL = """
+SELECT
+    ps.account_id,
+    ps.illust_id,
+    ps.captured_at,
+    ps.bookmark_count,
+    ps.bookmark_rate,
+    ps.like_count,
+    ps.view_count,
+    ps.comment_count,
+    ps.source_mode,
+    ps.captured_ts,
+    p.create_date,
+    p.create_ts,
+    p.title
+FROM post_snapshots ps
+JOIN posts p
+  ON p.account_id = ps.account_id
+ AND p.illust_id = ps.illust_id
+WHERE ps.account_id = ?
+ORDER BY ps.illust_id, ps.captured_ts
+"""
+
+
+def _build(db_path: str, n_posts: int, n_snapshots: int) -> None:
+    conn = db.connect_db(db_path)
+    db.init_db(conn)
+    updated_at = db.utc_now_iso()
+    posts, snapshots = [], []
+    for i in range(n_posts):
+        created = BASE + timedelta(hours=i)
+        create_ts = int(created.timestamp())
+        posts.append(
+            ("main", i, created.isoformat(), create_ts, "[]", "illust" if i % 3 else "manga", 1, 0, f"t{i}", updated_at)
+        )
+        for k in range(n_snapshots):
+            ts = create_ts + 3600 * (1 + 24 * k)
+            captured = datetime.fromtimestamp(ts, tz=timezone.utc).isoformat()
+            snapshots.append(("main", i, captured, ts, 10 * k, None, 5 * k, 100 * k, 0, "daily"))
+        if len(snapshots) >= 200_000:
+            db.insert_snapshots(conn, snapshots)
+            snapshots = []
+    db.upsert_posts(conn, posts)
+    db.insert_snapshots(conn, snapshots)
+    db.commit(conn)
+    conn.close()
+
+
+def _measure(fn):
+    # Timed untraced; the peak comes from a second, traced run.
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    del result
+    tracemalloc.start()
+    result = fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Snapshot store vs DataFrame benchmark")
+    parser.add_argument("--posts", type=int, default=20000)
+    parser.add_argument("--snapshots", type=int, default=50, help="Snapshots per post")
+    args = parser.parse_args()
+
+    import pandas as pd
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / "bench.db")
+        _build(db_path, args.posts, args.snapshots)
+        conn = db.connect_db(db_path, "interactive_read")
+
+        df, df_sec, df_peak = _measure(lambda: pd.read_sql_query(DATAFRAME_SQL, conn, params=("main",)))
+        df_bytes = int(df.memory_usage(deep=True).sum())
+        del df
+        store, store_sec, store_peak = _measure(lambda: load_snapshot_store(conn, "main"))
+        conn.close()
+
+        cache_dir = str(Path(tmp) / "store")
+        store.save(cache_dir)
+        mapped, mmap_sec, mmap_peak = _measure(lambda: SnapshotStore.load(cache_dir, mmap=True))
+
+        print(f"snapshots: {store.n_snapshots:,}  posts: {store.n_posts:,}")
+        print(f"{'':>10}  {'load_s':>8}  {'peak_MB':>8}  {'resident_MB':>11}")
+        print(f"{'dataframe':>10}  {df_sec:8.2f}  {df_peak / 1e6:8.1f}  {df_bytes / 1e6:11.1f}")
+        print(f"{'store':>10}  {store_sec:8.2f}  {store_peak / 1e6:8.1f}  {store.nbytes / 1e6:11.1f}")
+        print(f"{'mmap':>10}  {mmap_sec:8.4f}  {mmap_peak / 1e6:8.1f}  {'(page cache)':>11}")
+        print(f"resident ratio: {df_bytes / store.nbytes:.1f}x")
+        del mapped
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
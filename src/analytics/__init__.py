@@ -0,0 +1 @@
+# Post-collection analytics stages (derived tables refreshed after each run).
@@ -0,0 +1,160 @@
+import json
+import sqlite3
+from dataclasses import asdict, dataclass, field
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from src import db
+
+DETECTOR_NAME = "robust_z_cusum"
+WINDOW_DAYS = 28
+MIN_HISTORY = 7
+Z_THRESHOLD = 4.0
+CUSUM_K = 1.0
+CUSUM_H = 6.0
+# Floor for the MAD scale (followers/day), so flat series don't turn +1 into a spike.
+MIN_SCALE = 1.0
+
+
+@dataclass
+class DetectorState:
+    date_ts: int = 0
+    followers: Optional[float] = None
+    window: List[float] = field(default_factory=list)
+    cusum_pos: float = 0.0
+    cusum_neg: float = 0.0
+    pos_start: Optional[str] = None
+    neg_start: Optional[str] = None
+
+
+# (date, date_ts, kind, delta per day, score, baseline, detected_ts)
+Event = Tuple[str, int, str, float, float, float, int]
+
+
+def _baseline(window: List[float]) -> Tuple[float, float]:
+    values = np.asarray(window, dtype="float64")
+    med = float(np.median(values))
+    mad = float(np.median(np.abs(values - med)))
+    return med, max(1.4826 * mad, MIN_SCALE)
+
+
+def scan(
+    state: DetectorState,
+    dates: List[str],
+    date_ts: np.ndarray,
+    followers: np.ndarray,
+) -> Tuple[DetectorState, List[Event]]:
+    # Advances the detector over rows newer than state.date_ts, O(WINDOW_DAYS)
+    # per row. Gaps between collection days are normalized to a per-day delta.
+    if len(dates) == 0:
+        return state, []
+
+    prev_f = np.concatenate([[np.nan if state.followers is None else state.followers], followers[:-1]])
+    prev_t = np.concatenate([[state.date_ts], date_ts[:-1]])
+    days = np.maximum((date_ts - prev_t) / 86400.0, 1.0)
+    deltas = (followers - prev_f) / days
+
+    window = list(state.window)
+    s_pos, s_neg = state.cusum_pos, state.cusum_neg
+    pos_start, neg_start = state.pos_start, state.neg_start
+    events: List[Event] = []
+
+    for i in np.flatnonzero(~np.isnan(deltas)):
+        delta, day, ts = float(deltas[i]), dates[i], int(date_ts[i])
+        if len(window) >= MIN_HISTORY:
+            med, scale = _baseline(window)
+            z = (delta - med) / scale
+            if abs(z) >= Z_THRESHOLD:
+                events.append((day, ts, "spike" if z > 0 else "drop", delta, z, med, ts))
+
+            # Two-sided CUSUM on winsorized z, so a lone spike cannot alarm by itself.
+            zc = min(max(z, -Z_THRESHOLD), Z_THRESHOLD)
+            s_pos = max(0.0, s_pos + zc - CUSUM_K)
+            s_neg = max(0.0, s_neg - zc - CUSUM_K)
+            pos_start = (pos_start or day) if s_pos > 0 else None
+            neg_start = (neg_start or day) if s_neg > 0 else None
+            alarm = None
+            if s_pos > CUSUM_H:
+                alarm = ("change_up", s_pos, pos_start)
+            elif s_neg > CUSUM_H:
+                alarm = ("change_down", s_neg, neg_start)
+            if alarm is not None:
+                kind, score, start = alarm
+                events.append((start, db.iso_to_epoch(start), kind, delta, score, med, ts))
+                # New segment: the baseline is rebuilt from post-change days only.
+                window = []
+                s_pos, s_neg, pos_start, neg_start = 0.0, 0.0, None, None
+        window = (window + [delta])[-WINDOW_DAYS:]
+
+    new_state = DetectorState(
+        date_ts=int(date_ts[-1]),
+        followers=float(followers[-1]),
+        window=window,
+        cusum_pos=s_pos,
+        cusum_neg=s_neg,
+        pos_start=pos_start,
+        neg_start=neg_start,
+    )
+    return new_state, events
+
+
+def _load_state(conn: sqlite3.Connection, account_id: str) -> DetectorState:
+    row = conn.execute(
+        "SELECT state_json FROM follower_detector_state WHERE account_id = ?",
+        (account_id,),
+    ).fetchone()
+    return DetectorState(**json.loads(row["state_json"])) if row else DetectorState()
+
+
+def detect_follower_events(conn: sqlite3.Connection, account_id: str) -> int:
+    # The persisted state stops one row short of the newest day, because a
+    # same-day rerun of collect_account_daily may still overwrite that day.
+    # Each run therefore re-scores the previous newest row plus anything newer:
+    # linear in new rows, never re-reading settled history.
+    state = _load_state(conn, account_id)
+    rows = conn.execute(
+        """
+        SELECT date, date_ts, followers
+        FROM account_daily
+        WHERE account_id = ? AND date_ts > ? AND followers IS NOT NULL
+        ORDER BY date_ts
+        """,
+        (account_id, state.date_ts),
+    ).fetchall()
+    if not rows:
+        return 0
+
+    dates = [r["date"] for r in rows]
+    date_ts = np.array([r["date_ts"] for r in rows], dtype="float64")
+    followers = np.array([r["followers"] for r in rows], dtype="float64")
+
+    settled, settled_events = scan(state, dates[:-1], date_ts[:-1], followers[:-1])
+    _, latest_events = scan(settled, dates[-1:], date_ts[-1:], followers[-1:])
+
+    conn.execute(
+        "DELETE FROM follower_events WHERE account_id = ? AND detected_ts > ?",
+        (account_id, state.date_ts),
+    )
+    created_at = db.utc_now_iso()
+    events = settled_events + latest_events
+    conn.executemany(
+        """
+        INSERT OR REPLACE INTO follower_events(
+            account_id, date, date_ts, kind, delta, score, baseline, detected_ts, detector, created_at
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        [(account_id, *e, DETECTOR_NAME, created_at) for e in events],
+    )
+    conn.execute(
+        """
+        INSERT INTO follower_detector_state(account_id, state_json, updated_at)
+        VALUES (?, ?, ?)
+        ON CONFLICT(account_id) DO UPDATE SET
+            state_json=excluded.state_json,
+            updated_at=excluded.updated_at
+        """,
+        (account_id, json.dumps(asdict(settled)), created_at),
+    )
+    return len(events)
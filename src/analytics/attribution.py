@@ -0,0 +1,222 @@
+import itertools
+import json
+import sqlite3
+from datetime import datetime, timezone
+from typing import Tuple
+
+import numpy as np
+
+from src import db
+
+STAGE_NAME = "follower_attribution"
+MODEL_NAME = "lagged_nnls"
+# Follower gain on day t is regressed on account bookmark gains of days t..t-MAX_LAG.
+MAX_LAG = 2
+FIT_WINDOW_DAYS = 28
+MIN_FIT_DAYS = 10
+DAY = 86400
+
+
+def _day_grid(first_ts: int, last_ts: int) -> np.ndarray:
+    return np.arange(first_ts - first_ts % DAY, last_ts - last_ts % DAY + DAY, DAY, dtype=np.int64)
+
+
+def _utc_date(ts: int) -> str:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).date().isoformat()
+
+
+def _lagged(values: np.ndarray) -> np.ndarray:
+    # (T, MAX_LAG + 1): column l holds values[t - l], NaN before the grid start.
+    out = np.full((len(values), MAX_LAG + 1), np.nan)
+    for lag in range(MAX_LAG + 1):
+        out[lag:, lag] = values[: len(values) - lag]
+    return out
+
+
+def _window_sums(values: np.ndarray, window: int) -> np.ndarray:
+    # Trailing sums over the last `window` rows along axis 0, via one cumsum.
+    csum = np.concatenate([np.zeros((1,) + values.shape[1:]), np.cumsum(values, axis=0)])
+    start = np.maximum(np.arange(1, len(values) + 1) - window, 0)
+    return csum[1:] - csum[start]
+
+
+def fit_lagged_nnls(
+    y: np.ndarray, lags: np.ndarray, window: int = FIT_WINDOW_DAYS
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # For every day t, fits y ~ intercept + lags @ beta over the trailing
+    # `window` valid days with beta >= 0 (intercept free). Gram matrices come
+    # from sliding sums, and the NNLS is solved exactly by enumerating the
+    # 2^(MAX_LAG+1) active sets as batched solves. Returns (coef (T, k+1) with
+    # the intercept first, valid-day counts, r2).
+    T, k = lags.shape
+    x = np.concatenate([np.ones((T, 1)), lags], axis=1)
+    valid = ~np.isnan(y) & ~np.isnan(x).any(axis=1)
+    xv = np.where(valid[:, None], x, 0.0)
+    yv = np.where(valid, y, 0.0)
+
+    n = _window_sums(valid.astype("float64"), window)
+    gram = _window_sums(xv[:, :, None] * xv[:, None, :], window)
+    xty = _window_sums(xv * yv[:, None], window)
+    yty = _window_sums(yv * yv, window)
+    ysum = _window_sums(yv, window)
+
+    best_sse = np.full(T, np.inf)
+    coef = np.zeros((T, k + 1))
+    for size in range(k + 1):
+        for active in itertools.combinations(range(1, k + 1), size):
+            cols = [0, *active]
+            g = gram[:, cols][:, :, cols] + 1e-9 * np.eye(len(cols))
+            beta = np.linalg.solve(g, xty[:, cols][:, :, None])[:, :, 0]
+            feasible = (beta[:, 1:] >= 0).all(axis=1)
+            sse = yty - 2 * (beta * xty[:, cols]).sum(axis=1) + np.einsum("ti,tij,tj->t", beta, g, beta)
+            better = feasible & (sse < best_sse - 1e-12)
+            best_sse = np.where(better, sse, best_sse)
+            full = np.zeros((T, k + 1))
+            full[:, cols] = beta
+            coef = np.where(better[:, None], full, coef)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sst = yty - ysum * ysum / np.maximum(n, 1)
+        r2 = np.where(sst > 0, 1 - best_sse / sst, np.nan)
+    return coef, n.astype(np.int64), r2
+
+
+def _follower_deltas(conn: sqlite3.Connection, account_id: str, grid: np.ndarray) -> np.ndarray:
+    rows = conn.execute(
+        """
+        SELECT date_ts, followers
+        FROM account_daily
+        WHERE account_id = ? AND date_ts BETWEEN ? AND ? AND followers IS NOT NULL
+        ORDER BY date_ts
+        """,
+        (account_id, int(grid[0]) - DAY, int(grid[-1])),
+    ).fetchall()
+    followers = np.full(len(grid) + 1, np.nan)
+    for r in rows:
+        followers[(int(r["date_ts"]) - int(grid[0])) // DAY + 1] = r["followers"]
+    # Only consecutive days yield a delta; gaps stay NaN and drop out of the fit.
+    return followers[1:] - followers[:-1]
+
+
+def _post_deltas(conn: sqlite3.Connection, account_id: str, grid: np.ndarray):
+    rows = conn.execute(
+        """
+        SELECT illust_id, date_ts, bookmarks_gained
+        FROM post_daily_delta
+        WHERE account_id = ? AND date_ts BETWEEN ? AND ?
+        """,
+        (account_id, int(grid[0]), int(grid[-1])),
+    ).fetchall()
+    ids = np.array([r["illust_id"] for r in rows], dtype=np.int64)
+    day_idx = np.array([(int(r["date_ts"]) - int(grid[0])) // DAY for r in rows], dtype=np.int64)
+    gained = np.array([r["bookmarks_gained"] for r in rows], dtype="float64")
+    return ids, day_idx, gained
+
+
+def invalidate_attribution(conn: sqlite3.Connection, account_id: str, date_ts: int) -> None:
+    # Called when post_daily_delta rows from date_ts on were rewritten (late
+    # snapshots can land before this stage's watermark); the next run refits
+    # from MAX_LAG days before that day.
+    db.lower_watermark(conn, STAGE_NAME, account_id, date_ts - date_ts % DAY - MAX_LAG * DAY)
+
+
+def refresh_attribution(conn: sqlite3.Connection, account_id: str) -> int:
+    # Recomputes days from the watermark day (inclusive: it may have been
+    # partial) onward, loading just enough history for the fit window and lags.
+    bounds = conn.execute(
+        """
+        SELECT
+            MIN(date_ts),
+            MAX(MAX(date_ts), COALESCE((SELECT MAX(date_ts) FROM account_daily WHERE account_id = ?), MAX(date_ts)))
+        FROM post_daily_delta
+        WHERE account_id = ?
+        """,
+        (account_id, account_id),
+    ).fetchone()
+    if bounds[0] is None:
+        return 0
+    watermark = db.get_watermark(conn, STAGE_NAME, account_id)
+    first_target = max(int(bounds[0]), watermark)
+    last_ts = max(int(bounds[1]), first_target)
+    history = (FIT_WINDOW_DAYS + MAX_LAG) * DAY
+    grid = _day_grid(max(int(bounds[0]), first_target - history), last_ts)
+
+    followers = _follower_deltas(conn, account_id, grid)
+    ids, day_idx, gained = _post_deltas(conn, account_id, grid)
+    account_gain = np.bincount(day_idx, weights=gained, minlength=len(grid))
+    lag_gain = _lagged(account_gain)
+    coef, n_days, r2 = fit_lagged_nnls(followers, lag_gain)
+
+    first_day = first_target - first_target % DAY
+    target = np.flatnonzero((grid >= first_day) & (n_days >= MIN_FIT_DAYS))
+    fitted = coef[:, 0] + np.nansum(coef[:, 1:] * lag_gain, axis=1)
+    updated_at = db.utc_now_iso()
+    fits = [
+        (
+            account_id,
+            _utc_date(int(grid[t])),
+            int(grid[t]),
+            None if np.isnan(followers[t]) else float(followers[t]),
+            float(coef[t, 0]),
+            json.dumps([float(b) for b in coef[t, 1:]]),
+            float(fitted[t]),
+            None if np.isnan(r2[t]) else float(r2[t]),
+            int(n_days[t]),
+            MODEL_NAME,
+            updated_at,
+        )
+        for t in target
+    ]
+
+    # A post's bookmarks on day d feed days d..d+MAX_LAG, weighted by that
+    # day's lag coefficient; summed per (day, post) with one unique/bincount.
+    is_target = np.zeros(len(grid) + MAX_LAG + 1, dtype=bool)
+    is_target[target] = True
+    parts_t, parts_id, parts_value, parts_bookmarks = [], [], [], []
+    for lag in range(MAX_LAG + 1):
+        t_idx = day_idx + lag
+        keep = is_target[t_idx]
+        parts_t.append(t_idx[keep])
+        parts_id.append(ids[keep])
+        parts_value.append(coef[t_idx[keep], 1 + lag] * gained[keep])
+        parts_bookmarks.append(gained[keep] if lag == 0 else np.zeros(keep.sum()))
+    keys, inverse = np.unique(
+        np.stack([np.concatenate(parts_t), np.concatenate(parts_id)], axis=1), axis=0, return_inverse=True
+    )
+    inverse = inverse.reshape(-1)
+    values = np.bincount(inverse, weights=np.concatenate(parts_value), minlength=len(keys))
+    bookmarks = np.bincount(inverse, weights=np.concatenate(parts_bookmarks), minlength=len(keys))
+    attributions = [
+        (account_id, _utc_date(int(grid[t])), int(grid[t]), int(illust_id), float(v), int(b))
+        for (t, illust_id), v, b in zip(keys, values, bookmarks)
+    ]
+
+    conn.execute(
+        "DELETE FROM attribution_fits WHERE account_id = ? AND date_ts >= ?",
+        (account_id, first_day),
+    )
+    conn.execute(
+        "DELETE FROM post_attribution WHERE account_id = ? AND date_ts >= ?",
+        (account_id, first_day),
+    )
+    conn.executemany(
+        """
+        INSERT INTO attribution_fits(
+            account_id, date, date_ts, followers_delta, intercept, betas_json, fitted,
+            r2, n_days, model, updated_at
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        fits,
+    )
+    conn.executemany(
+        """
+        INSERT INTO post_attribution(
+            account_id, date, date_ts, illust_id, attributed_followers, bookmarks_gained
+        )
+        VALUES (?, ?, ?, ?, ?, ?)
+        """,
+        attributions,
+    )
+    db.set_watermark(conn, STAGE_NAME, account_id, int(grid[-1]))
+    return len(fits)
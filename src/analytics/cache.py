@@ -0,0 +1,205 @@
+import json
+import os
+import shutil
+import sqlite3
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+
+from src import db
+from src.analytics.store import (
+    METRICS,
+    STORE_FORMAT,
+    SnapshotStore,
+    build_store,
+    load_post_columns,
+    load_snapshot_store,
+    read_snapshot_columns,
+)
+
+CACHE_FORMAT = 1
+MANIFEST = "manifest.json"
+
+# post_snapshots is append-only, so rows past the watermark rowid are exactly
+# the ones a refresh has not seen. Manual and watch rows come first (in the
+# source_mode DESC order of SNAPSHOT_COLUMNS_SQL) so they win a same-minute
+# tie against both cached and new daily rows in build_store.
+NEW_ROWS_SQL = f"""
+SELECT
+    ps.illust_id,
+    ps.captured_ts,
+    {", ".join(f"COALESCE(ps.{m}, -1)" for m in METRICS)},
+    ps.source_mode <> 'daily' AS is_preferred
+FROM post_snapshots ps
+WHERE ps.rowid > ? AND ps.account_id = ?
+ORDER BY ps.source_mode DESC, ps.rowid
+"""
+
+
+def cache_dir_for(db_path: str) -> Path:
+    # data/pixiv_stats.db -> data/pixiv_stats.cache/
+    return Path(db_path).with_suffix(".cache")
+
+
+def read_manifest(cache_dir: Path) -> Optional[dict]:
+    path = Path(cache_dir) / MANIFEST
+    if not path.exists():
+        return None
+    manifest = json.loads(path.read_text(encoding="utf-8"))
+    if manifest.get("format") != CACHE_FORMAT or manifest.get("store_format") != STORE_FORMAT:
+        return None
+    return manifest
+
+
+def source_marker(conn: sqlite3.Connection) -> dict:
+    # Cheap fingerprint of what the cache was built from: the newest snapshot
+    # rowid with that row's key (a VACUUM that renumbers rowids changes it),
+    # the snapshot row count (catches deletes), and the posts table's size and
+    # last update.
+    row = conn.execute(
+        """
+        SELECT rowid, account_id, illust_id, captured_at, source_mode
+        FROM post_snapshots
+        WHERE rowid = (SELECT MAX(rowid) FROM post_snapshots)
+        """
+    ).fetchone()
+    posts = conn.execute("SELECT COUNT(*), MAX(updated_at) FROM posts").fetchone()
+    return {
+        "watermark_rowid": int(row[0]) if row else 0,
+        "watermark_key": list(row[1:]) if row else None,
+        "rows": conn.execute("SELECT COUNT(*) FROM post_snapshots").fetchone()[0],
+        "posts": list(posts),
+    }
+
+
+def _watermark_valid(conn: sqlite3.Connection, manifest: dict) -> bool:
+    # Appending is safe only if every cached row is still where it was.
+    if not manifest["watermark_key"]:
+        return manifest["watermark_rowid"] == 0
+    row = conn.execute(
+        "SELECT account_id, illust_id, captured_at, source_mode FROM post_snapshots WHERE rowid = ?",
+        (manifest["watermark_rowid"],),
+    ).fetchone()
+    if row is None or list(row) != manifest["watermark_key"]:
+        return False
+    (kept,) = conn.execute(
+        "SELECT COUNT(*) FROM post_snapshots WHERE rowid <= ?", (manifest["watermark_rowid"],)
+    ).fetchone()
+    return kept == manifest["rows"]
+
+
+def is_fresh(conn: sqlite3.Connection, manifest: Optional[dict]) -> bool:
+    if manifest is None:
+        return False
+    marker = source_marker(conn)
+    return all(manifest[k] == marker[k] for k in marker)
+
+
+def _append(conn: sqlite3.Connection, store: SnapshotStore, account_id: str, watermark: int) -> SnapshotStore:
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    cursor.execute(NEW_ROWS_SQL, (watermark, account_id))
+    ids, captured, *counters, is_preferred = read_snapshot_columns(cursor, 3 + len(METRICS))
+    preferred = is_preferred.astype(bool)
+    counts = np.diff(store.offsets)
+    old_ids = np.repeat(np.asarray(store.post_ids), counts)
+    parts = [
+        (ids[preferred], captured[preferred], [c[preferred] for c in counters]),
+        (old_ids, np.asarray(store.captured_ts), [np.asarray(store.counters[m]) for m in METRICS]),
+        (ids[~preferred], captured[~preferred], [c[~preferred] for c in counters]),
+    ]
+    return build_store(
+        account_id,
+        np.concatenate([p[0] for p in parts]),
+        np.concatenate([p[1] for p in parts]),
+        [np.concatenate([p[2][j] for p in parts]) for j in range(len(METRICS))],
+        load_post_columns(conn, account_id),
+    )
+
+
+def _posts_unchanged(conn: sqlite3.Connection, store: SnapshotStore, account_id: str) -> bool:
+    # The post-level columns a store carries (create_ts, type) still match
+    # posts; O(posts), far below the account's snapshot count.
+    posts = load_post_columns(conn, account_id)
+    types = store.post_types()
+    for k, illust_id in enumerate(store.post_ids.tolist()):
+        current = posts.get(illust_id)
+        if current is None or current != (int(store.create_ts[k]), types[k]):
+            return False
+    return True
+
+
+def refresh_snapshot_cache(conn: sqlite3.Connection, cache_dir: Path) -> Dict[str, int]:
+    # Brings the cache up to the connection's committed state. Only accounts
+    # with snapshot rows past the watermark get a new generation directory
+    # (their new rows decoded from SQLite and merged into the mapped columns);
+    # the others keep their directory unless their posts' metadata changed.
+    # The manifest is swapped in last, so readers holding the previous
+    # generation keep a consistent (if older) view. Returns rows per rewritten
+    # account.
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    manifest = read_manifest(cache_dir)
+    if manifest is not None and not _watermark_valid(conn, manifest):
+        manifest = None
+    marker = source_marker(conn)
+    if manifest is not None and all(manifest[k] == marker[k] for k in marker):
+        return {}
+
+    previous = manifest["accounts"] if manifest else {}
+    watermark = manifest["watermark_rowid"] if manifest else 0
+    generation = (manifest or {}).get("generation", 0) + 1
+    touched = {
+        r[0]
+        for r in conn.execute("SELECT DISTINCT account_id FROM post_snapshots WHERE rowid > ?", (watermark,))
+    }
+    accounts: Dict[str, dict] = {}
+    sizes: Dict[str, int] = {}
+    for (account_id,) in conn.execute("SELECT account_id FROM accounts ORDER BY account_id").fetchall():
+        entry = previous.get(account_id)
+        if entry is None:
+            store = load_snapshot_store(conn, account_id)
+        else:
+            store = SnapshotStore.load(str(cache_dir / entry["dir"]))
+            if account_id not in touched and _posts_unchanged(conn, store, account_id):
+                accounts[account_id] = entry
+                continue
+            store = _append(conn, store, account_id, watermark)
+        name = f"{account_id}.g{generation}"
+        store.save(str(cache_dir / name))
+        accounts[account_id] = {"dir": name, "snapshots": store.n_snapshots, "posts": store.n_posts}
+        sizes[account_id] = store.n_snapshots
+
+    new_manifest = {
+        "format": CACHE_FORMAT,
+        "store_format": STORE_FORMAT,
+        "generation": generation,
+        **marker,
+        "accounts": accounts,
+        "updated_at": db.utc_now_iso(),
+    }
+    tmp = cache_dir / f"{MANIFEST}.tmp"
+    tmp.write_text(json.dumps(new_manifest, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, cache_dir / MANIFEST)
+
+    live = {entry["dir"] for entry in accounts.values()}
+    for path in cache_dir.iterdir():
+        if path.is_dir() and path.name not in live:
+            shutil.rmtree(path, ignore_errors=True)
+    return sizes
+
+
+def open_snapshot_store(conn: sqlite3.Connection, cache_dir: Path, account_id: str) -> SnapshotStore:
+    # Zero-copy mmap of the cached columns when the cache matches the DB the
+    # connection sees; otherwise (missing, stale or unknown account) the store
+    # is built from SQLite directly.
+    manifest = read_manifest(Path(cache_dir))
+    entry = manifest["accounts"].get(account_id) if manifest else None
+    if entry is not None and is_fresh(conn, manifest):
+        try:
+            return SnapshotStore.load(str(Path(cache_dir) / entry["dir"]), mmap=True)
+        except (OSError, ValueError):
+            pass
+    return load_snapshot_store(conn, account_id)
+
@@ -0,0 +1,104 @@
+import numpy as np
+
+
+def interp_on_grid(
+    codes: np.ndarray,
+    x: np.ndarray,
+    y: np.ndarray,
+    grid: np.ndarray,
+    n_series: int,
+) -> np.ndarray:
+    # Linear interpolation of many series onto one grid in a single pass.
+    # Rows must be sorted by (codes, x) with unique x per series; the result is
+    # (n_series, len(grid)) with NaN outside each series' observed range.
+    grid = np.asarray(grid, dtype="float64")
+    out = np.full((n_series, len(grid)), np.nan)
+    if len(x) == 0 or n_series == 0:
+        return out
+
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+    codes = np.asarray(codes, dtype=np.int64)
+
+    # Shift each series onto its own disjoint stretch of the axis so one
+    # searchsorted call locates every (series, grid point) pair at once.
+    lowest = min(x.min(), grid.min())
+    span = max(x.max(), grid.max()) - lowest + 1.0
+    xs = (x - lowest) + codes * span
+    series = np.arange(n_series)
+    starts = np.searchsorted(codes, series, side="left")
+    ends = np.searchsorted(codes, series, side="right")
+
+    q = ((grid - lowest)[None, :] + (series * span)[:, None]).ravel()
+    seg_start = np.repeat(starts, len(grid))
+    seg_end = np.repeat(ends, len(grid))
+
+    hi = np.searchsorted(xs, q, side="left")
+    lo = hi - 1
+    flat = out.ravel()
+
+    exact = (hi < seg_end) & (xs[np.minimum(hi, len(xs) - 1)] == q)
+    flat[exact] = y[hi[exact]]
+
+    inside = ~exact & (lo >= seg_start) & (hi < seg_end)
+    lo_i, hi_i = lo[inside], hi[inside]
+    frac = (q[inside] - xs[lo_i]) / (xs[hi_i] - xs[lo_i])
+    flat[inside] = y[lo_i] + (y[hi_i] - y[lo_i]) * frac
+    return flat.reshape(n_series, len(grid))
+
+
+def values_at_horizons(
+    codes: np.ndarray,
+    x: np.ndarray,
+    y: np.ndarray,
+    horizons: np.ndarray,
+    n_series: int,
+    tolerance: float,
+    interpolate: bool = False,
+) -> np.ndarray:
+    # (n_series, len(horizons)) values read off each series at every horizon
+    # in one searchsorted pass; rows sorted by (codes, x) with unique x per
+    # series, as for interp_on_grid. Nearest picks the closest row within
+    # tolerance (ties go to the later one, as in load_growth_benchmark);
+    # interpolate draws a line between the rows bracketing the horizon when
+    # both are within tolerance. NaN otherwise.
+    horizons = np.asarray(horizons, dtype="float64")
+    out = np.full((n_series, len(horizons)), np.nan)
+    if len(x) == 0 or n_series == 0 or len(horizons) == 0:
+        return out
+
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+    codes = np.asarray(codes, dtype=np.int64)
+
+    lowest = min(x.min(), horizons.min())
+    span = max(x.max(), horizons.max()) - lowest + 1.0
+    xs = (x - lowest) + codes * span
+    series = np.arange(n_series)
+    seg_start = np.repeat(np.searchsorted(codes, series, side="left"), len(horizons))
+    seg_end = np.repeat(np.searchsorted(codes, series, side="right"), len(horizons))
+    q = ((horizons - lowest)[None, :] + (series * span)[:, None]).ravel()
+
+    after = np.searchsorted(xs, q, side="left")
+    before = after - 1
+    has_after = after < seg_end
+    has_before = before >= seg_start
+    after_c = np.minimum(after, len(xs) - 1)
+    before_c = np.maximum(before, 0)
+    d_after = np.where(has_after, xs[after_c] - q, np.inf)
+    d_before = np.where(has_before, q - xs[before_c], np.inf)
+    flat = out.ravel()
+
+    if interpolate:
+        exact = d_after == 0
+        flat[exact] = y[after_c[exact]]
+        inside = ~exact & (d_after <= tolerance) & (d_before <= tolerance)
+        lo_i, hi_i = before_c[inside], after_c[inside]
+        frac = d_before[inside] / (xs[hi_i] - xs[lo_i])
+        flat[inside] = y[lo_i] + (y[hi_i] - y[lo_i]) * frac
+    else:
+        use_after = (d_after <= tolerance) & (d_after <= d_before)
+        use_before = ~use_after & (d_before <= tolerance)
+        flat[use_after] = y[after_c[use_after]]
+        flat[use_before] = y[before_c[use_before]]
+    return flat.reshape(n_series, len(horizons))
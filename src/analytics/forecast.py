@@ -0,0 +1,162 @@
+import sqlite3
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from src import db
+from src.analytics.curves import interp_on_grid
+from src.analytics.store import MISSING, load_snapshot_store
+
+DEFAULT_METRIC = "bookmark_count"
+DEFAULT_HORIZON_HOURS = 168.0
+MIN_TEMPLATE_POSTS = 5
+TEMPLATE_GRID_POINTS = 25
+MODEL_NAME = "log_growth_template"
+METRIC_COLUMNS = ("bookmark_count", "like_count", "view_count", "comment_count")
+
+# Fallback template key covering every post type of the account.
+ALL_TYPES = "*"
+
+
+def _load_account_curves(conn: sqlite3.Connection, account_id: str, metric: str):
+    # Flattened rows of the account's snapshot store; the store already keeps
+    # one snapshot per post and minute.
+    store = load_snapshot_store(conn, account_id)
+    values = store.counters[metric]
+    x = store.elapsed_hours()
+    keep = (values != MISSING) & (x >= 0)
+    counts = np.diff(store.offsets)
+    ids = np.repeat(store.post_ids, counts)[keep]
+    types = np.repeat(store.post_types(), counts)[keep]
+    return ids, types, store.captured_ts[keep], x[keep], values[keep].astype("float64")
+
+
+def _epoch_to_iso(ts: int) -> str:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).isoformat()
+
+
+def template_grid(horizon_hours: float) -> np.ndarray:
+    grid = np.geomspace(1.0, horizon_hours, TEMPLATE_GRID_POINTS)
+    grid[-1] = horizon_hours
+    return grid
+
+
+def fit_templates(
+    codes: np.ndarray,
+    x: np.ndarray,
+    y: np.ndarray,
+    series_types: np.ndarray,
+    horizon_hours: float,
+) -> Dict[str, Tuple[np.ndarray, np.ndarray, float, int]]:
+    # Per post type, the distribution of log1p(value(h)) - log1p(value(horizon))
+    # over posts that have been observed past the horizon. Returns
+    # {type: (grid, [p10, p50, p90] x grid, baseline value at horizon, n posts)}.
+    grid = template_grid(horizon_hours)
+    logv = interp_on_grid(codes, x, np.log1p(y), grid, n_series=len(series_types))
+    at_horizon = logv[:, -1]
+    mature = ~np.isnan(at_horizon)
+    ratios = logv[:, :-1] - at_horizon[:, None]
+
+    templates = {}
+    for type_key in [ALL_TYPES, *sorted(set(series_types[mature]))]:
+        mask = mature if type_key == ALL_TYPES else mature & (series_types == type_key)
+        if mask.sum() < MIN_TEMPLATE_POSTS:
+            continue
+        group = ratios[mask]
+        enough = (~np.isnan(group)).sum(axis=0) >= MIN_TEMPLATE_POSTS
+        if not enough.any():
+            continue
+        bands = np.nanpercentile(group[:, enough], [10, 50, 90], axis=0)
+        baseline = float(np.median(np.expm1(at_horizon[mask])))
+        templates[type_key] = (grid[:-1][enough], bands, baseline, int(mask.sum()))
+    return templates
+
+
+def project(
+    templates: Dict[str, Tuple[np.ndarray, np.ndarray, float, int]],
+    type_key: str,
+    observed_hours: np.ndarray,
+    observed_values: np.ndarray,
+) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray, float, int]]:
+    template = templates.get(type_key) or templates.get(ALL_TYPES)
+    if template is None:
+        return None
+    grid, bands, baseline, sample_size = template
+
+    log_h = np.log(np.maximum(observed_hours, grid[0]))
+    p10, p50, p90 = (np.interp(log_h, np.log(grid), band) for band in bands)
+    observed_log = np.log1p(observed_values)
+    projected = np.maximum(np.expm1(observed_log - p50), observed_values)
+    lower = np.maximum(np.expm1(observed_log - p90), observed_values)
+    upper = np.maximum(np.expm1(observed_log - p10), observed_values)
+    return projected, lower, upper, baseline, sample_size
+
+
+def refresh_forecasts(
+    conn: sqlite3.Connection,
+    account_id: str,
+    metric: str = DEFAULT_METRIC,
+    horizon_hours: float = DEFAULT_HORIZON_HOURS,
+) -> int:
+    if metric not in METRIC_COLUMNS:
+        raise ValueError(f"unsupported forecast metric: {metric}")
+
+    ids, types, captured, x, y = _load_account_curves(conn, account_id, metric)
+    if len(ids) == 0:
+        return 0
+
+    series_ids, starts, codes = np.unique(ids, return_index=True, return_inverse=True)
+    ends = np.append(starts[1:], len(ids))
+    series_types = types[starts]
+    templates = fit_templates(codes, x, y, series_types, horizon_hours)
+
+    last = ends - 1
+    recent = x[last] < horizon_hours
+    known = {
+        int(r["illust_id"]): db.iso_to_epoch(r["based_on_captured_at"])
+        for r in conn.execute(
+            """
+            SELECT illust_id, based_on_captured_at
+            FROM post_forecasts
+            WHERE account_id = ? AND metric = ? AND horizon_hours = ?
+            """,
+            (account_id, metric, horizon_hours),
+        ).fetchall()
+    }
+    stale = np.array(
+        [known.get(int(i)) != int(c) for i, c in zip(series_ids, captured[last])],
+        dtype=bool,
+    )
+    todo = np.flatnonzero(recent & stale)
+
+    updated_at = db.utc_now_iso()
+    rows = []
+    for type_key in sorted(set(series_types[todo])):
+        members = todo[series_types[todo] == type_key]
+        result = project(templates, type_key, x[last[members]], y[last[members]])
+        if result is None:
+            continue
+        projected, lower, upper, baseline, sample_size = result
+        for k, s in enumerate(members):
+            rows.append(
+                (
+                    account_id,
+                    int(series_ids[s]),
+                    metric,
+                    horizon_hours,
+                    _epoch_to_iso(int(captured[last[s]])),
+                    float(x[last[s]]),
+                    float(y[last[s]]),
+                    float(projected[k]),
+                    float(lower[k]),
+                    float(upper[k]),
+                    baseline,
+                    MODEL_NAME,
+                    sample_size,
+                    updated_at,
+                )
+            )
+
+    db.upsert_post_forecasts(conn, rows)
+    return len(rows)
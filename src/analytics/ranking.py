@@ -0,0 +1,173 @@
+import json
+import sqlite3
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from src import db
+from src.analytics.forecast import ALL_TYPES
+from src.analytics.store import METRICS, MISSING, SnapshotStore, build_store, load_post_columns, read_snapshot_columns
+
+STAGE_NAME = "percentile_ranks"
+HORIZONS = (24.0, 72.0, 168.0)
+# Same window the Growth Compare table uses by default.
+TOLERANCE_HOURS = 6.0
+
+# Full history of every post that received a snapshot past the watermark, in
+# SNAPSHOT_COLUMNS_SQL order (manual first within a minute). The watermark is a
+# post_snapshots rowid: the table is append-only, and merged shard rows or
+# manual runs can carry captured_ts older than rows already seen.
+TOUCHED_SNAPSHOTS_SQL = f"""
+SELECT
+    ps.illust_id,
+    ps.captured_ts,
+    {", ".join(f"COALESCE(ps.{m}, {MISSING})" for m in METRICS)}
+FROM post_snapshots ps
+WHERE ps.account_id = ?
+  AND ps.illust_id IN (
+    SELECT DISTINCT illust_id
+    FROM post_snapshots
+    WHERE rowid > ? AND account_id = ?
+  )
+ORDER BY ps.illust_id, ps.captured_ts, ps.source_mode DESC
+"""
+
+
+def percentile_of(sorted_values: np.ndarray, values) -> np.ndarray:
+    # Mid-rank percentile (0-100) of each value in a sorted distribution: two
+    # binary searches per value. NaN values or an empty distribution give NaN.
+    values = np.asarray(values, dtype="float64")
+    if len(sorted_values) == 0:
+        return np.full(values.shape, np.nan)
+    below = np.searchsorted(sorted_values, values, side="left")
+    at_or_below = np.searchsorted(sorted_values, values, side="right")
+    pct = (below + at_or_below) * 50.0 / len(sorted_values)
+    return np.where(np.isnan(values), np.nan, pct)
+
+
+def update_sorted(sorted_values: np.ndarray, removed: np.ndarray, added: np.ndarray) -> np.ndarray:
+    # Removes one occurrence of each removed value and inserts the added ones
+    # without re-sorting the distribution.
+    out = np.asarray(sorted_values, dtype="float64")
+    if len(removed):
+        removed = np.sort(np.asarray(removed, dtype="float64"))
+        # Equal removed values take consecutive slots of their run.
+        idx = np.searchsorted(out, removed) + np.arange(len(removed)) - np.searchsorted(removed, removed)
+        if (idx >= len(out)).any() or (out[np.minimum(idx, len(out) - 1)] != removed).any():
+            raise ValueError("removed values are not in the distribution")
+        out = np.delete(out, idx)
+    if len(added):
+        added = np.sort(np.asarray(added, dtype="float64"))
+        out = np.insert(out, np.searchsorted(out, added), added)
+    return out
+
+
+def encode_distribution(sorted_values: np.ndarray) -> bytes:
+    return np.ascontiguousarray(sorted_values, dtype="<f8").tobytes()
+
+
+def decode_distribution(blob: Optional[bytes]) -> np.ndarray:
+    if not blob:
+        return np.empty(0, dtype="float64")
+    return np.frombuffer(blob, dtype="<f8")
+
+
+def horizon_values(store: SnapshotStore, metric: str, horizon_hours: float, tolerance_hours: float = TOLERANCE_HOURS):
+    # (illust_ids, values, types) of the store's posts that have a snapshot
+    # within tolerance of the horizon, valued like load_growth_benchmark.
+    picked, _ = store.nearest_at(metric, horizon_hours, tolerance_hours)
+    found = picked >= 0
+    values = store.counters[metric][picked[found]].astype("float64")
+    return store.post_ids[found], values, store.post_types()[found]
+
+
+def _load_touched(conn: sqlite3.Connection, account_id: str, watermark: int) -> SnapshotStore:
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    cursor.execute(TOUCHED_SNAPSHOTS_SQL, (account_id, watermark, account_id))
+    ids, captured, *counters = read_snapshot_columns(cursor, 2 + len(METRICS))
+    return build_store(account_id, ids, captured, counters, load_post_columns(conn, account_id))
+
+
+def _previous_values(
+    conn: sqlite3.Connection, account_id: str, metric: str, horizon_hours: float, ids: Iterable[int]
+) -> Dict[int, Tuple[float, str]]:
+    return {
+        int(r["illust_id"]): (float(r["value"]), r["post_type"])
+        for r in conn.execute(
+            """
+            SELECT illust_id, value, post_type
+            FROM post_horizon_values
+            WHERE account_id = ? AND metric = ? AND horizon_hours = ?
+              AND illust_id IN (SELECT value FROM json_each(?))
+            """,
+            (account_id, metric, horizon_hours, json.dumps([int(i) for i in ids])),
+        ).fetchall()
+    }
+
+
+def _rebuild_distribution(
+    conn: sqlite3.Connection, account_id: str, post_type: str, metric: str, horizon_hours: float
+) -> np.ndarray:
+    type_filter = "" if post_type == ALL_TYPES else "AND post_type = ?"
+    params = [account_id, metric, horizon_hours] + ([] if post_type == ALL_TYPES else [post_type])
+    rows = conn.execute(
+        f"""
+        SELECT value FROM post_horizon_values
+        WHERE account_id = ? AND metric = ? AND horizon_hours = ? {type_filter}
+        ORDER BY value
+        """,
+        params,
+    ).fetchall()
+    return np.array([r[0] for r in rows], dtype="float64")
+
+
+def refresh_rankings(conn: sqlite3.Connection, account_id: str) -> int:
+    # Per (post type, metric, horizon) sorted distributions of the value each
+    # post had at the horizon. Only posts with snapshots past the stage
+    # watermark are re-evaluated; their old values are swapped for the new
+    # ones in place, so a run costs O(touched posts) plus one memmove per
+    # changed distribution.
+    watermark = db.get_watermark(conn, STAGE_NAME, account_id)
+    (last_rowid,) = conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM post_snapshots").fetchone()
+    if last_rowid <= watermark:
+        return 0
+    store = _load_touched(conn, account_id, watermark)
+
+    updated_at = db.utc_now_iso()
+    changed = 0
+    for metric in METRICS:
+        for horizon in HORIZONS:
+            ids, values, types = horizon_values(store, metric, horizon)
+            previous = _previous_values(conn, account_id, metric, horizon, ids)
+            deltas: Dict[str, Tuple[List[float], List[float]]] = {}
+            rows = []
+            for illust_id, value, post_type in zip(ids.tolist(), values.tolist(), types.tolist()):
+                old = previous.get(illust_id)
+                if old is not None and old == (value, post_type):
+                    continue
+                rows.append((account_id, illust_id, metric, horizon, value, post_type, updated_at))
+                for key in (ALL_TYPES, post_type):
+                    deltas.setdefault(key, ([], []))[1].append(value)
+                if old is not None:
+                    for key in (ALL_TYPES, old[1]):
+                        deltas.setdefault(key, ([], []))[0].append(old[0])
+            if not rows:
+                continue
+
+            db.upsert_post_horizon_values(conn, rows)
+            current = db.get_metric_distributions(conn, account_id, metric, horizon, list(deltas))
+            distributions = []
+            for post_type, (removed, added) in deltas.items():
+                try:
+                    merged = update_sorted(decode_distribution(current.get(post_type)), removed, added)
+                except ValueError:
+                    merged = _rebuild_distribution(conn, account_id, post_type, metric, horizon)
+                distributions.append(
+                    (account_id, post_type, metric, horizon, len(merged), encode_distribution(merged), updated_at)
+                )
+            db.upsert_metric_distributions(conn, distributions)
+            changed += len(rows)
+
+    db.set_watermark(conn, STAGE_NAME, account_id, int(last_rowid))
+    return changed
@@ -0,0 +1,137 @@
+import sqlite3
+from datetime import datetime, timezone
+from typing import Dict, Tuple
+
+from src import db
+from src.analytics.attribution import invalidate_attribution
+
+# The watermark is a post_snapshots rowid (it was a captured_ts under the old
+# stage name, so DBs written before the change rebuild once).
+STAGE_NAME = "daily_performance_rows"
+
+# A post's first snapshot counts as gain from zero only when it was taken soon
+# after publication; older posts first seen later would otherwise dump their
+# whole lifetime total into a single day.
+FIRST_SAMPLE_MAX_HOURS = 48
+
+# Posts with snapshot rows past the watermark rowid. post_snapshots is
+# append-only, but merged shards and buffered watch rows can carry captured_ts
+# older than rows already rolled up, so a captured_ts watermark would skip them.
+TOUCHED_POSTS_SQL = """
+SELECT DISTINCT illust_id
+FROM post_snapshots
+WHERE rowid > ? AND account_id = ?
+"""
+
+# Full history of the touched posts, one row per (post, captured_ts) (daily and
+# manual in the same minute collapse like LATEST_SNAPSHOT_ROWID_SQL), each
+# paired with the post's previous snapshot. A late row can land between two
+# rows already paired, so the touched posts are re-paired from scratch.
+SNAPSHOT_PAIRS_SQL = f"""
+WITH touched AS ({TOUCHED_POSTS_SQL}),
+dedup AS (
+    SELECT
+        ps.illust_id,
+        ps.captured_ts,
+        ps.bookmark_count,
+        ps.view_count,
+        ps.like_count,
+        ROW_NUMBER() OVER (
+            PARTITION BY ps.illust_id, ps.captured_ts
+            ORDER BY ps.source_mode DESC
+        ) AS rn
+    FROM post_snapshots ps
+    JOIN touched t ON t.illust_id = ps.illust_id
+    WHERE ps.account_id = ?
+),
+paired AS (
+    SELECT
+        illust_id,
+        captured_ts,
+        bookmark_count,
+        view_count,
+        like_count,
+        LAG(captured_ts) OVER w AS prev_ts,
+        LAG(bookmark_count) OVER w AS prev_bookmark_count,
+        LAG(view_count) OVER w AS prev_view_count,
+        LAG(like_count) OVER w AS prev_like_count
+    FROM dedup
+    WHERE rn = 1
+    WINDOW w AS (PARTITION BY illust_id ORDER BY captured_ts)
+)
+SELECT paired.*, p.create_ts
+FROM paired
+JOIN posts p
+  ON p.account_id = ?
+ AND p.illust_id = paired.illust_id
+"""
+
+
+def _gain(current, previous) -> int:
+    if current is None:
+        return 0
+    return int(current) - int(previous or 0)
+
+
+def _utc_date(ts: int) -> Tuple[str, int]:
+    day = datetime.fromtimestamp(ts, tz=timezone.utc).date()
+    return day.isoformat(), ts - ts % 86400
+
+
+def refresh_daily_performance(conn: sqlite3.Connection, account_id: str) -> int:
+    # Gains between consecutive snapshots, credited to the UTC day of the later
+    # one. Only posts with snapshot rows past the stage watermark are re-read
+    # and their post_daily_delta rows rebuilt, so each run costs O(history of
+    # touched posts); aggregate reads hit account_daily_performance (O(days)).
+    # Returns the number of new snapshot rows.
+    watermark = db.get_watermark(conn, STAGE_NAME, account_id)
+    (last_rowid,) = conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM post_snapshots").fetchone()
+    new_rows = dict(
+        conn.execute(
+            "SELECT illust_id, COUNT(*) FROM post_snapshots WHERE rowid > ? AND account_id = ? GROUP BY illust_id",
+            (watermark, account_id),
+        ).fetchall()
+    )
+    if not new_rows:
+        return 0
+
+    old = db.delete_post_daily_deltas(conn, account_id, [int(i) for i in new_rows])
+    rows = conn.execute(SNAPSHOT_PAIRS_SQL, (watermark, account_id, account_id, account_id)).fetchall()
+
+    totals: Dict[Tuple[int, str], list] = {}
+    for r in rows:
+        if r["prev_ts"] is None:
+            if r["captured_ts"] - r["create_ts"] > FIRST_SAMPLE_MAX_HOURS * 3600:
+                continue
+            gains = (_gain(r["bookmark_count"], 0), _gain(r["view_count"], 0), _gain(r["like_count"], 0))
+        else:
+            gains = (
+                _gain(r["bookmark_count"], r["prev_bookmark_count"]),
+                _gain(r["view_count"], r["prev_view_count"]),
+                _gain(r["like_count"], r["prev_like_count"]),
+            )
+        date, date_ts = _utc_date(int(r["captured_ts"]))
+        acc = totals.setdefault((int(r["illust_id"]), date), [date_ts, 0, 0, 0, 0])
+        acc[1] += gains[0]
+        acc[2] += gains[1]
+        acc[3] += gains[2]
+        acc[4] += 1
+
+    db.add_post_daily_deltas(
+        conn,
+        [(account_id, illust_id, date, *acc) for (illust_id, date), acc in totals.items()],
+    )
+    # Only days whose post rows differ from the ones just deleted need their
+    # totals (and the attribution fits reading them) redone.
+    rebuilt = {key: tuple(acc) for key, acc in totals.items()}
+    changed = {
+        key[1]: row[0]
+        for rows in (old, rebuilt)
+        for key, row in rows.items()
+        if old.get(key) != rebuilt.get(key)
+    }
+    if changed:
+        db.refresh_account_daily_performance(conn, account_id, changed)
+        invalidate_attribution(conn, account_id, min(changed.values()))
+    db.set_watermark(conn, STAGE_NAME, account_id, int(last_rowid))
+    return sum(new_rows.values())
@@ -0,0 +1,17 @@
+import sqlite3
+
+from src.analytics.anomaly import detect_follower_events
+from src.analytics.attribution import refresh_attribution
+from src.analytics.forecast import refresh_forecasts
+from src.analytics.ranking import refresh_rankings
+from src.analytics.rollups import refresh_daily_performance
+
+
+def refresh_account_stages(conn: sqlite3.Connection, account_id: str) -> None:
+    # Derived tables for one account, in dependency order (attribution reads
+    # the daily rollup). Each stage is incremental and safe to rerun.
+    detect_follower_events(conn, account_id)
+    refresh_forecasts(conn, account_id)
+    refresh_rankings(conn, account_id)
+    refresh_daily_performance(conn, account_id)
+    refresh_attribution(conn, account_id)
@@ -0,0 +1,236 @@
+import json
+import sqlite3
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.analytics.curves import interp_on_grid
+
+METRICS = ("bookmark_count", "like_count", "view_count", "comment_count")
+# NULL counters are stored as this sentinel so the columns stay int32.
+MISSING = -1
+STORE_FORMAT = 1
+CHUNK_ROWS = 65536
+
+# One row per (post, captured_ts): when daily and manual land in the same
+# minute the manual row wins, as in analytics.rollups. Posts without
+# snapshots are left out.
+SNAPSHOT_COLUMNS_SQL = f"""
+SELECT
+    ps.illust_id,
+    ps.captured_ts,
+    {", ".join(f"COALESCE(ps.{m}, {MISSING})" for m in METRICS)}
+FROM post_snapshots ps
+JOIN posts p
+  ON p.account_id = ps.account_id
+ AND p.illust_id = ps.illust_id
+WHERE ps.account_id = ?
+ORDER BY ps.illust_id, ps.captured_ts, ps.source_mode DESC
+"""
+
+
+@dataclass
+class SnapshotStore:
+    # CSR layout: post k owns rows offsets[k]:offsets[k + 1] of the snapshot
+    # columns, ordered by captured_ts. Post-level arrays are sorted by illust_id.
+    account_id: str
+    post_ids: np.ndarray
+    create_ts: np.ndarray
+    type_codes: np.ndarray
+    type_names: List[str]
+    offsets: np.ndarray
+    captured_ts: np.ndarray
+    counters: Dict[str, np.ndarray] = field(default_factory=dict)
+
+    @property
+    def n_posts(self) -> int:
+        return len(self.post_ids)
+
+    @property
+    def n_snapshots(self) -> int:
+        return len(self.captured_ts)
+
+    @property
+    def nbytes(self) -> int:
+        arrays = [self.post_ids, self.create_ts, self.type_codes, self.offsets, self.captured_ts]
+        return sum(a.nbytes for a in arrays) + sum(a.nbytes for a in self.counters.values())
+
+    def post_index(self, illust_id: int) -> Optional[int]:
+        k = int(np.searchsorted(self.post_ids, illust_id))
+        if k < self.n_posts and self.post_ids[k] == illust_id:
+            return k
+        return None
+
+    def series(self, illust_id: int, metric: str = "bookmark_count") -> Tuple[np.ndarray, np.ndarray]:
+        # Views into the shared columns; nothing is copied.
+        k = self.post_index(illust_id)
+        if k is None:
+            return self.captured_ts[:0], self.counters[metric][:0]
+        lo, hi = self.offsets[k], self.offsets[k + 1]
+        return self.captured_ts[lo:hi], self.counters[metric][lo:hi]
+
+    def post_types(self) -> np.ndarray:
+        return np.asarray(self.type_names, dtype=object)[self.type_codes]
+
+    def codes(self) -> np.ndarray:
+        # Owning post index of every snapshot row, as interp_on_grid expects.
+        return np.repeat(np.arange(self.n_posts), np.diff(self.offsets))
+
+    def elapsed_hours(self) -> np.ndarray:
+        return (self.captured_ts - np.repeat(self.create_ts, np.diff(self.offsets))) / 3600.0
+
+    def curves_on_grid(
+        self, metric: str, grid: np.ndarray, illust_ids: Optional[Sequence[int]] = None
+    ) -> np.ndarray:
+        # (n_posts, len(grid)) growth curves on a shared elapsed-hours grid, or
+        # one row per requested illust_id (all NaN for posts not in the store).
+        if illust_ids is None:
+            posts = np.arange(self.n_posts)
+            found = np.ones(self.n_posts, dtype=bool)
+        else:
+            wanted = np.asarray(illust_ids, dtype=np.int64)
+            posts = np.searchsorted(self.post_ids, wanted)
+            found = posts < self.n_posts
+            found[found] = self.post_ids[posts[found]] == wanted[found]
+        lo, hi = self.offsets[posts[found]], self.offsets[posts[found] + 1]
+        counts = hi - lo
+        rows = np.repeat(lo - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+        codes = np.repeat(np.flatnonzero(found), counts)
+
+        values = self.counters[metric][rows]
+        x = (self.captured_ts[rows] - np.repeat(self.create_ts[posts[found]], counts)) / 3600.0
+        keep = (values != MISSING) & (x >= 0)
+        return interp_on_grid(codes[keep], x[keep], values[keep].astype("float64"), grid, n_series=len(found))
+
+    def nearest_at(self, metric: str, target_hours: float, tolerance_hours: float) -> Tuple[np.ndarray, np.ndarray]:
+        # Per post, the snapshot row nearest to target_hours within tolerance
+        # (ties go to the later one), or -1; returns (row index, elapsed hours).
+        x = self.elapsed_hours()
+        diff = np.abs(x - target_hours)
+        ok = (self.counters[metric] != MISSING) & (x >= 0) & (diff <= tolerance_hours)
+        codes = self.codes()[ok]
+        rows = np.flatnonzero(ok)
+        order = np.lexsort((x[ok] < target_hours, diff[ok], codes))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = codes[order][1:] != codes[order][:-1]
+        picked = np.full(self.n_posts, -1, dtype=np.int64)
+        picked[codes[order][first]] = rows[order][first]
+        elapsed = np.where(picked >= 0, x[np.maximum(picked, 0)], np.nan)
+        return picked, elapsed
+
+    def save(self, path: str) -> None:
+        # One .npy per column plus meta.json, so load() can memory-map each.
+        out = Path(path)
+        out.mkdir(parents=True, exist_ok=True)
+        for name, array in self._arrays().items():
+            np.save(out / f"{name}.npy", array)
+        meta = {"format": STORE_FORMAT, "account_id": self.account_id, "type_names": self.type_names}
+        (out / "meta.json").write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "SnapshotStore":
+        src = Path(path)
+        meta = json.loads((src / "meta.json").read_text(encoding="utf-8"))
+        if meta.get("format") != STORE_FORMAT:
+            raise ValueError(f"unsupported snapshot store format in {path}: {meta.get('format')}")
+        mode = "r" if mmap else None
+        arrays = {p.stem: np.load(p, mmap_mode=mode) for p in src.glob("*.npy")}
+        return cls(
+            account_id=meta["account_id"],
+            post_ids=arrays["post_ids"],
+            create_ts=arrays["create_ts"],
+            type_codes=arrays["type_codes"],
+            type_names=meta["type_names"],
+            offsets=arrays["offsets"],
+            captured_ts=arrays["captured_ts"],
+            counters={m: arrays[m] for m in METRICS},
+        )
+
+    def _arrays(self) -> Dict[str, np.ndarray]:
+        return {
+            "post_ids": self.post_ids,
+            "create_ts": self.create_ts,
+            "type_codes": self.type_codes,
+            "offsets": self.offsets,
+            "captured_ts": self.captured_ts,
+            **self.counters,
+        }
+
+
+def load_post_columns(conn: sqlite3.Connection, account_id: str) -> Dict[int, Tuple[int, str]]:
+    return {
+        int(r[0]): (int(r[1]), r[2] or "")
+        for r in conn.execute(
+            "SELECT illust_id, create_ts, type FROM posts WHERE account_id = ? AND create_ts IS NOT NULL",
+            (account_id,),
+        )
+    }
+
+
+def build_store(
+    account_id: str,
+    ids: np.ndarray,
+    captured: np.ndarray,
+    counters: Sequence[np.ndarray],
+    posts: Dict[int, Tuple[int, str]],
+) -> SnapshotStore:
+    # Sorts rows by (post, captured_ts) and keeps the first row of each pair,
+    # so callers pass rows in priority order. The sort is stable on a packed
+    # int64 key, which is close to linear when the input is mostly sorted.
+    known = np.fromiter(posts, dtype=np.int64, count=len(posts))
+    keep = np.isin(ids, known)
+    if not keep.all():
+        ids, captured, counters = ids[keep], captured[keep], [c[keep] for c in counters]
+
+    post_ids = np.unique(ids)
+    if len(ids):
+        key = (np.searchsorted(post_ids, ids) << 32) | (captured - captured.min())
+        order = np.argsort(key, kind="stable")
+        key = key[order]
+        first = np.ones(len(key), dtype=bool)
+        first[1:] = key[1:] != key[:-1]
+        order = order[first]
+        ids, captured, counters = ids[order], captured[order], [c[order] for c in counters]
+
+    starts = np.searchsorted(ids, post_ids)
+    names = sorted({t for _, t in posts.values()})
+    lookup = {name: code for code, name in enumerate(names)}
+    return SnapshotStore(
+        account_id=account_id,
+        post_ids=post_ids.astype(np.int64),
+        create_ts=np.fromiter((posts[int(i)][0] for i in post_ids), dtype=np.int64, count=len(post_ids)),
+        type_codes=np.fromiter((lookup[posts[int(i)][1]] for i in post_ids), dtype=np.int16, count=len(post_ids)),
+        type_names=names,
+        offsets=np.append(starts, len(ids)).astype(np.int64),
+        captured_ts=np.ascontiguousarray(captured, dtype=np.int64),
+        counters={m: np.ascontiguousarray(c, dtype=np.int32) for m, c in zip(METRICS, counters)},
+    )
+
+
+def read_snapshot_columns(cursor: sqlite3.Cursor, width: int) -> List[np.ndarray]:
+    # Drains an all-integer result set in fixed-size chunks straight into
+    # typed columns (int64 for the first two, int32 after), so no per-row
+    # Python objects outlive a chunk.
+    columns: List[List[np.ndarray]] = [[] for _ in range(width)]
+    while True:
+        rows = cursor.fetchmany(CHUNK_ROWS)
+        if not rows:
+            break
+        chunk = np.array(rows, dtype=np.int64)
+        for j in range(width):
+            columns[j].append(np.ascontiguousarray(chunk[:, j]) if j < 2 else chunk[:, j].astype(np.int32))
+    return [
+        np.concatenate(parts) if parts else np.empty(0, dtype=np.int64 if j < 2 else np.int32)
+        for j, parts in enumerate(columns)
+    ]
+
+
+def load_snapshot_store(conn: sqlite3.Connection, account_id: str) -> SnapshotStore:
+    # One ordered scan of the account's snapshots; see read_snapshot_columns.
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    cursor.execute(SNAPSHOT_COLUMNS_SQL, (account_id,))
+    ids, captured, *counters = read_snapshot_columns(cursor, 2 + len(METRICS))
+    return build_store(account_id, ids, captured, counters, load_post_columns(conn, account_id))
@@ -1,18 +1,23 @@
-from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Optional
 
 from src import db
-from src.pixiv_client import PixivClient, extract_user_stats
+from src.pixiv_client import extract_user_stats
+from src.records import RunClock
+
+if TYPE_CHECKING:
+    from src.pixiv_client import PixivClient
 
 
 def collect_account_daily(
     conn,
-    client: PixivClient,
+    client: "PixivClient",
     account_id: str,
     pixiv_user_id: int,
+    clock: Optional[RunClock] = None,
 ) -> None:
-    now = datetime.now(timezone.utc)
-    date_str = now.date().isoformat()
-    captured_at = now.replace(second=0, microsecond=0).isoformat()
+    clock = clock or RunClock.start()
+    date_str = clock.date
+    captured_at = clock.captured_at
 
     detail = client.user_detail(pixiv_user_id)
     stats = extract_user_stats(detail)
@@ -24,3 +29,4 @@ def collect_account_daily(
         following=stats.get("following"),
         captured_at=captured_at,
     )
+    db.refresh_account_daily_rollup(conn, [date_str])
@@ -1,10 +1,11 @@
-import json
-from datetime import datetime, timedelta, timezone
-
-from dateutil import parser as dtparser
+from typing import TYPE_CHECKING, Dict, Iterable, List
 
 from src import db
-from src.pixiv_client import PixivClient, extract_post_meta, extract_snapshot
+from src.pixiv_client import extract_snapshot
+from src.records import PostRecord, RunClock
+
+if TYPE_CHECKING:
+    from src.pixiv_client import PixivClient
 
 
 def _bookmark_rate(snapshot: dict) -> float | None:
@@ -17,83 +18,54 @@ def _bookmark_rate(snapshot: dict) -> float | None:
     return float(bookmarks) / float(views)
 
 
-def _to_utc_iso(raw_datetime: str) -> str:
-    parsed = dtparser.isoparse(raw_datetime)
-    if parsed.tzinfo is None:
-        parsed = parsed.replace(tzinfo=timezone.utc)
-    return parsed.astimezone(timezone.utc).replace(microsecond=0).isoformat()
-
-
-def _captured_at_now() -> str:
-    return datetime.now(timezone.utc).replace(second=0, microsecond=0).isoformat()
-
-
-def _is_within_days(create_date_iso: str, days: int) -> bool:
-    create_dt = dtparser.isoparse(create_date_iso)
-    if create_dt.tzinfo is None:
-        create_dt = create_dt.replace(tzinfo=timezone.utc)
-    now = datetime.now(timezone.utc)
-    return create_dt.astimezone(timezone.utc) >= now - timedelta(days=days)
+def snapshot_row(account_id: str, illust_id: int, snapshot: dict, source_mode: str, clock: RunClock) -> tuple:
+    # Column order of db.insert_snapshots.
+    return (
+        account_id,
+        illust_id,
+        clock.captured_at,
+        clock.captured_ts,
+        snapshot.get("bookmark_count"),
+        _bookmark_rate(snapshot),
+        snapshot.get("like_count"),
+        snapshot.get("view_count"),
+        snapshot.get("comment_count"),
+        source_mode,
+    )
 
 
-def sync_posts_and_collect_snapshots(
+def sync_posts(
     conn,
-    client: PixivClient,
+    client: "PixivClient",
     account_id: str,
     pixiv_user_id: int,
-    source_mode: str,
+    clock: RunClock,
     max_snapshot_age_days: int = 60,
     max_pages: int = 3,
-    max_details_per_account: int = 20,
-) -> None:
-    known_ids = db.get_account_illust_ids(conn, account_id)
+) -> List[PostRecord]:
+    # Syncs post metadata and returns the posts young enough for a snapshot;
+    # which of them get a detail call is decided by src.planner.
     illusts = client.list_user_illusts(pixiv_user_id, max_pages=max_pages)
-    captured_at = _captured_at_now()
-    detail_count = 0
-
-    for illust in illusts:
-        meta = extract_post_meta(illust)
-        illust_id = meta.get("illust_id")
-        raw_create_date = meta.get("create_date")
-
-        if not illust_id or not raw_create_date:
-            continue
+    records = [r for r in (PostRecord.from_illust(account_id, illust) for illust in illusts) if r is not None]
+    db.upsert_posts(conn, [r.db_row(clock.updated_at) for r in records])
+    return [r for r in records if clock.is_within_days(r.create_ts, max_snapshot_age_days)]
 
-        create_date_iso = _to_utc_iso(raw_create_date)
-        db.upsert_post(
-            conn,
-            {
-                "account_id": account_id,
-                "illust_id": int(illust_id),
-                "create_date": create_date_iso,
-                "tags_json": json.dumps(meta.get("tags", []), ensure_ascii=False),
-                "type": meta.get("type"),
-                "page_count": meta.get("page_count"),
-                "x_restrict": meta.get("x_restrict"),
-                "title": meta.get("title"),
-            },
-        )
-
-        should_collect_snapshot = _is_within_days(create_date_iso, max_snapshot_age_days)
-        if not should_collect_snapshot:
-            continue
-        if detail_count >= max_details_per_account:
-            continue
 
-        detail = client.illust_detail(int(illust_id))
-        snapshot = extract_snapshot(detail)
-        db.insert_snapshot(
-            conn,
-            {
-                "account_id": account_id,
-                "illust_id": int(illust_id),
-                "captured_at": captured_at,
-                "bookmark_count": snapshot.get("bookmark_count"),
-                "bookmark_rate": _bookmark_rate(snapshot),
-                "like_count": snapshot.get("like_count"),
-                "view_count": snapshot.get("view_count"),
-                "comment_count": snapshot.get("comment_count"),
-                "source_mode": source_mode,
-            },
+def collect_planned_snapshots(
+    plan: Iterable[PostRecord],
+    conns: Dict[str, object],
+    clients: Dict[str, "PixivClient"],
+    source_mode: str,
+    clock: RunClock,
+) -> int:
+    # One captured_at for the whole run, so each post gets one row per run
+    # even when the plan interleaves accounts.
+    rows: Dict[str, List[tuple]] = {}
+    for item in plan:
+        snapshot = extract_snapshot(clients[item.account_id].illust_detail(item.illust_id))
+        rows.setdefault(item.account_id, []).append(
+            snapshot_row(item.account_id, item.illust_id, snapshot, source_mode, clock)
         )
-        detail_count += 1
+    for account_id, account_rows in rows.items():
+        db.insert_snapshots(conns[account_id], account_rows)
+    return sum(len(r) for r in rows.values())
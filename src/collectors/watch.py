@@ -0,0 +1,235 @@
+import heapq
+import itertools
+import time
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Set, Tuple
+
+from src import db
+from src.collectors.posts import snapshot_row
+from src.pixiv_client import extract_snapshot
+from src.planner import load_post_history
+from src.records import PostRecord, RunClock
+
+if TYPE_CHECKING:
+    from src.pixiv_client import PixivClient
+
+SOURCE_MODE = "watch"
+# (post age below, seconds between snapshots): dense while a post is fresh,
+# decaying until the daily runs take over.
+WATCH_SCHEDULE: Tuple[Tuple[int, int], ...] = (
+    (6 * 3600, 15 * 60),
+    (24 * 3600, 60 * 60),
+    (72 * 3600, 3 * 3600),
+)
+WATCH_HORIZON_SEC = WATCH_SCHEDULE[-1][0]
+# Buffered snapshot rows are written once this many pile up, or after
+# FLUSH_SEC, whichever comes first.
+BATCH_ROWS = 50
+FLUSH_SEC = 60.0
+
+POLL = "poll"
+SNAPSHOT = "snapshot"
+
+
+def next_interval(age_sec: float) -> Optional[int]:
+    # None once the post is past the watch horizon.
+    for max_age, interval in WATCH_SCHEDULE:
+        if age_sec < max_age:
+            return interval
+    return None
+
+
+class WatchQueue:
+    # Min-heap of (due_ts, seq, kind, account_id, illust_id); seq keeps equal
+    # due times in push order.
+    def __init__(self):
+        self._heap: List[tuple] = []
+        self._seq = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push(self, due_ts: float, kind: str, account_id: str, illust_id: int = 0) -> None:
+        heapq.heappush(self._heap, (due_ts, next(self._seq), kind, account_id, illust_id))
+
+    def next_due(self) -> float:
+        return self._heap[0][0]
+
+    def pop(self) -> Tuple[float, str, str, int]:
+        due_ts, _, kind, account_id, illust_id = heapq.heappop(self._heap)
+        return due_ts, kind, account_id, illust_id
+
+
+class Watcher:
+    # One poll task per account (page 1 of user_illusts) and one snapshot task
+    # per watched post share a single queue, so every API call goes through
+    # the clients' throttles in due order.
+    def __init__(
+        self,
+        conns: Dict[str, object],
+        clients: Dict[str, "PixivClient"],
+        users: Dict[str, int],
+        poll_sec: float,
+        now: Callable[[], float] = time.time,
+        batch_rows: int = BATCH_ROWS,
+        flush_sec: float = FLUSH_SEC,
+    ):
+        self.conns = conns
+        self.clients = clients
+        self.users = users
+        self.poll_sec = poll_sec
+        self.now = now
+        self.batch_rows = batch_rows
+        self.flush_sec = flush_sec
+        self.queue = WatchQueue()
+        self.watched: Dict[Tuple[str, int], int] = {}
+        self.seen: Dict[str, Set[int]] = {account_id: set() for account_id in users}
+        self.pending_posts: Dict[str, List[tuple]] = {}
+        self.pending_rows: Dict[str, List[tuple]] = {}
+        self.last_flush = now()
+        self.stats = {"polls": 0, "new_posts": 0, "snapshots": 0, "flushes": 0}
+
+    def seed(self) -> None:
+        # Posts already in the DB that are still inside the horizon resume
+        # their schedule from their newest snapshot.
+        now_ts = self.now()
+        for account_id in self.users:
+            conn = self.conns[account_id]
+            young = {
+                int(r[0]): int(r[1])
+                for r in conn.execute(
+                    "SELECT illust_id, create_ts FROM posts WHERE account_id = ? AND create_ts >= ?",
+                    (account_id, int(now_ts) - WATCH_HORIZON_SEC),
+                ).fetchall()
+            }
+            self.seen[account_id].update(young)
+            history = load_post_history(conn, account_id, young)
+            for illust_id, create_ts in young.items():
+                last = history.get(illust_id)
+                due = now_ts
+                if last is not None:
+                    interval = next_interval(last.last_ts - create_ts)
+                    due = last.last_ts + interval if interval else now_ts
+                self._watch(account_id, illust_id, create_ts, max(due, now_ts))
+            self.queue.push(now_ts, POLL, account_id)
+
+    def _watch(self, account_id: str, illust_id: int, create_ts: int, due_ts: float) -> None:
+        self.watched[(account_id, illust_id)] = create_ts
+        self.queue.push(due_ts, SNAPSHOT, account_id, illust_id)
+
+    def run_next(self) -> None:
+        _, kind, account_id, illust_id = self.queue.pop()
+        try:
+            if kind == POLL:
+                self._poll(account_id)
+            else:
+                self._snapshot(account_id, illust_id)
+        except Exception as exc:
+            # A long-running watch outlives transient API failures; the task
+            # is rescheduled as if it had run.
+            print(f"[watch] {account_id} {kind} {illust_id or ''} failed: {exc}")
+            if kind == SNAPSHOT:
+                self._reschedule(account_id, illust_id, self.now())
+        if kind == POLL:
+            self.queue.push(self.now() + self.poll_sec, POLL, account_id)
+        if self.flush_due():
+            self.flush()
+
+    def _poll(self, account_id: str) -> None:
+        self.stats["polls"] += 1
+        now_ts = self.now()
+        clock = RunClock.start(datetime.fromtimestamp(now_ts, timezone.utc))
+        illusts = self.clients[account_id].latest_user_illusts(self.users[account_id])
+        seen = self.seen[account_id]
+        for illust in illusts:
+            record = PostRecord.from_illust(account_id, illust)
+            if record is None or record.illust_id in seen:
+                continue
+            seen.add(record.illust_id)
+            self.pending_posts.setdefault(account_id, []).append(record.db_row(clock.updated_at))
+            if now_ts - record.create_ts < WATCH_HORIZON_SEC:
+                self.stats["new_posts"] += 1
+                self._watch(account_id, record.illust_id, record.create_ts, now_ts)
+
+    def _snapshot(self, account_id: str, illust_id: int) -> None:
+        now_ts = self.now()
+        clock = RunClock.start(datetime.fromtimestamp(now_ts, timezone.utc))
+        snapshot = extract_snapshot(self.clients[account_id].illust_detail(illust_id))
+        self.pending_rows.setdefault(account_id, []).append(
+            snapshot_row(account_id, illust_id, snapshot, SOURCE_MODE, clock)
+        )
+        self.stats["snapshots"] += 1
+        self._reschedule(account_id, illust_id, now_ts)
+
+    def _reschedule(self, account_id: str, illust_id: int, taken_ts: float) -> None:
+        create_ts = self.watched[(account_id, illust_id)]
+        interval = next_interval(taken_ts - create_ts)
+        if interval is None:
+            del self.watched[(account_id, illust_id)]
+        else:
+            self.queue.push(taken_ts + interval, SNAPSHOT, account_id, illust_id)
+
+    def pending(self) -> int:
+        return sum(len(rows) for rows in self.pending_rows.values())
+
+    def flush_due(self) -> bool:
+        if not self.pending_rows and not self.pending_posts:
+            return False
+        return self.pending() >= self.batch_rows or self.now() - self.last_flush >= self.flush_sec
+
+    def next_flush(self) -> Optional[float]:
+        if not self.pending_rows and not self.pending_posts:
+            return None
+        return self.last_flush + self.flush_sec
+
+    def flush(self) -> None:
+        # One short transaction per account and batch, so a daily run writing
+        # the same DB only waits for a single executemany. The collector
+        # profile disables autocheckpoint; a passive checkpoint per batch keeps
+        # the WAL of a long-running watch bounded.
+        for account_id in set(self.pending_posts) | set(self.pending_rows):
+            conn = self.conns[account_id]
+            db.upsert_posts(conn, self.pending_posts.get(account_id, []))
+            db.insert_snapshots(conn, self.pending_rows.get(account_id, []))
+            db.commit(conn)
+            db.checkpoint(conn, "PASSIVE")
+            self.stats["flushes"] += 1
+        self.pending_posts.clear()
+        self.pending_rows.clear()
+        self.last_flush = self.now()
+
+
+def run_watch(
+    conns: Dict[str, object],
+    clients: Dict[str, "PixivClient"],
+    users: Dict[str, int],
+    poll_sec: float,
+    duration_sec: Optional[float] = None,
+    now: Callable[[], float] = time.time,
+    sleep: Callable[[float], None] = time.sleep,
+    batch_rows: int = BATCH_ROWS,
+    flush_sec: float = FLUSH_SEC,
+) -> Dict[str, int]:
+    # Runs until duration_sec elapses (forever when None) or Ctrl-C; buffered
+    # rows are written either way.
+    watcher = Watcher(conns, clients, users, poll_sec, now, batch_rows, flush_sec)
+    watcher.seed()
+    deadline = None if duration_sec is None else now() + duration_sec
+    try:
+        while True:
+            current = now()
+            if deadline is not None and current >= deadline:
+                break
+            due = watcher.queue.next_due()
+            if due <= current:
+                watcher.run_next()
+                continue
+            wake = min(t for t in (due, deadline, watcher.next_flush()) if t is not None)
+            sleep(max(wake - current, 0.0))
+            if watcher.flush_due():
+                watcher.flush()
+    except KeyboardInterrupt:
+        print("[watch] interrupted, writing buffered snapshots.")
+    finally:
+        watcher.flush()
+    return watcher.stats
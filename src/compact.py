@@ -0,0 +1,242 @@
+import argparse
+import os
+import sqlite3
+import sys
+from pathlib import Path
+from typing import Dict, Optional, Sequence
+
+from src import db
+
+CAPTURED_AT_FORMAT = "%Y-%m-%dT%H:%M:%S+00:00"
+
+# Compact snapshot layout: integer account and source-mode keys, epoch
+# captured_ts only (captured_at is its canonical UTC rendering) and no stored
+# bookmark_rate: has_rate (0/1, no payload bytes) says whether the row had one,
+# and the view derives it exactly as collectors.posts does. Counters stay plain
+# INTEGER columns, which SQLite already stores as 1-4 byte varints.
+COMPACT_TABLES = (
+    """
+    CREATE TABLE snapshot_accounts (
+        account_key INTEGER PRIMARY KEY,
+        account_id TEXT NOT NULL UNIQUE
+    )
+    """,
+    """
+    CREATE TABLE snapshot_sources (
+        source INTEGER PRIMARY KEY,
+        source_mode TEXT NOT NULL UNIQUE
+    )
+    """,
+    """
+    CREATE TABLE snapshot_rows (
+        account_key INTEGER NOT NULL,
+        illust_id INTEGER NOT NULL,
+        captured_ts INTEGER NOT NULL,
+        source INTEGER NOT NULL,
+        bookmark_count INTEGER,
+        like_count INTEGER,
+        view_count INTEGER,
+        comment_count INTEGER,
+        has_rate INTEGER NOT NULL,
+        UNIQUE (account_key, illust_id, captured_ts, source)
+    )
+    """,
+    "CREATE INDEX idx_snapshot_rows_captured_ts ON snapshot_rows(captured_ts)",
+)
+
+# The logical post_snapshots rows, rowid included: stage watermarks, the
+# analytics cache and export --resume positions stay valid across a conversion.
+LOGICAL_SNAPSHOTS_SQL = f"""
+SELECT
+    r.rowid AS rowid,
+    a.account_id,
+    r.illust_id,
+    strftime('{CAPTURED_AT_FORMAT}', r.captured_ts, 'unixepoch') AS captured_at,
+    r.captured_ts,
+    r.bookmark_count,
+    CASE WHEN r.has_rate AND r.view_count > 0 THEN CAST(r.bookmark_count AS REAL) / r.view_count END AS bookmark_rate,
+    r.like_count,
+    r.view_count,
+    r.comment_count,
+    s.source_mode
+FROM snapshot_rows r
+JOIN snapshot_accounts a ON a.account_key = r.account_key
+JOIN snapshot_sources s ON s.source = r.source
+"""
+
+# INSERT OR IGNORE into the view (collectors, shard merges) carries its
+# conflict policy into the trigger body. captured_at must be the canonical
+# form, since the view renders it from captured_ts.
+COMPACT_VIEW = (
+    f"CREATE VIEW post_snapshots AS {LOGICAL_SNAPSHOTS_SQL}",
+    f"""
+    CREATE TRIGGER trg_post_snapshots_insert
+    INSTEAD OF INSERT ON post_snapshots
+    BEGIN
+        SELECT RAISE(ABORT, 'captured_at must be UTC (+00:00) and match captured_ts')
+        WHERE strftime(
+            '{CAPTURED_AT_FORMAT}',
+            COALESCE(NEW.captured_ts, CAST(strftime('%s', NEW.captured_at) AS INTEGER)),
+            'unixepoch'
+        ) IS NOT NEW.captured_at;
+        INSERT OR IGNORE INTO snapshot_accounts(account_id) VALUES (NEW.account_id);
+        INSERT OR IGNORE INTO snapshot_sources(source_mode) VALUES (NEW.source_mode);
+        INSERT INTO snapshot_rows(
+            account_key, illust_id, captured_ts, source, bookmark_count, like_count, view_count, comment_count, has_rate
+        )
+        VALUES (
+            (SELECT account_key FROM snapshot_accounts WHERE account_id = NEW.account_id),
+            NEW.illust_id,
+            COALESCE(NEW.captured_ts, CAST(strftime('%s', NEW.captured_at) AS INTEGER)),
+            (SELECT source FROM snapshot_sources WHERE source_mode = NEW.source_mode),
+            NEW.bookmark_count,
+            NEW.like_count,
+            NEW.view_count,
+            NEW.comment_count,
+            NEW.bookmark_rate IS NOT NULL
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER trg_post_snapshots_delete
+    INSTEAD OF DELETE ON post_snapshots
+    BEGIN
+        DELETE FROM snapshot_rows WHERE rowid = OLD.rowid;
+    END
+    """,
+)
+
+COLUMNS = ", ".join(db.SNAPSHOT_COLUMNS)
+
+
+def _run(conn: sqlite3.Connection, statements: Sequence[str]) -> None:
+    for sql in statements:
+        conn.execute(sql)
+
+
+def compact_snapshots(conn: sqlite3.Connection) -> int:
+    # Rewrites post_snapshots into the compact layout in one transaction and
+    # checks that the view reproduces every row (rowid, text and float
+    # columns included) before the original table is dropped. Returns the
+    # number of rows converted.
+    if db.snapshots_compacted(conn):
+        raise ValueError("post_snapshots is already compact")
+    db.commit(conn)
+    conn.execute("BEGIN")
+    try:
+        _run(conn, COMPACT_TABLES)
+        conn.execute(
+            "INSERT INTO snapshot_accounts(account_id) SELECT DISTINCT account_id FROM post_snapshots ORDER BY 1"
+        )
+        conn.execute(
+            "INSERT INTO snapshot_sources(source_mode) SELECT DISTINCT source_mode FROM post_snapshots ORDER BY 1"
+        )
+        conn.execute(
+            """
+            INSERT INTO snapshot_rows(
+                rowid, account_key, illust_id, captured_ts, source,
+                bookmark_count, like_count, view_count, comment_count, has_rate
+            )
+            SELECT ps.rowid, a.account_key, ps.illust_id, ps.captured_ts, s.source,
+                   ps.bookmark_count, ps.like_count, ps.view_count, ps.comment_count, ps.bookmark_rate IS NOT NULL
+            FROM post_snapshots ps
+            JOIN snapshot_accounts a ON a.account_id = ps.account_id
+            JOIN snapshot_sources s ON s.source_mode = ps.source_mode
+            ORDER BY ps.rowid
+            """
+        )
+        (rows,) = conn.execute("SELECT COUNT(*) FROM post_snapshots").fetchone()
+        (converted,) = conn.execute("SELECT COUNT(*) FROM snapshot_rows").fetchone()
+        (differing,) = conn.execute(
+            f"SELECT COUNT(*) FROM (SELECT rowid, {COLUMNS} FROM post_snapshots EXCEPT {LOGICAL_SNAPSHOTS_SQL})"
+        ).fetchone()
+        if converted != rows or differing:
+            raise ValueError(
+                f"{differing} of {rows} snapshot rows do not round-trip (non-canonical captured_at, "
+                "missing captured_ts or a stored bookmark_rate that differs from bookmark_count / view_count)"
+            )
+        conn.execute("DROP TABLE post_snapshots")
+        _run(conn, COMPACT_VIEW)
+        # Without statistics the planner may drive joins through the view from
+        # the wrong side (e.g. scanning json_each once per snapshot row).
+        for table in ("snapshot_accounts", "snapshot_sources", "snapshot_rows"):
+            conn.execute(f"ANALYZE {table}")
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return rows
+
+
+def expand_snapshots(conn: sqlite3.Connection) -> int:
+    # Back to the plain post_snapshots table, rowids kept.
+    if not db.snapshots_compacted(conn):
+        raise ValueError("post_snapshots is not compact")
+    db.commit(conn)
+    conn.execute("BEGIN")
+    try:
+        conn.execute(f"CREATE TEMP TABLE snapshot_expand AS SELECT rowid AS row_id, {COLUMNS} FROM post_snapshots")
+        for name in ("VIEW post_snapshots", "TABLE snapshot_rows", "TABLE snapshot_accounts", "TABLE snapshot_sources"):
+            conn.execute(f"DROP {name}")
+        conn.execute(db.POST_SNAPSHOTS_TABLE_SQL)
+        conn.execute(
+            f"""
+            INSERT INTO post_snapshots(rowid, {COLUMNS})
+            SELECT row_id, {COLUMNS} FROM temp.snapshot_expand ORDER BY row_id
+            """
+        )
+        (rows,) = conn.execute("SELECT COUNT(*) FROM post_snapshots").fetchone()
+        conn.execute("DROP TABLE temp.snapshot_expand")
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    # Indexes and the captured_ts trigger of the plain layout.
+    db.init_db(conn)
+    return rows
+
+
+def table_sizes(conn: sqlite3.Connection) -> Dict[str, int]:
+    # Bytes per table/index (dbstat), for reporting what a conversion saved.
+    try:
+        rows = conn.execute("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name ORDER BY 2 DESC").fetchall()
+    except sqlite3.OperationalError:
+        return {}
+    return {r[0]: int(r[1]) for r in rows}
+
+
+def _snapshot_bytes(sizes: Dict[str, int]) -> int:
+    return sum(size for name, size in sizes.items() if "snapshot" in name)
+
+
+def _parse_args(argv: Optional[Sequence[str]]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="collect.py compact", description="Convert post_snapshots to (or from) the compact storage layout"
+    )
+    parser.add_argument("--db-path", default=os.environ.get("DB_PATH", "data/pixiv_stats.db"))
+    parser.add_argument("--expand", action="store_true", help="Convert back to the plain post_snapshots table")
+    parser.add_argument("--no-vacuum", action="store_true", help="Skip VACUUM (the file keeps its free pages)")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = _parse_args(argv)
+    if not Path(args.db_path).exists():
+        raise ValueError(f"DB not found: {args.db_path}")
+    conn = db.connect_db(args.db_path)
+    try:
+        db.init_db(conn)
+        before = table_sizes(conn)
+        rows = expand_snapshots(conn) if args.expand else compact_snapshots(conn)
+        if not args.no_vacuum:
+            conn.execute("VACUUM")
+        db.checkpoint(conn)
+        after = table_sizes(conn)
+    finally:
+        conn.close()
+    layout = "plain" if args.expand else "compact"
+    summary = f"[compact] {rows} snapshot rows -> {layout} layout"
+    if before and after:
+        summary += f", snapshot tables/indexes {_snapshot_bytes(before)} -> {_snapshot_bytes(after)} bytes"
+    print(summary, file=sys.stderr)
+    return 0
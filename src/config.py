@@ -27,6 +27,12 @@ class Settings:
     api_min_interval_sec: float
     api_jitter_sec: float
     tz: str
+    replica_db_path: Optional[str] = None
+    db_profile: str = "bulk_ingest"
+    shard_dir: Optional[str] = None
+    max_details_per_run: Optional[int] = None
+    analytics_cache: bool = True
+    watch_poll_sec: float = 300.0
 
 
 def _parse_bool(raw: Optional[str], default: bool = False) -> bool:
@@ -56,6 +62,13 @@ def load_settings() -> Settings:
     api_min_interval_sec = float(os.environ.get("API_MIN_INTERVAL_SEC", "1.0"))
     api_jitter_sec = float(os.environ.get("API_JITTER_SEC", "0.3"))
     tz = os.environ.get("TZ", "UTC")
+    replica_db_path = os.environ.get("REPLICA_DB_PATH", "").strip() or None
+    db_profile = os.environ.get("DB_PROFILE", "bulk_ingest").strip()
+    shard_dir = os.environ.get("SHARD_DIR", "").strip() or None
+    raw_details_per_run = os.environ.get("MAX_DETAILS_PER_RUN", "").strip()
+    max_details_per_run = int(raw_details_per_run) if raw_details_per_run else None
+    analytics_cache = _parse_bool(os.environ.get("ANALYTICS_CACHE"), default=True)
+    watch_poll_sec = float(os.environ.get("WATCH_POLL_SEC", "300"))
 
     return Settings(
         accounts=payload.root,
@@ -66,4 +79,10 @@ def load_settings() -> Settings:
         api_min_interval_sec=api_min_interval_sec,
         api_jitter_sec=api_jitter_sec,
         tz=tz,
+        replica_db_path=replica_db_path,
+        db_profile=db_profile,
+        shard_dir=shard_dir,
+        max_details_per_run=max_details_per_run,
+        analytics_cache=analytics_cache,
+        watch_poll_sec=watch_poll_sec,
     )
@@ -1,16 +1,94 @@
+import json
+import os
 import sqlite3
+import tempfile
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 
 
-def connect_db(db_path: str) -> sqlite3.Connection:
+# Named PRAGMA sets per workload. page_size only takes effect on a new (empty)
+# database; wal_autocheckpoint=0 leaves checkpoints to checkpoint().
+CONNECTION_PROFILES: Dict[str, Dict[str, object]] = {
+    "bulk_ingest": {
+        "page_size": 8192,
+        "synchronous": "NORMAL",
+        "cache_size": -131072,
+        "mmap_size": 0,
+        "temp_store": "MEMORY",
+        "wal_autocheckpoint": 0,
+    },
+    "interactive_read": {
+        "cache_size": -65536,
+        "mmap_size": 268435456,
+        "temp_store": "MEMORY",
+    },
+    "archival": {
+        "page_size": 8192,
+        "synchronous": "FULL",
+        "cache_size": -8192,
+        "mmap_size": 0,
+        "temp_store": "DEFAULT",
+        "wal_autocheckpoint": 1000,
+    },
+}
+DEFAULT_PROFILE = "bulk_ingest"
+
+
+def apply_profile(conn: sqlite3.Connection, profile: str) -> None:
+    if profile not in CONNECTION_PROFILES:
+        raise ValueError(f"unknown connection profile: {profile}")
+    for name, value in CONNECTION_PROFILES[profile].items():
+        conn.execute(f"PRAGMA {name} = {value}")
+
+
+def connect_db(db_path: str, profile: str = DEFAULT_PROFILE) -> sqlite3.Connection:
     Path(db_path).parent.mkdir(parents=True, exist_ok=True)
     conn = sqlite3.connect(db_path)
     conn.row_factory = sqlite3.Row
+    apply_profile(conn, profile)
     return conn
 
 
+def checkpoint(conn: sqlite3.Connection, mode: str = "TRUNCATE") -> tuple:
+    # Folds the WAL back into the main file at a point the caller chooses
+    # (after a commit), returning (busy, wal_pages, checkpointed_pages).
+    if mode not in {"PASSIVE", "FULL", "RESTART", "TRUNCATE"}:
+        raise ValueError(f"unsupported checkpoint mode: {mode}")
+    return tuple(conn.execute(f"PRAGMA wal_checkpoint({mode})").fetchone())
+
+
+# Logical snapshot schema; src.compact can store it as a view over integer-keyed
+# rows instead, keeping these columns and the rowid.
+SNAPSHOT_COLUMNS = (
+    "account_id",
+    "illust_id",
+    "captured_at",
+    "captured_ts",
+    "bookmark_count",
+    "bookmark_rate",
+    "like_count",
+    "view_count",
+    "comment_count",
+    "source_mode",
+)
+POST_SNAPSHOTS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS post_snapshots (
+    account_id TEXT NOT NULL,
+    illust_id INTEGER NOT NULL,
+    captured_at TEXT NOT NULL,
+    captured_ts INTEGER,
+    bookmark_count INTEGER,
+    bookmark_rate REAL,
+    like_count INTEGER,
+    view_count INTEGER,
+    comment_count INTEGER,
+    source_mode TEXT NOT NULL,
+    PRIMARY KEY (account_id, illust_id, captured_at, source_mode)
+)
+"""
+
+
 def init_db(conn: sqlite3.Connection) -> None:
     conn.executescript(
         """
@@ -24,6 +102,7 @@ def init_db(conn: sqlite3.Connection) -> None:
             account_id TEXT NOT NULL,
             illust_id INTEGER NOT NULL,
             create_date TEXT NOT NULL,
+            create_ts INTEGER,
             tags_json TEXT NOT NULL,
             type TEXT,
             page_count INTEGER,
@@ -32,29 +111,145 @@ def init_db(conn: sqlite3.Connection) -> None:
             updated_at TEXT NOT NULL,
             PRIMARY KEY (account_id, illust_id)
         );
-        CREATE TABLE IF NOT EXISTS post_snapshots (
-            account_id TEXT NOT NULL,
-            illust_id INTEGER NOT NULL,
-            captured_at TEXT NOT NULL,
-            bookmark_count INTEGER,
-            bookmark_rate REAL,
-            like_count INTEGER,
-            view_count INTEGER,
-            comment_count INTEGER,
-            source_mode TEXT NOT NULL,
-            PRIMARY KEY (account_id, illust_id, captured_at, source_mode)
-        );
         CREATE TABLE IF NOT EXISTS account_daily (
             account_id TEXT NOT NULL,
             date TEXT NOT NULL,
+            date_ts INTEGER,
+            followers INTEGER,
+            following INTEGER,
+            captured_at TEXT NOT NULL,
+            PRIMARY KEY (account_id, date)
+        );
+        CREATE TABLE IF NOT EXISTS account_daily_rollup (
+            date TEXT PRIMARY KEY,
+            date_ts INTEGER,
             followers INTEGER,
             following INTEGER,
             captured_at TEXT NOT NULL,
+            account_count INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS post_forecasts (
+            account_id TEXT NOT NULL,
+            illust_id INTEGER NOT NULL,
+            metric TEXT NOT NULL,
+            horizon_hours REAL NOT NULL,
+            based_on_captured_at TEXT NOT NULL,
+            elapsed_hours REAL NOT NULL,
+            observed_value REAL NOT NULL,
+            projected_value REAL NOT NULL,
+            lower_value REAL NOT NULL,
+            upper_value REAL NOT NULL,
+            baseline_value REAL,
+            model TEXT NOT NULL,
+            sample_size INTEGER NOT NULL,
+            updated_at TEXT NOT NULL,
+            PRIMARY KEY (account_id, illust_id, metric, horizon_hours)
+        );
+        CREATE TABLE IF NOT EXISTS post_horizon_values (
+            account_id TEXT NOT NULL,
+            illust_id INTEGER NOT NULL,
+            metric TEXT NOT NULL,
+            horizon_hours REAL NOT NULL,
+            value REAL NOT NULL,
+            post_type TEXT NOT NULL,
+            updated_at TEXT NOT NULL,
+            PRIMARY KEY (account_id, metric, horizon_hours, illust_id)
+        );
+        CREATE TABLE IF NOT EXISTS metric_distributions (
+            account_id TEXT NOT NULL,
+            post_type TEXT NOT NULL,
+            metric TEXT NOT NULL,
+            horizon_hours REAL NOT NULL,
+            n INTEGER NOT NULL,
+            sorted_values BLOB NOT NULL,
+            updated_at TEXT NOT NULL,
+            PRIMARY KEY (account_id, post_type, metric, horizon_hours)
+        );
+        CREATE TABLE IF NOT EXISTS post_daily_delta (
+            account_id TEXT NOT NULL,
+            illust_id INTEGER NOT NULL,
+            date TEXT NOT NULL,
+            date_ts INTEGER NOT NULL,
+            bookmarks_gained INTEGER NOT NULL,
+            views_gained INTEGER NOT NULL,
+            likes_gained INTEGER NOT NULL,
+            samples INTEGER NOT NULL,
+            PRIMARY KEY (account_id, illust_id, date)
+        );
+        CREATE INDEX IF NOT EXISTS idx_post_daily_delta_date_ts
+            ON post_daily_delta(account_id, date_ts);
+        CREATE TABLE IF NOT EXISTS account_daily_performance (
+            account_id TEXT NOT NULL,
+            date TEXT NOT NULL,
+            date_ts INTEGER NOT NULL,
+            bookmarks_gained INTEGER NOT NULL,
+            views_gained INTEGER NOT NULL,
+            likes_gained INTEGER NOT NULL,
+            active_posts INTEGER NOT NULL,
+            updated_at TEXT NOT NULL,
             PRIMARY KEY (account_id, date)
         );
+        CREATE INDEX IF NOT EXISTS idx_account_daily_performance_date_ts
+            ON account_daily_performance(date_ts);
+        CREATE TABLE IF NOT EXISTS attribution_fits (
+            account_id TEXT NOT NULL,
+            date TEXT NOT NULL,
+            date_ts INTEGER NOT NULL,
+            followers_delta REAL,
+            intercept REAL NOT NULL,
+            betas_json TEXT NOT NULL,
+            fitted REAL NOT NULL,
+            r2 REAL,
+            n_days INTEGER NOT NULL,
+            model TEXT NOT NULL,
+            updated_at TEXT NOT NULL,
+            PRIMARY KEY (account_id, date)
+        );
+        CREATE TABLE IF NOT EXISTS post_attribution (
+            account_id TEXT NOT NULL,
+            date TEXT NOT NULL,
+            date_ts INTEGER NOT NULL,
+            illust_id INTEGER NOT NULL,
+            attributed_followers REAL NOT NULL,
+            bookmarks_gained INTEGER NOT NULL,
+            PRIMARY KEY (account_id, date, illust_id)
+        );
+        CREATE INDEX IF NOT EXISTS idx_post_attribution_date_ts
+            ON post_attribution(account_id, date_ts);
+        CREATE TABLE IF NOT EXISTS follower_events (
+            account_id TEXT NOT NULL,
+            date TEXT NOT NULL,
+            date_ts INTEGER NOT NULL,
+            kind TEXT NOT NULL,
+            delta REAL NOT NULL,
+            score REAL NOT NULL,
+            baseline REAL,
+            detected_ts INTEGER NOT NULL,
+            detector TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            PRIMARY KEY (account_id, date, kind)
+        );
+        CREATE INDEX IF NOT EXISTS idx_follower_events_date_ts
+            ON follower_events(date_ts);
+        CREATE TABLE IF NOT EXISTS follower_detector_state (
+            account_id TEXT PRIMARY KEY,
+            state_json TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS stage_watermarks (
+            stage TEXT NOT NULL,
+            account_id TEXT NOT NULL,
+            watermark_ts INTEGER NOT NULL,
+            updated_at TEXT NOT NULL,
+            PRIMARY KEY (stage, account_id)
+        );
         """
     )
+    # A no-op when post_snapshots is the compact layout's view.
+    conn.execute(POST_SNAPSHOTS_TABLE_SQL)
     _ensure_post_snapshots_migration(conn)
+    _ensure_epoch_columns(conn)
+    _backfill_account_daily_rollup(conn)
     conn.commit()
 
 
@@ -65,10 +260,94 @@ def _ensure_post_snapshots_migration(conn: sqlite3.Connection) -> None:
         conn.execute("ALTER TABLE post_snapshots ADD COLUMN bookmark_rate REAL")
 
 
+# (table, epoch-second column, ISO-8601 source column)
+EPOCH_COLUMNS = (
+    ("posts", "create_ts", "create_date"),
+    ("post_snapshots", "captured_ts", "captured_at"),
+    ("account_daily", "date_ts", "date"),
+    ("account_daily_rollup", "date_ts", "date"),
+)
+
+
+def snapshots_compacted(conn: sqlite3.Connection) -> bool:
+    # True once src.compact has replaced the post_snapshots table with a view.
+    row = conn.execute("SELECT type FROM sqlite_master WHERE name = 'post_snapshots'").fetchone()
+    return row is not None and row[0] == "view"
+
+
+def _ensure_epoch_columns(conn: sqlite3.Connection) -> None:
+    compacted = snapshots_compacted(conn)
+    for table, ts_col, iso_col in EPOCH_COLUMNS:
+        if compacted and table == "post_snapshots":
+            continue
+        cols = {r["name"] for r in conn.execute(f"PRAGMA table_info({table})").fetchall()}
+        if ts_col not in cols:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {ts_col} INTEGER")
+        conn.execute(
+            f"UPDATE {table} SET {ts_col} = CAST(strftime('%s', {iso_col}) AS INTEGER) WHERE {ts_col} IS NULL"
+        )
+        # Writers outside this module (manual SQL, shard merges) still get epochs.
+        conn.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_{ts_col}
+            AFTER INSERT ON {table}
+            WHEN NEW.{ts_col} IS NULL
+            BEGIN
+                UPDATE {table}
+                SET {ts_col} = CAST(strftime('%s', NEW.{iso_col}) AS INTEGER)
+                WHERE rowid = NEW.rowid;
+            END
+            """
+        )
+
+    conn.executescript(
+        """
+        DROP INDEX IF EXISTS idx_posts_create_date;
+        DROP INDEX IF EXISTS idx_posts_account_create_date;
+        CREATE INDEX IF NOT EXISTS idx_posts_create_ts
+            ON posts(create_ts, illust_id);
+        CREATE INDEX IF NOT EXISTS idx_posts_account_create_ts
+            ON posts(account_id, create_ts, illust_id);
+        CREATE INDEX IF NOT EXISTS idx_account_daily_date_ts
+            ON account_daily(account_id, date_ts);
+        CREATE INDEX IF NOT EXISTS idx_account_daily_rollup_date_ts
+            ON account_daily_rollup(date_ts);
+        """
+    )
+    if not compacted:
+        conn.executescript(
+            """
+            CREATE INDEX IF NOT EXISTS idx_post_snapshots_post_ts
+                ON post_snapshots(account_id, illust_id, captured_ts);
+            CREATE INDEX IF NOT EXISTS idx_post_snapshots_captured_ts
+                ON post_snapshots(captured_ts);
+            """
+        )
+
+
+def _backfill_account_daily_rollup(conn: sqlite3.Connection) -> None:
+    missing = conn.execute(
+        """
+        SELECT DISTINCT date
+        FROM account_daily
+        WHERE date NOT IN (SELECT date FROM account_daily_rollup)
+        """
+    ).fetchall()
+    if missing:
+        refresh_account_daily_rollup(conn, [r["date"] for r in missing])
+
+
 def utc_now_iso() -> str:
     return datetime.now(timezone.utc).replace(microsecond=0).isoformat()
 
 
+def iso_to_epoch(value: str) -> int:
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+
 def upsert_account(conn: sqlite3.Connection, account_id: str, pixiv_user_id: int) -> None:
     conn.execute(
         """
@@ -90,26 +369,36 @@ def get_account_illust_ids(conn: sqlite3.Connection, account_id: str) -> set[int
     return {int(r["illust_id"]) for r in rows}
 
 
+UPSERT_POST_SQL = """
+INSERT INTO posts(
+    account_id, illust_id, create_date, create_ts, tags_json, type, page_count, x_restrict, title, updated_at
+)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(account_id, illust_id) DO UPDATE SET
+    create_date=excluded.create_date,
+    create_ts=excluded.create_ts,
+    tags_json=excluded.tags_json,
+    type=excluded.type,
+    page_count=excluded.page_count,
+    x_restrict=excluded.x_restrict,
+    title=excluded.title,
+    updated_at=excluded.updated_at
+"""
+
+INSERT_SNAPSHOT_SQL = f"""
+INSERT OR IGNORE INTO post_snapshots({", ".join(SNAPSHOT_COLUMNS)})
+VALUES ({", ".join("?" for _ in SNAPSHOT_COLUMNS)})
+"""
+
+
 def upsert_post(conn: sqlite3.Connection, row: Dict) -> None:
     conn.execute(
-        """
-        INSERT INTO posts(
-            account_id, illust_id, create_date, tags_json, type, page_count, x_restrict, title, updated_at
-        )
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ON CONFLICT(account_id, illust_id) DO UPDATE SET
-            create_date=excluded.create_date,
-            tags_json=excluded.tags_json,
-            type=excluded.type,
-            page_count=excluded.page_count,
-            x_restrict=excluded.x_restrict,
-            title=excluded.title,
-            updated_at=excluded.updated_at
-        """,
+        UPSERT_POST_SQL,
         (
             row["account_id"],
             row["illust_id"],
             row["create_date"],
+            iso_to_epoch(row["create_date"]),
             row["tags_json"],
             row.get("type"),
             row.get("page_count"),
@@ -120,17 +409,19 @@ def upsert_post(conn: sqlite3.Connection, row: Dict) -> None:
     )
 
 
+def upsert_posts(conn: sqlite3.Connection, rows: List[tuple]) -> None:
+    # Pre-normalized rows (see src.records.PostRecord.db_row), in column order.
+    conn.executemany(UPSERT_POST_SQL, rows)
+
+
 def insert_snapshot(conn: sqlite3.Connection, row: Dict) -> None:
     conn.execute(
-        """
-        INSERT OR IGNORE INTO post_snapshots(
-            account_id, illust_id, captured_at, bookmark_count, bookmark_rate, like_count, view_count, comment_count, source_mode
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """,
+        INSERT_SNAPSHOT_SQL,
         (
             row["account_id"],
             row["illust_id"],
             row["captured_at"],
+            iso_to_epoch(row["captured_at"]),
             row.get("bookmark_count"),
             row.get("bookmark_rate"),
             row.get("like_count"),
@@ -141,6 +432,10 @@ def insert_snapshot(conn: sqlite3.Connection, row: Dict) -> None:
     )
 
 
+def insert_snapshots(conn: sqlite3.Connection, rows: List[tuple]) -> None:
+    conn.executemany(INSERT_SNAPSHOT_SQL, rows)
+
+
 def upsert_account_daily(
     conn: sqlite3.Connection,
     account_id: str,
@@ -151,14 +446,232 @@ def upsert_account_daily(
 ) -> None:
     conn.execute(
         """
-        INSERT INTO account_daily(account_id, date, followers, following, captured_at)
-        VALUES (?, ?, ?, ?, ?)
+        INSERT INTO account_daily(account_id, date, date_ts, followers, following, captured_at)
+        VALUES (?, ?, ?, ?, ?, ?)
         ON CONFLICT(account_id, date) DO UPDATE SET
             followers=excluded.followers,
             following=excluded.following,
             captured_at=excluded.captured_at
         """,
-        (account_id, date_yyyy_mm_dd, followers, following, captured_at),
+        (account_id, date_yyyy_mm_dd, iso_to_epoch(date_yyyy_mm_dd), followers, following, captured_at),
+    )
+
+
+def refresh_account_daily_rollup(conn: sqlite3.Connection, dates: Iterable[str]) -> None:
+    # Per-date totals across accounts; serves the UI's "ALL" follower view.
+    for date_yyyy_mm_dd in sorted(set(dates)):
+        conn.execute(
+            """
+            INSERT INTO account_daily_rollup(date, date_ts, followers, following, captured_at, account_count)
+            SELECT
+                date,
+                MAX(date_ts),
+                SUM(COALESCE(followers, 0)),
+                SUM(COALESCE(following, 0)),
+                MAX(captured_at),
+                COUNT(*)
+            FROM account_daily
+            WHERE date = ?
+            GROUP BY date
+            ON CONFLICT(date) DO UPDATE SET
+                date_ts=excluded.date_ts,
+                followers=excluded.followers,
+                following=excluded.following,
+                captured_at=excluded.captured_at,
+                account_count=excluded.account_count
+            """,
+            (date_yyyy_mm_dd,),
+        )
+
+
+def upsert_post_forecasts(conn: sqlite3.Connection, rows: List[tuple]) -> None:
+    conn.executemany(
+        """
+        INSERT INTO post_forecasts(
+            account_id, illust_id, metric, horizon_hours, based_on_captured_at, elapsed_hours,
+            observed_value, projected_value, lower_value, upper_value, baseline_value,
+            model, sample_size, updated_at
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(account_id, illust_id, metric, horizon_hours) DO UPDATE SET
+            based_on_captured_at=excluded.based_on_captured_at,
+            elapsed_hours=excluded.elapsed_hours,
+            observed_value=excluded.observed_value,
+            projected_value=excluded.projected_value,
+            lower_value=excluded.lower_value,
+            upper_value=excluded.upper_value,
+            baseline_value=excluded.baseline_value,
+            model=excluded.model,
+            sample_size=excluded.sample_size,
+            updated_at=excluded.updated_at
+        """,
+        rows,
+    )
+
+
+def upsert_post_horizon_values(conn: sqlite3.Connection, rows: List[tuple]) -> None:
+    # rows: (account_id, illust_id, metric, horizon_hours, value, post_type, updated_at)
+    conn.executemany(
+        """
+        INSERT INTO post_horizon_values(account_id, illust_id, metric, horizon_hours, value, post_type, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(account_id, metric, horizon_hours, illust_id) DO UPDATE SET
+            value=excluded.value,
+            post_type=excluded.post_type,
+            updated_at=excluded.updated_at
+        """,
+        rows,
+    )
+
+
+def get_metric_distributions(
+    conn: sqlite3.Connection,
+    account_id: str,
+    metric: str,
+    horizon_hours: float,
+    post_types: List[str],
+) -> Dict[str, bytes]:
+    return {
+        r["post_type"]: r["sorted_values"]
+        for r in conn.execute(
+            """
+            SELECT post_type, sorted_values
+            FROM metric_distributions
+            WHERE account_id = ? AND metric = ? AND horizon_hours = ?
+              AND post_type IN (SELECT value FROM json_each(?))
+            """,
+            (account_id, metric, horizon_hours, json.dumps(post_types)),
+        ).fetchall()
+    }
+
+
+def upsert_metric_distributions(conn: sqlite3.Connection, rows: List[tuple]) -> None:
+    # rows: (account_id, post_type, metric, horizon_hours, n, sorted_values, updated_at)
+    conn.executemany(
+        """
+        INSERT INTO metric_distributions(account_id, post_type, metric, horizon_hours, n, sorted_values, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(account_id, post_type, metric, horizon_hours) DO UPDATE SET
+            n=excluded.n,
+            sorted_values=excluded.sorted_values,
+            updated_at=excluded.updated_at
+        """,
+        rows,
+    )
+
+
+def get_watermark(conn: sqlite3.Connection, stage: str, account_id: str) -> int:
+    row = conn.execute(
+        "SELECT watermark_ts FROM stage_watermarks WHERE stage = ? AND account_id = ?",
+        (stage, account_id),
+    ).fetchone()
+    return int(row["watermark_ts"]) if row else 0
+
+
+def set_watermark(conn: sqlite3.Connection, stage: str, account_id: str, watermark_ts: int) -> None:
+    conn.execute(
+        """
+        INSERT INTO stage_watermarks(stage, account_id, watermark_ts, updated_at)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT(stage, account_id) DO UPDATE SET
+            watermark_ts=excluded.watermark_ts,
+            updated_at=excluded.updated_at
+        """,
+        (stage, account_id, watermark_ts, utc_now_iso()),
+    )
+
+
+def lower_watermark(conn: sqlite3.Connection, stage: str, account_id: str, watermark_ts: int) -> None:
+    # Moves a stage back so its next run redoes work from watermark_ts; a stage
+    # that has not run yet (no row) already starts from the beginning.
+    conn.execute(
+        """
+        UPDATE stage_watermarks
+        SET watermark_ts = ?, updated_at = ?
+        WHERE stage = ? AND account_id = ? AND watermark_ts > ?
+        """,
+        (watermark_ts, utc_now_iso(), stage, account_id, watermark_ts),
+    )
+
+
+def add_post_daily_deltas(conn: sqlite3.Connection, rows: List[tuple]) -> None:
+    # rows: (account_id, illust_id, date, date_ts, bookmarks, views, likes, samples);
+    # increments an existing (post, day) row.
+    conn.executemany(
+        """
+        INSERT INTO post_daily_delta(
+            account_id, illust_id, date, date_ts, bookmarks_gained, views_gained, likes_gained, samples
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(account_id, illust_id, date) DO UPDATE SET
+            bookmarks_gained=bookmarks_gained + excluded.bookmarks_gained,
+            views_gained=views_gained + excluded.views_gained,
+            likes_gained=likes_gained + excluded.likes_gained,
+            samples=samples + excluded.samples
+        """,
+        rows,
+    )
+
+
+def delete_post_daily_deltas(
+    conn: sqlite3.Connection, account_id: str, illust_ids: List[int]
+) -> Dict[Tuple[int, str], Tuple[int, int, int, int, int]]:
+    # Drops the posts' rows before they are rebuilt; returns them keyed by
+    # (illust_id, date) as (date_ts, bookmarks, views, likes, samples) so the
+    # caller can tell which days actually changed.
+    ids = json.dumps(illust_ids)
+    old = {
+        (int(r[0]), r[1]): tuple(int(v) for v in r[2:])
+        for r in conn.execute(
+            """
+            SELECT illust_id, date, date_ts, bookmarks_gained, views_gained, likes_gained, samples
+            FROM post_daily_delta
+            WHERE account_id = ? AND illust_id IN (SELECT value FROM json_each(?))
+            """,
+            (account_id, ids),
+        )
+    }
+    conn.execute(
+        "DELETE FROM post_daily_delta WHERE account_id = ? AND illust_id IN (SELECT value FROM json_each(?))",
+        (account_id, ids),
+    )
+    return old
+
+
+def refresh_account_daily_performance(
+    conn: sqlite3.Connection, account_id: str, dates: Iterable[str]
+) -> None:
+    # Recomputes the given days from post_daily_delta; a day left without any
+    # post rows loses its total.
+    day_ts = json.dumps(sorted({iso_to_epoch(d) for d in dates}))
+    conn.execute(
+        """
+        DELETE FROM account_daily_performance
+        WHERE account_id = ? AND date_ts IN (SELECT value FROM json_each(?))
+        """,
+        (account_id, day_ts),
+    )
+    conn.execute(
+        """
+        INSERT INTO account_daily_performance(
+            account_id, date, date_ts, bookmarks_gained, views_gained, likes_gained,
+            active_posts, updated_at
+        )
+        SELECT
+            account_id,
+            date,
+            date_ts,
+            SUM(bookmarks_gained),
+            SUM(views_gained),
+            SUM(likes_gained),
+            SUM(bookmarks_gained > 0 OR views_gained > 0 OR likes_gained > 0),
+            ?
+        FROM post_daily_delta
+        WHERE account_id = ?
+          AND date_ts IN (SELECT value FROM json_each(?))
+        GROUP BY account_id, date
+        """,
+        (utc_now_iso(), account_id, day_ts),
     )
 
 
@@ -167,13 +680,50 @@ def get_recent_post_ids(conn: sqlite3.Connection, account_id: str, since_iso: st
         """
         SELECT illust_id
         FROM posts
-        WHERE account_id = ? AND create_date >= ?
-        ORDER BY create_date DESC
+        WHERE account_id = ? AND create_ts >= ?
+        ORDER BY create_ts DESC
         """,
-        (account_id, since_iso),
+        (account_id, iso_to_epoch(since_iso)),
     ).fetchall()
     return [int(r["illust_id"]) for r in rows]
 
 
 def commit(conn: sqlite3.Connection) -> None:
     conn.commit()
+
+
+def _source_mtime_ns(db_path: str) -> int:
+    paths = [Path(db_path), Path(f"{db_path}-wal")]
+    return max((p.stat().st_mtime_ns for p in paths if p.exists()), default=0)
+
+
+def replica_is_stale(db_path: str, replica_path: str) -> bool:
+    replica = Path(replica_path)
+    if not replica.exists():
+        return True
+    return replica.stat().st_mtime_ns < _source_mtime_ns(db_path)
+
+
+def publish_replica(source: sqlite3.Connection, replica_path: str) -> None:
+    # Copies the source connection's committed state with the online backup
+    # API, then swaps it in with an atomic rename. Readers holding the old file
+    # keep their view. Each call copies into its own temp file, so concurrent
+    # publishers (one per UI session) never rename another's partial copy.
+    directory = Path(replica_path).parent
+    directory.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=f"{Path(replica_path).name}.", suffix=".tmp", dir=directory)
+    os.close(fd)
+    try:
+        target = sqlite3.connect(tmp_path)
+        try:
+            source.backup(target)
+            # Rollback-journal mode so read-only openers never need -wal/-shm files.
+            target.execute("PRAGMA journal_mode=DELETE")
+            target.commit()
+        finally:
+            target.close()
+        os.replace(tmp_path, replica_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
@@ -0,0 +1,261 @@
+import argparse
+import csv
+import gzip
+import io
+import json
+import os
+import sqlite3
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from src import db
+
+DEFAULT_BATCH_SIZE = 5000
+
+
+# table -> (date-range column, ordering/watermark expression). Snapshots are
+# append-only, so rowid alone orders them; posts and account_daily are
+# updated in place and resume on (change timestamp, rowid).
+EXPORT_TABLES = {
+    "post_snapshots": ("captured_ts", "t.rowid"),
+    "posts": ("create_ts", "t.updated_at"),
+    "account_daily": ("date_ts", "t.captured_at"),
+}
+
+
+def _open_read_only(db_path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(f"{Path(db_path).resolve().as_uri()}?mode=ro", uri=True)
+    conn.execute("PRAGMA query_only = ON")
+    # Small page cache and file-backed sorts keep memory flat on large tables.
+    db.apply_profile(conn, "archival")
+    return conn
+
+
+def build_query(
+    table: str,
+    account_id: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    post_type: Optional[str] = None,
+    after: Optional[Sequence] = None,
+) -> Tuple[str, list]:
+    if table not in EXPORT_TABLES:
+        raise ValueError(f"unsupported export table: {table}")
+    range_col, order_expr = EXPORT_TABLES[table]
+
+    joins = ""
+    where_parts: List[str] = []
+    params: list = []
+    if account_id:
+        where_parts.append("t.account_id = ?")
+        params.append(account_id)
+    if since:
+        where_parts.append(f"t.{range_col} >= ?")
+        params.append(db.iso_to_epoch(since))
+    if until:
+        where_parts.append(f"t.{range_col} < ?")
+        params.append(db.iso_to_epoch(until))
+    if post_type:
+        if table == "posts":
+            where_parts.append("t.type = ?")
+        elif table == "post_snapshots":
+            joins = "JOIN posts p ON p.account_id = t.account_id AND p.illust_id = t.illust_id"
+            where_parts.append("p.type = ?")
+        else:
+            raise ValueError(f"--post-type does not apply to {table}")
+        params.append(post_type)
+    if after is not None:
+        if order_expr == "t.rowid":
+            where_parts.append("t.rowid > ?")
+            params.append(after[1])
+        else:
+            where_parts.append(f"({order_expr}, t.rowid) > (?, ?)")
+            params.extend(after)
+
+    where_sql = f"WHERE {' AND '.join(where_parts)}" if where_parts else ""
+    order_sql = "t.rowid" if order_expr == "t.rowid" else f"{order_expr}, t.rowid"
+    # Explicit snapshot columns: in the compact layout post_snapshots is a
+    # view whose * also includes its rowid.
+    columns = ", ".join(f"t.{c}" for c in db.SNAPSHOT_COLUMNS) if table == "post_snapshots" else "t.*"
+    query = f"""
+    SELECT {columns}, {order_expr} AS _wm_value, t.rowid AS _wm_rowid
+    FROM {table} t
+    {joins}
+    {where_sql}
+    ORDER BY {order_sql}
+    """
+    return query, params
+
+
+def iter_batches(
+    conn: sqlite3.Connection, query: str, params: Sequence, batch_size: int = DEFAULT_BATCH_SIZE
+) -> Iterator[Tuple[List[str], List[tuple]]]:
+    cursor = conn.execute(query, params)
+    columns = [d[0] for d in cursor.description]
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        yield columns, rows
+
+
+@contextmanager
+def _open_output(path: str, append: bool, offset: Optional[int]):
+    # Binary handle; batches are encoded (and gzipped) by the caller. On a
+    # resume the file is first cut back to the offset saved with the
+    # watermark, dropping a batch written after the last saved watermark.
+    if path == "-":
+        yield sys.stdout.buffer
+        return
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    if not append:
+        handle = open(path, "wb")
+    else:
+        handle = open(path, "ab" if offset is None else "r+b")
+        if offset is not None:
+            size = handle.seek(0, os.SEEK_END)
+            if size < offset:
+                handle.close()
+                raise ValueError(f"{path} is shorter ({size} bytes) than its watermark offset ({offset})")
+            handle.truncate(offset)
+            handle.seek(offset)
+    try:
+        yield handle
+    finally:
+        handle.close()
+
+
+def _encode_batch(text: str, path: str) -> bytes:
+    data = text.encode("utf-8")
+    # One gzip member per batch, so every saved offset is a member boundary;
+    # readers see one continuous stream.
+    return gzip.compress(data, compresslevel=6) if path.endswith(".gz") else data
+
+
+def _watermark_path(out_path: str) -> Path:
+    return Path(f"{out_path}.watermark.json")
+
+
+def load_watermark(out_path: str, filters: dict) -> Tuple[Optional[list], Optional[int]]:
+    # (watermark, output byte offset); the offset is None for watermark files
+    # written before offsets were recorded.
+    path = _watermark_path(out_path)
+    if not path.exists():
+        return None, None
+    state = json.loads(path.read_text(encoding="utf-8"))
+    if state.get("filters") != filters:
+        raise ValueError(f"{path} was written with different filters: {state.get('filters')}")
+    return state["watermark"], state.get("offset")
+
+
+def save_watermark(out_path: str, filters: dict, watermark: Sequence, offset: int) -> None:
+    path = _watermark_path(out_path)
+    tmp = Path(f"{path}.tmp")
+    with open(tmp, "w", encoding="utf-8") as fh:
+        fh.write(json.dumps({"filters": filters, "watermark": list(watermark), "offset": offset}))
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, path)
+
+
+def export_table(
+    db_path: str,
+    table: str,
+    out_path: str,
+    fmt: str = "csv",
+    account_id: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    post_type: Optional[str] = None,
+    resume: bool = False,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> int:
+    if fmt not in {"csv", "jsonl"}:
+        raise ValueError(f"unsupported export format: {fmt}")
+    if resume and out_path == "-":
+        raise ValueError("--resume needs a file output")
+
+    filters = {
+        "table": table,
+        "format": fmt,
+        "account_id": account_id,
+        "since": since,
+        "until": until,
+        "post_type": post_type,
+    }
+    after, offset = load_watermark(out_path, filters) if resume else (None, None)
+    append = after is not None
+    if append and offset is None:
+        # Legacy watermark: append after whatever the file holds.
+        offset = Path(out_path).stat().st_size if Path(out_path).exists() else 0
+    write_header = not (append and offset > 0)
+
+    query, params = build_query(table, account_id, since, until, post_type, after)
+    conn = _open_read_only(db_path)
+    written = 0
+    try:
+        with _open_output(out_path, append, offset) as out:
+            for columns, rows in iter_batches(conn, query, params, batch_size):
+                data_columns = columns[:-2]
+                buf = io.StringIO(newline="")
+                if fmt == "csv":
+                    csv_writer = csv.writer(buf)
+                    if write_header:
+                        csv_writer.writerow(data_columns)
+                        write_header = False
+                    csv_writer.writerows(row[:-2] for row in rows)
+                else:
+                    for row in rows:
+                        buf.write(json.dumps(dict(zip(data_columns, row[:-2])), ensure_ascii=False))
+                        buf.write("\n")
+                out.write(_encode_batch(buf.getvalue(), out_path))
+                written += len(rows)
+                if resume:
+                    # The batch is on disk before the watermark (and the
+                    # output offset it ends at) is replaced. A crash between
+                    # the two leaves the old watermark, and the next resume
+                    # truncates the file back to its offset: exactly-once.
+                    out.flush()
+                    os.fsync(out.fileno())
+                    save_watermark(out_path, filters, rows[-1][-2:], out.tell())
+            out.flush()
+    finally:
+        conn.close()
+    return written
+
+
+def _parse_args(argv: Optional[Sequence[str]]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="collect.py export", description="Stream DB tables to CSV/JSONL")
+    parser.add_argument("--table", choices=sorted(EXPORT_TABLES), required=True)
+    parser.add_argument("--out", required=True, help="Output path (.gz for gzip, - for stdout)")
+    parser.add_argument("--format", choices=["csv", "jsonl"], default="csv")
+    parser.add_argument("--db-path", default=os.environ.get("DB_PATH", "data/pixiv_stats.db"))
+    parser.add_argument("--account-id", default=None)
+    parser.add_argument("--since", default=None, help="Inclusive start date/time (ISO-8601, UTC if naive)")
+    parser.add_argument("--until", default=None, help="Exclusive end date/time (ISO-8601, UTC if naive)")
+    parser.add_argument("--post-type", default=None)
+    parser.add_argument("--resume", action="store_true", help="Append rows past the saved watermark")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = _parse_args(argv)
+    if not Path(args.db_path).exists():
+        raise ValueError(f"DB not found: {args.db_path}")
+    written = export_table(
+        db_path=args.db_path,
+        table=args.table,
+        out_path=args.out,
+        fmt=args.format,
+        account_id=args.account_id,
+        since=args.since,
+        until=args.until,
+        post_type=args.post_type,
+        resume=args.resume,
+        batch_size=args.batch_size,
+    )
+    print(f"[export] {args.table}: {written} rows -> {args.out}", file=sys.stderr)
+    return 0
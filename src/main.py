@@ -1,18 +1,16 @@
 import argparse
+import sqlite3
+import sys
 from pathlib import Path
 
 from src import db
-from src.collectors.accounts import collect_account_daily
-from src.collectors.posts import sync_posts_and_collect_snapshots
-from src.config import load_settings
-from src.pixiv_client import PixivClient
 
 
 def _parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Pixiv account stats collector")
     parser.add_argument(
         "--mode",
-        choices=["daily", "manual"],
+        choices=["daily", "manual", "watch"],
         required=True,
         help="Collector mode",
     )
@@ -21,12 +19,45 @@ def _parse_args() -> argparse.Namespace:
         default=None,
         help="Optional single account_id to run",
     )
+    parser.add_argument(
+        "--shard-dir",
+        default=None,
+        help="Write each account to <dir>/<account_id>.db instead of DB_PATH (fold in with `collect.py merge`)",
+    )
+    parser.add_argument(
+        "--watch-minutes",
+        type=float,
+        default=None,
+        help="Stop watch mode after this many minutes (default: run until interrupted)",
+    )
     return parser.parse_args()
 
 
 def main() -> int:
+    if sys.argv[1:2] == ["export"]:
+        from src.export import main as export_main
+
+        return export_main(sys.argv[2:])
+    if sys.argv[1:2] == ["merge"]:
+        from src.merge import main as merge_main
+
+        return merge_main(sys.argv[2:])
+    if sys.argv[1:2] == ["compact"]:
+        from src.compact import main as compact_main
+
+        return compact_main(sys.argv[2:])
+
     args = _parse_args()
+
+    # Deferred so `collect.py --help` and argument errors skip pixivpy3,
+    # pydantic and numpy; see tests/test_import_time.py.
+    from src.analytics.stages import refresh_account_stages
+    from src.collectors.posts import collect_planned_snapshots
+    from src.config import load_settings
+    from src.records import RunClock
+
     settings = load_settings()
+    clock = RunClock.start()
 
     selected_accounts = settings.accounts
     if args.account_id:
@@ -34,36 +65,145 @@ def main() -> int:
         if not selected_accounts:
             raise ValueError(f"account_id not found: {args.account_id}")
 
-    Path(settings.db_path).parent.mkdir(parents=True, exist_ok=True)
-    conn = db.connect_db(settings.db_path)
-    db.init_db(conn)
+    shard_dir = args.shard_dir or settings.shard_dir
+    if shard_dir:
+        from src.merge import shard_path
+
+        # One file per account: parallel jobs never share a writer, and the
+        # main DB is only touched by the merge step.
+        conns = {
+            a.account_id: db.connect_db(shard_path(shard_dir, a.account_id), settings.db_profile)
+            for a in selected_accounts
+        }
+    else:
+        Path(settings.db_path).parent.mkdir(parents=True, exist_ok=True)
+        main_conn = db.connect_db(settings.db_path, settings.db_profile)
+        conns = {a.account_id: main_conn for a in selected_accounts}
+    for conn in set(conns.values()):
+        db.init_db(conn)
+
+    if args.mode == "watch":
+        _watch(conns, selected_accounts, settings, args.watch_minutes)
+    else:
+        clients = {}
+        candidates = []
+        for account in selected_accounts:
+            clients[account.account_id], found = _sync_account(conns[account.account_id], account, settings, clock)
+            candidates.extend(found)
+        plan = _plan_details(conns, candidates, settings, clock, len(selected_accounts), shard_dir is not None)
+        collect_planned_snapshots(plan, conns, clients, args.mode, clock)
+
+    if shard_dir:
+        for account in selected_accounts:
+            conn = conns[account.account_id]
+            db.commit(conn)
+            db.checkpoint(conn)
+            conn.close()
+            print(f"[{account.account_id}] {args.mode} collection done (shard).")
+        return 0
 
     for account in selected_accounts:
-        db.upsert_account(conn, account.account_id, account.pixiv_user_id)
-        client = PixivClient(
-            refresh_token=account.refresh_token,
-            min_interval_sec=settings.api_min_interval_sec,
-            jitter_sec=settings.api_jitter_sec,
-        )
-
-        collect_account_daily(
-            conn=conn,
-            client=client,
-            account_id=account.account_id,
-            pixiv_user_id=account.pixiv_user_id,
-        )
-        sync_posts_and_collect_snapshots(
-            conn=conn,
-            client=client,
-            account_id=account.account_id,
-            pixiv_user_id=account.pixiv_user_id,
-            source_mode=args.mode,
-            max_snapshot_age_days=settings.snapshot_max_age_days,
-            max_pages=settings.user_illusts_max_pages,
-            max_details_per_account=settings.max_details_per_account,
-        )
+        refresh_account_stages(main_conn, account.account_id)
         print(f"[{account.account_id}] {args.mode} collection done.")
 
-    db.commit(conn)
-    conn.close()
+    db.commit(main_conn)
+    db.checkpoint(main_conn)
+    if settings.analytics_cache:
+        from src.analytics.cache import cache_dir_for, refresh_snapshot_cache
+
+        refresh_snapshot_cache(main_conn, cache_dir_for(settings.db_path))
+    if settings.replica_db_path:
+        db.publish_replica(main_conn, settings.replica_db_path)
+    main_conn.close()
     return 0
+
+
+def _client(account, settings):
+    from src.pixiv_client import PixivClient
+
+    return PixivClient(
+        refresh_token=account.refresh_token,
+        min_interval_sec=settings.api_min_interval_sec,
+        jitter_sec=settings.api_jitter_sec,
+    )
+
+
+def _watch(conns, accounts, settings, minutes):
+    from src.collectors.watch import run_watch
+
+    clients = {}
+    for account in accounts:
+        db.upsert_account(conns[account.account_id], account.account_id, account.pixiv_user_id)
+        clients[account.account_id] = _client(account, settings)
+    stats = run_watch(
+        conns,
+        clients,
+        {a.account_id: a.pixiv_user_id for a in accounts},
+        poll_sec=settings.watch_poll_sec,
+        duration_sec=None if minutes is None else minutes * 60,
+    )
+    print(
+        f"[watch] {stats['polls']} polls, {stats['new_posts']} new posts, "
+        f"{stats['snapshots']} snapshots in {stats['flushes']} writes"
+    )
+
+
+def _sync_account(conn, account, settings, clock):
+    from src.collectors.accounts import collect_account_daily
+    from src.collectors.posts import sync_posts
+
+    db.upsert_account(conn, account.account_id, account.pixiv_user_id)
+    client = _client(account, settings)
+    collect_account_daily(
+        conn=conn,
+        client=client,
+        account_id=account.account_id,
+        pixiv_user_id=account.pixiv_user_id,
+        clock=clock,
+    )
+    candidates = sync_posts(
+        conn=conn,
+        client=client,
+        account_id=account.account_id,
+        pixiv_user_id=account.pixiv_user_id,
+        clock=clock,
+        max_snapshot_age_days=settings.snapshot_max_age_days,
+        max_pages=settings.user_illusts_max_pages,
+    )
+    return client, candidates
+
+
+def _plan_details(conns, candidates, settings, clock, account_count: int, sharded: bool):
+    from src import planner
+
+    by_account = {}
+    for c in candidates:
+        by_account.setdefault(c.account_id, []).append(c.illust_id)
+    histories = {
+        account_id: planner.load_post_history(conns[account_id], account_id, ids)
+        for account_id, ids in by_account.items()
+    }
+    if sharded and Path(settings.db_path).exists():
+        # Pruned shards keep no history; the last merged DB still has it.
+        merged = sqlite3.connect(f"{Path(settings.db_path).resolve().as_uri()}?mode=ro", uri=True)
+        merged.row_factory = sqlite3.Row
+        try:
+            for account_id, ids in by_account.items():
+                histories[account_id] = planner.merge_histories(
+                    histories[account_id], planner.load_post_history(merged, account_id, ids)
+                )
+        finally:
+            merged.close()
+
+    # One budget for the accounts in this process (a sharded job plans only
+    # its own shard). MAX_DETAILS_PER_ACCOUNT sizes the default budget but is
+    # no ceiling: past each account's fair-share floor, calls a quiet account
+    # does not need go to a busier one.
+    budget = settings.max_details_per_run
+    if budget is None:
+        budget = settings.max_details_per_account * account_count
+    plan = planner.plan_details(candidates, histories, budget=budget, now_ts=clock.now_ts)
+    counts = {account_id: sum(1 for p in plan if p.account_id == account_id) for account_id in by_account}
+    summary = ", ".join(f"{account_id}={n}" for account_id, n in counts.items())
+    print(f"[planner] {len(plan)}/{len(candidates)} detail calls (budget {budget}): {summary}")
+    return plan
@@ -0,0 +1,169 @@
+import argparse
+import os
+import sqlite3
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from src import db
+
+SHARD_SCHEMA = "shard"
+
+# Same conflict semantics as the collector writes (upsert_account, upsert_post,
+# insert_snapshot, upsert_account_daily), plus a freshness guard so an older
+# shard can never overwrite a newer row. `WHERE true` keeps SQLite from parsing
+# ON CONFLICT as a join constraint of the SELECT.
+MERGE_STATEMENTS = {
+    "accounts": """
+        INSERT INTO main.accounts(account_id, pixiv_user_id, updated_at)
+        SELECT account_id, pixiv_user_id, updated_at FROM shard.accounts WHERE true
+        ON CONFLICT(account_id) DO UPDATE SET
+            pixiv_user_id=excluded.pixiv_user_id,
+            updated_at=excluded.updated_at
+        WHERE excluded.updated_at > accounts.updated_at
+    """,
+    "posts": """
+        INSERT INTO main.posts(
+            account_id, illust_id, create_date, create_ts, tags_json, type, page_count, x_restrict, title, updated_at
+        )
+        SELECT
+            account_id, illust_id, create_date, create_ts, tags_json, type, page_count, x_restrict, title, updated_at
+        FROM shard.posts WHERE true
+        ON CONFLICT(account_id, illust_id) DO UPDATE SET
+            create_date=excluded.create_date,
+            create_ts=excluded.create_ts,
+            tags_json=excluded.tags_json,
+            type=excluded.type,
+            page_count=excluded.page_count,
+            x_restrict=excluded.x_restrict,
+            title=excluded.title,
+            updated_at=excluded.updated_at
+        WHERE excluded.updated_at > posts.updated_at
+    """,
+    "post_snapshots": """
+        INSERT OR IGNORE INTO main.post_snapshots(
+            account_id, illust_id, captured_at, captured_ts, bookmark_count, bookmark_rate, like_count, view_count, comment_count, source_mode
+        )
+        SELECT
+            account_id, illust_id, captured_at, captured_ts, bookmark_count, bookmark_rate, like_count, view_count, comment_count, source_mode
+        FROM shard.post_snapshots
+        ORDER BY captured_ts
+    """,
+    "account_daily": """
+        INSERT INTO main.account_daily(account_id, date, date_ts, followers, following, captured_at)
+        SELECT account_id, date, date_ts, followers, following, captured_at FROM shard.account_daily WHERE true
+        ON CONFLICT(account_id, date) DO UPDATE SET
+            followers=excluded.followers,
+            following=excluded.following,
+            captured_at=excluded.captured_at
+        WHERE excluded.captured_at > account_daily.captured_at
+    """,
+}
+
+# Append-only tables that are safe to empty once merged; accounts and posts
+# stay so a shard remains a self-contained DB.
+PRUNE_TABLES = ("post_snapshots", "account_daily")
+
+
+def shard_path(shard_dir: str, account_id: str) -> str:
+    return str(Path(shard_dir) / f"{account_id}.db")
+
+
+def list_shards(shard_dir: str) -> List[str]:
+    return [str(p) for p in sorted(Path(shard_dir).glob("*.db"))]
+
+
+def merge_shard(conn: sqlite3.Connection, path: str, prune: bool = False) -> Dict:
+    # Folds one shard into the main DB in a single transaction. Every statement
+    # is idempotent, so re-merging the same shard (e.g. after a failed push)
+    # changes nothing. Returns per-table row changes plus touched accounts/dates.
+    db.commit(conn)
+    conn.execute(f"ATTACH DATABASE ? AS {SHARD_SCHEMA}", (path,))
+    try:
+        tables = {
+            r["name"]
+            for r in conn.execute(f"SELECT name FROM {SHARD_SCHEMA}.sqlite_master WHERE type IN ('table', 'view')")
+        }
+        missing = set(MERGE_STATEMENTS) - tables
+        if missing:
+            raise ValueError(f"{path} is not a collector shard (missing {sorted(missing)})")
+
+        changes = {}
+        with conn:
+            for table, sql in MERGE_STATEMENTS.items():
+                before = conn.total_changes
+                conn.execute(sql)
+                changes[table] = conn.total_changes - before
+            accounts = [
+                r["account_id"]
+                for r in conn.execute(
+                    """
+                    SELECT account_id FROM shard.accounts
+                    UNION SELECT account_id FROM shard.account_daily
+                    UNION SELECT DISTINCT account_id FROM shard.post_snapshots
+                    """
+                )
+            ]
+            dates = [r["date"] for r in conn.execute("SELECT DISTINCT date FROM shard.account_daily")]
+            db.refresh_account_daily_rollup(conn, dates)
+
+        if prune:
+            # Separate transaction after the merge has committed: a crash in
+            # between only leaves rows that the next merge ignores.
+            with conn:
+                for table in PRUNE_TABLES:
+                    conn.execute(f"DELETE FROM {SHARD_SCHEMA}.{table}")
+    finally:
+        conn.execute(f"DETACH DATABASE {SHARD_SCHEMA}")
+    return {"changes": changes, "accounts": accounts, "dates": dates}
+
+
+def merge_shards(conn: sqlite3.Connection, paths: Sequence[str], prune: bool = False) -> Dict[str, Dict]:
+    from src.analytics.stages import refresh_account_stages
+
+    results = {path: merge_shard(conn, path, prune=prune) for path in paths}
+    # Derived stages only see merged data, so they run here rather than in the
+    # shard jobs; each one resumes from its own watermark.
+    for account_id in sorted({a for r in results.values() for a in r["accounts"]}):
+        refresh_account_stages(conn, account_id)
+    db.commit(conn)
+    return results
+
+
+def _parse_args(argv: Optional[Sequence[str]]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="collect.py merge", description="Fold per-account shard DBs into the main DB")
+    parser.add_argument("shards", nargs="*", help="Shard DB files (default: every *.db under --shard-dir)")
+    parser.add_argument("--shard-dir", default=os.environ.get("SHARD_DIR", "data/shards"))
+    parser.add_argument("--db-path", default=os.environ.get("DB_PATH", "data/pixiv_stats.db"))
+    parser.add_argument("--db-profile", default=os.environ.get("DB_PROFILE", "bulk_ingest"))
+    parser.add_argument("--replica-path", default=os.environ.get("REPLICA_DB_PATH", "").strip() or None)
+    parser.add_argument("--prune", action="store_true", help="Empty merged snapshot/daily rows from each shard")
+    parser.add_argument("--no-cache", action="store_true", help="Skip refreshing the analytics cache")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = _parse_args(argv)
+    paths = args.shards or list_shards(args.shard_dir)
+    if not paths:
+        print(f"[merge] no shards under {args.shard_dir}", file=sys.stderr)
+        return 0
+
+    Path(args.db_path).parent.mkdir(parents=True, exist_ok=True)
+    conn = db.connect_db(args.db_path, args.db_profile)
+    db.init_db(conn)
+    try:
+        results = merge_shards(conn, paths, prune=args.prune)
+        db.checkpoint(conn)
+        if not args.no_cache:
+            from src.analytics.cache import cache_dir_for, refresh_snapshot_cache
+
+            refresh_snapshot_cache(conn, cache_dir_for(args.db_path))
+        if args.replica_path:
+            db.publish_replica(conn, args.replica_path)
+    finally:
+        conn.close()
+    for path, result in results.items():
+        summary = ", ".join(f"{table}={n}" for table, n in result["changes"].items())
+        print(f"[merge] {path}: {summary}", file=sys.stderr)
+    return 0
@@ -2,8 +2,6 @@ import random
 import time
 from typing import Any, Dict, List, Optional
 
-from pixivpy3 import AppPixivAPI
-
 
 def _safe_get(obj: Any, key: str, default: Any = None) -> Any:
     if obj is None:
@@ -21,6 +19,8 @@ class PixivClient:
         jitter_sec: float = 0.3,
         max_attempts: int = 4,
     ):
+        from pixivpy3 import AppPixivAPI
+
         self.api = AppPixivAPI()
         self.api.auth(refresh_token=refresh_token)
         self.min_interval_sec = min_interval_sec
@@ -96,6 +96,10 @@ class PixivClient:
             return self._call_api(self.api.user_illusts, user_id)
         return self._call_api(self.api.user_illusts, user_id, offset=offset)
 
+    def latest_user_illusts(self, user_id: int) -> List[Any]:
+        # First page only (newest first): one call per poll in watch mode.
+        return _safe_get(self.user_illusts_page(user_id), "illusts", []) or []
+
     def list_user_illusts(self, user_id: int, max_pages: int = 3) -> List[Any]:
         results: List[Any] = []
         offset: Optional[int] = None
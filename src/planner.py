@@ -0,0 +1,122 @@
+import json
+import math
+import sqlite3
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+from src.records import PostRecord
+
+# Share of the run budget reserved up front, split evenly across accounts that
+# have candidates; the rest goes to the globally highest-value posts.
+FAIR_SHARE = 0.5
+# A post sampled this recently gains nothing from another detail call.
+MIN_RESAMPLE_HOURS = 1.0
+# Expected time until the next run gets another chance to sample a post.
+REVISIT_HOURS = 24.0
+
+
+@dataclass(frozen=True)
+class PostHistory:
+    last_ts: int
+    # Bookmarks per hour between the two newest snapshots, if there are two.
+    velocity: Optional[float] = None
+
+
+def load_post_history(
+    conn: sqlite3.Connection, account_id: str, illust_ids: Iterable[int]
+) -> Dict[int, PostHistory]:
+    rows = conn.execute(
+        """
+        WITH ranked AS (
+            SELECT
+                ps.illust_id,
+                ps.captured_ts,
+                ps.bookmark_count,
+                ROW_NUMBER() OVER (PARTITION BY ps.illust_id ORDER BY ps.captured_ts DESC) AS rn
+            FROM post_snapshots ps
+            JOIN json_each(?) ids ON ids.value = ps.illust_id
+            WHERE ps.account_id = ?
+        )
+        SELECT illust_id, captured_ts, bookmark_count, rn
+        FROM ranked
+        WHERE rn <= 2
+        ORDER BY illust_id, rn
+        """,
+        (json.dumps(sorted({int(i) for i in illust_ids})), account_id),
+    ).fetchall()
+
+    history: Dict[int, PostHistory] = {}
+    latest: Dict[int, sqlite3.Row] = {}
+    for r in rows:
+        illust_id = int(r["illust_id"])
+        if r["rn"] == 1:
+            latest[illust_id] = r
+            history[illust_id] = PostHistory(last_ts=int(r["captured_ts"]))
+            continue
+        last = latest[illust_id]
+        hours = (last["captured_ts"] - r["captured_ts"]) / 3600.0
+        if hours > 0 and last["bookmark_count"] is not None and r["bookmark_count"] is not None:
+            velocity = max(last["bookmark_count"] - r["bookmark_count"], 0) / hours
+            history[illust_id] = PostHistory(last_ts=int(last["captured_ts"]), velocity=velocity)
+    return history
+
+
+def merge_histories(*sources: Dict[int, PostHistory]) -> Dict[int, PostHistory]:
+    merged: Dict[int, PostHistory] = {}
+    for source in sources:
+        for illust_id, item in source.items():
+            if illust_id not in merged or item.last_ts > merged[illust_id].last_ts:
+                merged[illust_id] = item
+    return merged
+
+
+def score_candidate(candidate: PostRecord, history: Optional[PostHistory], now_ts: int) -> float:
+    # Growth curves are read on a log-time axis. Skipping a post until the next
+    # run loses ln(1 + REVISIT_HOURS / age) of early curve for good, which
+    # makes young posts urgent; that is scaled by the log-time gap a sample
+    # closes now (ln(1 + hours since last sample / age at that sample), from
+    # t=1h when never sampled) and by recent bookmark velocity.
+    age_hours = max((now_ts - candidate.create_ts) / 3600.0, 1.0)
+    urgency = math.log1p(REVISIT_HOURS / age_hours)
+    if history is None:
+        return urgency * (1.0 + math.log1p(age_hours))
+    since_hours = (now_ts - history.last_ts) / 3600.0
+    if since_hours < MIN_RESAMPLE_HOURS:
+        return 0.0
+    gap = math.log1p(since_hours / max(age_hours - since_hours, 1.0))
+    velocity = 0.0 if history.velocity is None else history.velocity
+    return urgency * (1.0 + gap) * (1.0 + math.log1p(velocity * 24.0))
+
+
+def plan_details(
+    candidates: Iterable[PostRecord],
+    histories: Dict[str, Dict[int, PostHistory]],
+    budget: int,
+    now_ts: int,
+    per_account_cap: Optional[int] = None,
+    fair_share: float = FAIR_SHARE,
+) -> List[PostRecord]:
+    # Picks at most `budget` posts (and `per_account_cap` per account, if set). Every
+    # account with candidates is first granted its best posts up to an equal
+    # slice of `fair_share * budget`; leftover budget then goes to the highest
+    # scores regardless of account. Returned in descending score order, so an
+    # interrupted run has already spent its calls on the most valuable posts.
+    ranked: Dict[str, List[tuple]] = {}
+    for c in candidates:
+        score = score_candidate(c, histories.get(c.account_id, {}).get(c.illust_id), now_ts)
+        if score > 0:
+            ranked.setdefault(c.account_id, []).append((-score, c.account_id, c.illust_id, c))
+    if budget <= 0 or not ranked:
+        return []
+
+    for account_id in ranked:
+        ranked[account_id] = sorted(ranked[account_id])[:per_account_cap]
+    reserved = int(budget * fair_share) // len(ranked)
+
+    chosen: List[tuple] = []
+    rest: List[tuple] = []
+    for items in ranked.values():
+        chosen.extend(items[:reserved])
+        rest.extend(items[reserved:])
+    chosen.extend(sorted(rest)[: max(budget - len(chosen), 0)])
+    return [item[-1] for item in sorted(chosen)][:budget]
@@ -0,0 +1,94 @@
+import json
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Optional
+
+from src.pixiv_client import extract_post_meta
+
+
+@lru_cache(maxsize=4096)
+def _tags_json(tags: tuple) -> str:
+    # Accounts reuse a small tag vocabulary, so most lists serialize once.
+    return json.dumps(list(tags), ensure_ascii=False)
+
+
+@dataclass(frozen=True, slots=True)
+class RunClock:
+    # One reading of the wall clock per collector run; every timestamp the run
+    # writes (updated_at, captured_at, the daily date) and every age check
+    # derives from it.
+    now_ts: int
+    updated_at: str
+    captured_at: str
+    captured_ts: int
+    date: str
+
+    @classmethod
+    def start(cls, now: Optional[datetime] = None) -> "RunClock":
+        now = (now or datetime.now(timezone.utc)).astimezone(timezone.utc)
+        captured = now.replace(second=0, microsecond=0)
+        return cls(
+            now_ts=int(now.timestamp()),
+            updated_at=now.replace(microsecond=0).isoformat(),
+            captured_at=captured.isoformat(),
+            captured_ts=int(captured.timestamp()),
+            date=now.date().isoformat(),
+        )
+
+    def is_within_days(self, ts: int, days: int) -> bool:
+        return ts >= self.now_ts - days * 86400
+
+
+@dataclass(frozen=True, slots=True)
+class PostRecord:
+    account_id: str
+    illust_id: int
+    create_ts: int
+    create_date: str = ""
+    tags_json: str = "[]"
+    type: Optional[str] = None
+    page_count: Optional[int] = None
+    x_restrict: Optional[int] = None
+    title: Optional[str] = None
+
+    @classmethod
+    def from_illust(cls, account_id: str, illust: Any) -> Optional["PostRecord"]:
+        # Parses create_date exactly once; None for illusts the API returned
+        # without an id or date.
+        meta = extract_post_meta(illust)
+        illust_id = meta.get("illust_id")
+        raw_create_date = meta.get("create_date")
+        if not illust_id or not raw_create_date:
+            return None
+
+        created = datetime.fromisoformat(raw_create_date)
+        if created.tzinfo is None:
+            created = created.replace(tzinfo=timezone.utc)
+        created = created.astimezone(timezone.utc).replace(microsecond=0)
+        return cls(
+            account_id=account_id,
+            illust_id=int(illust_id),
+            create_ts=int(created.timestamp()),
+            create_date=created.isoformat(),
+            tags_json=_tags_json(tuple(meta.get("tags", []))),
+            type=meta.get("type"),
+            page_count=meta.get("page_count"),
+            x_restrict=meta.get("x_restrict"),
+            title=meta.get("title"),
+        )
+
+    def db_row(self, updated_at: str) -> tuple:
+        # Column order of db.upsert_posts.
+        return (
+            self.account_id,
+            self.illust_id,
+            self.create_date,
+            self.create_ts,
+            self.tags_json,
+            self.type,
+            self.page_count,
+            self.x_restrict,
+            self.title,
+            updated_at,
+        )
@@ -1,7 +1,67 @@
 import sys
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
+import pytest
+
 
 ROOT = Path(__file__).resolve().parent.parent
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
+
+from src import db  # noqa: E402
+
+BASE = datetime(2026, 3, 1, tzinfo=timezone.utc)
+
+
+def _at(when) -> datetime:
+    # Hours (or a timedelta) after BASE, or an explicit datetime.
+    if isinstance(when, datetime):
+        return when
+    return BASE + (when if isinstance(when, timedelta) else timedelta(hours=when))
+
+
+class SnapshotWriter:
+    # Writes posts and snapshots to one connection, for `account_id` unless
+    # a call names another account.
+    def __init__(self, conn, account_id: str = "main"):
+        self.conn = conn
+        self.account_id = account_id
+
+    def post(self, illust_id: int, post_type: str = "illust", created=0, account_id=None) -> None:
+        db.upsert_post(
+            self.conn,
+            {
+                "account_id": account_id or self.account_id,
+                "illust_id": illust_id,
+                "create_date": _at(created).isoformat(),
+                "tags_json": "[]",
+                "type": post_type,
+            },
+        )
+
+    def snapshot(self, illust_id: int, captured, bookmarks, mode: str = "daily", account_id=None, **extra) -> None:
+        row = {
+            "account_id": account_id or self.account_id,
+            "illust_id": illust_id,
+            "captured_at": _at(captured).isoformat(),
+            "bookmark_count": bookmarks,
+            "view_count": 100,
+            "source_mode": mode,
+        }
+        row.update(extra)
+        db.insert_snapshot(self.conn, row)
+
+
+@pytest.fixture
+def snapshot_db(tmp_path):
+    # Factory: an initialised DB file under tmp_path with the given accounts,
+    # wrapped in a SnapshotWriter (its connection is `.conn`).
+    def open_db(name: str = "test.db", accounts=()) -> SnapshotWriter:
+        conn = db.connect_db(str(tmp_path / name))
+        db.init_db(conn)
+        for account_id in accounts:
+            db.upsert_account(conn, account_id, 1)
+        return SnapshotWriter(conn)
+
+    return open_db
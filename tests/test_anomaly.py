@@ -0,0 +1,55 @@
+import random
+from datetime import date, timedelta
+
+from src import db
+from src.analytics.anomaly import detect_follower_events
+
+
+def _followers(n_days: int) -> list[int]:
+    rnd = random.Random(1)
+    total, out = 1000, []
+    for d in range(n_days):
+        gain = 3 + rnd.randint(-2, 2)
+        if d >= 200:
+            gain += 9
+        if d == 100:
+            gain += 80
+        if d == 150:
+            gain -= 60
+        total += gain
+        out.append(total)
+    return out
+
+
+def _events(conn) -> list[tuple]:
+    rows = conn.execute(
+        "SELECT date, kind, round(delta, 3), round(score, 3) FROM follower_events ORDER BY date, kind"
+    ).fetchall()
+    return [tuple(r) for r in rows]
+
+
+def test_follower_events_incremental_matches_batch(tmp_path):
+    series = _followers(300)
+    days = [(date(2025, 1, 1) + timedelta(days=d)).isoformat() for d in range(len(series))]
+
+    batch = db.connect_db(str(tmp_path / "batch.db"))
+    db.init_db(batch)
+    for day, followers in zip(days, series):
+        db.upsert_account_daily(batch, "main", day, followers, 10, f"{day}T00:00:00+00:00")
+    detect_follower_events(batch, "main")
+
+    # Daily runs, each day first collected early and then overwritten by a rerun.
+    daily = db.connect_db(str(tmp_path / "daily.db"))
+    db.init_db(daily)
+    for day, followers in zip(days, series):
+        for value in (followers - 7, followers):
+            db.upsert_account_daily(daily, "main", day, value, 10, f"{day}T00:00:00+00:00")
+            detect_follower_events(daily, "main")
+
+    events = _events(batch)
+    assert events == _events(daily)
+    kinds = {(d, k) for d, k, _, _ in events}
+    assert ("2025-04-11", "spike") in kinds
+    assert ("2025-05-31", "drop") in kinds
+    assert ("2025-07-20", "change_up") in kinds
+    assert not any(k == "change_down" for _, k in kinds)
@@ -0,0 +1,131 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from src import db
+from src.analytics.attribution import fit_lagged_nnls, refresh_attribution
+from src.analytics.rollups import refresh_daily_performance
+
+BASE = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def test_fit_lagged_nnls_recovers_nonnegative_lag_weights():
+    rng = np.random.default_rng(0)
+    gains = rng.uniform(0, 200, size=120)
+    lags = np.stack([gains, np.r_[np.nan, gains[:-1]], np.r_[np.nan, np.nan, gains[:-2]]], axis=1)
+    y = 5 + 0.05 * lags[:, 0] + 0.02 * np.nan_to_num(lags[:, 1]) - 0.01 * np.nan_to_num(lags[:, 2])
+
+    coef, n_days, _ = fit_lagged_nnls(y, lags, window=28)
+
+    assert n_days[-1] == 28
+    assert np.all(coef[:, 1:] >= 0)
+    # The negative lag-2 effect is clamped to zero; the others stay close.
+    assert abs(coef[-1, 1] - 0.05) < 0.005
+    assert abs(coef[-1, 2] - 0.02) < 0.005
+    assert coef[-1, 3] == 0
+
+
+def _collect_day(conn, rnd, day_index: int, counts: dict, state: dict) -> None:
+    day = BASE + timedelta(days=day_index)
+    if day_index % 3 == 0:
+        iid = 1000 + day_index
+        state["posts"][iid] = (day, rnd.randint(50, 400) * (5 if day_index == 24 else 1))
+        db.upsert_post(
+            conn,
+            {"account_id": "main", "illust_id": iid, "create_date": day.isoformat(), "tags_json": "[]", "type": "illust"},
+        )
+    gained = 0
+    for iid, (created, final) in state["posts"].items():
+        hours = (day + timedelta(hours=12) - created).total_seconds() / 3600
+        value = int(final * (1 - 0.5 ** (hours / 24)))
+        gained += value - counts.get(iid, 0)
+        counts[iid] = value
+        db.insert_snapshot(
+            conn,
+            {
+                "account_id": "main",
+                "illust_id": iid,
+                "captured_at": (day + timedelta(hours=12)).isoformat(),
+                "bookmark_count": value,
+                "source_mode": "daily",
+            },
+        )
+    state["followers"] += int(0.05 * gained) + rnd.randint(0, 3)
+    db.upsert_account_daily(conn, "main", day.date().isoformat(), state["followers"], 1, day.isoformat())
+
+
+def _build(path, incremental: bool):
+    rnd = random.Random(0)
+    conn = db.connect_db(path)
+    db.init_db(conn)
+    counts: dict = {}
+    state = {"posts": {}, "followers": 1000}
+    for d in range(50):
+        _collect_day(conn, rnd, d, counts, state)
+        if incremental:
+            refresh_daily_performance(conn, "main")
+            refresh_attribution(conn, "main")
+    refresh_daily_performance(conn, "main")
+    refresh_attribution(conn, "main")
+    return conn
+
+
+def test_attribution_incremental_matches_batch_and_ranks_viral_post(tmp_path):
+    batch = _build(str(tmp_path / "batch.db"), incremental=False)
+    daily = _build(str(tmp_path / "daily.db"), incremental=True)
+
+    query = """
+        SELECT date, illust_id, round(attributed_followers, 6), bookmarks_gained
+        FROM post_attribution ORDER BY date, illust_id
+    """
+    rows = batch.execute(query).fetchall()
+    assert rows
+    assert [tuple(r) for r in rows] == [tuple(r) for r in daily.execute(query).fetchall()]
+
+    top = batch.execute(
+        "SELECT illust_id FROM post_attribution GROUP BY illust_id ORDER BY SUM(attributed_followers) DESC LIMIT 1"
+    ).fetchone()
+    assert top["illust_id"] == 1024
+
+
+def test_late_snapshot_before_watermark_refits_its_days(tmp_path):
+    conn = _build(str(tmp_path / "daily.db"), incremental=True)
+    query = """
+        SELECT date, illust_id, round(attributed_followers, 6), bookmarks_gained
+        FROM post_attribution ORDER BY date, illust_id
+    """
+    before = [tuple(r) for r in conn.execute(query).fetchall()]
+
+    # A buffered row for the viral post lands twenty days behind both watermarks.
+    counts = [
+        r[0]
+        for r in conn.execute(
+            "SELECT bookmark_count FROM post_snapshots WHERE illust_id = 1024 AND captured_ts IN (?, ?)",
+            (
+                int((BASE + timedelta(days=29, hours=12)).timestamp()),
+                int((BASE + timedelta(days=30, hours=12)).timestamp()),
+            ),
+        )
+    ]
+    db.insert_snapshot(
+        conn,
+        {
+            "account_id": "main",
+            "illust_id": 1024,
+            "captured_at": (BASE + timedelta(days=29, hours=23)).isoformat(),
+            "bookmark_count": sum(counts) // 2,
+            "source_mode": "daily",
+        },
+    )
+    refresh_daily_performance(conn, "main")
+    refresh_attribution(conn, "main")
+    after = [tuple(r) for r in conn.execute(query).fetchall()]
+    assert after != before
+
+    for table in ("post_daily_delta", "account_daily_performance", "attribution_fits", "post_attribution"):
+        conn.execute(f"DELETE FROM {table}")
+    conn.execute("DELETE FROM stage_watermarks")
+    refresh_daily_performance(conn, "main")
+    refresh_attribution(conn, "main")
+    assert after == [tuple(r) for r in conn.execute(query).fetchall()]
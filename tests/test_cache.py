@@ -0,0 +1,108 @@
+import numpy as np
+
+from src import db
+from src.analytics.cache import open_snapshot_store, read_manifest, refresh_snapshot_cache
+from src.analytics.store import METRICS, load_snapshot_store
+
+
+def _db(snapshot_db):
+    w = snapshot_db(accounts=["main"])
+    w.post(10)
+    w.post(20)
+    w.snapshot(10, 1, 5)
+    w.snapshot(10, 24, 20)
+    w.snapshot(20, 2, 3)
+    db.commit(w.conn)
+    return w
+
+
+def _assert_same(a, b) -> None:
+    assert a.post_ids.tolist() == b.post_ids.tolist()
+    assert a.offsets.tolist() == b.offsets.tolist()
+    assert a.captured_ts.tolist() == b.captured_ts.tolist()
+    for m in METRICS:
+        assert a.counters[m].tolist() == b.counters[m].tolist()
+
+
+def test_incremental_refresh_matches_full_rebuild(snapshot_db, tmp_path):
+    w = _db(snapshot_db)
+    conn = w.conn
+    cache_dir = tmp_path / "test.cache"
+    assert refresh_snapshot_cache(conn, cache_dir) == {"main": 3}
+    assert refresh_snapshot_cache(conn, cache_dir) == {}
+
+    w.post(30)
+    w.snapshot(30, 5, 1)
+    w.snapshot(10, 48, 30)
+    w.snapshot(10, 24, 22, mode="manual")  # same minute as a cached daily row
+    w.snapshot(20, 1, 2)  # earlier than the cached row for post 20
+    db.commit(conn)
+    assert refresh_snapshot_cache(conn, cache_dir) == {"main": 6}
+
+    cached = open_snapshot_store(conn, cache_dir, "main")
+    assert isinstance(cached.captured_ts, np.memmap)
+    _assert_same(cached, load_snapshot_store(conn, "main"))
+    assert cached.series(10)[1].tolist() == [5, 22, 30]
+    # Only the live generation is kept on disk.
+    assert sorted(p.name for p in cache_dir.iterdir() if p.is_dir()) == ["main.g2"]
+    conn.close()
+
+
+def test_stale_cache_falls_back_to_sqlite(snapshot_db, tmp_path):
+    w = _db(snapshot_db)
+    conn = w.conn
+    cache_dir = tmp_path / "test.cache"
+    refresh_snapshot_cache(conn, cache_dir)
+    w.snapshot(20, 30, 9)
+    db.commit(conn)
+
+    store = open_snapshot_store(conn, cache_dir, "main")
+    assert not isinstance(store.captured_ts, np.memmap)
+    assert store.series(20)[1].tolist() == [3, 9]
+    assert open_snapshot_store(conn, cache_dir, "other").n_posts == 0
+    conn.close()
+
+
+def test_deleted_rows_force_a_full_rebuild(snapshot_db, tmp_path):
+    w = _db(snapshot_db)
+    conn = w.conn
+    cache_dir = tmp_path / "test.cache"
+    refresh_snapshot_cache(conn, cache_dir)
+
+    # The watermark row survives, so only the row count shows the delete.
+    conn.execute("DELETE FROM post_snapshots WHERE illust_id = 10")
+    w.snapshot(20, 30, 9)
+    db.commit(conn)
+
+    refresh_snapshot_cache(conn, cache_dir)
+    _assert_same(open_snapshot_store(conn, cache_dir, "main"), load_snapshot_store(conn, "main"))
+    assert read_manifest(cache_dir)["accounts"]["main"]["posts"] == 1
+    conn.close()
+
+
+def test_refresh_rewrites_only_accounts_with_new_rows(snapshot_db, tmp_path):
+    w = _db(snapshot_db)
+    conn = w.conn
+    db.upsert_account(conn, "sub2", 2)
+    w.post(90, "manga", account_id="sub2")
+    w.snapshot(90, 0, None, account_id="sub2")
+    db.commit(conn)
+    cache_dir = tmp_path / "test.cache"
+    assert refresh_snapshot_cache(conn, cache_dir) == {"main": 3, "sub2": 1}
+
+    w.snapshot(20, 30, 9)
+    w.post(10)  # a metadata sync that changes nothing cached
+    db.commit(conn)
+    assert refresh_snapshot_cache(conn, cache_dir) == {"main": 4}
+    dirs = {a: e["dir"] for a, e in read_manifest(cache_dir)["accounts"].items()}
+    assert dirs == {"main": "main.g2", "sub2": "sub2.g1"}
+    assert sorted(p.name for p in cache_dir.iterdir() if p.is_dir()) == ["main.g2", "sub2.g1"]
+    assert isinstance(open_snapshot_store(conn, cache_dir, "sub2").captured_ts, np.memmap)
+
+    # A changed post type invalidates the carried columns.
+    conn.execute("UPDATE posts SET type = 'illust' WHERE account_id = 'sub2'")
+    w.snapshot(20, 40, 11)
+    db.commit(conn)
+    assert refresh_snapshot_cache(conn, cache_dir) == {"main": 5, "sub2": 1}
+    assert open_snapshot_store(conn, cache_dir, "sub2").post_types().tolist() == ["illust"]
+    conn.close()
@@ -0,0 +1,89 @@
+import sqlite3
+
+import pytest
+
+from src import db
+from src.analytics.cache import open_snapshot_store, refresh_snapshot_cache
+from src.analytics.stages import refresh_account_stages
+from src.analytics.store import METRICS, load_snapshot_store
+from src.compact import compact_snapshots, expand_snapshots
+from src.merge import merge_shards
+
+
+def _db(snapshot_db, name: str):
+    w = snapshot_db(name, accounts=["main", "sub2"])
+    w.post(10)
+    w.post(20)
+    w.post(30, account_id="sub2")
+    w.snapshot(10, 1, 5)
+    w.snapshot(10, 24, 20, bookmark_rate=0.2)
+    w.snapshot(10, 24, 22, mode="manual", bookmark_rate=0.22)
+    w.snapshot(20, 2, None)
+    w.snapshot(30, 3, 7, account_id="sub2", bookmark_rate=0.07)
+    db.commit(w.conn)
+    return w
+
+
+def _dump(conn) -> list:
+    return [tuple(r) for r in conn.execute(f"SELECT rowid, {', '.join(db.SNAPSHOT_COLUMNS)} FROM post_snapshots")]
+
+
+def test_compact_layout_round_trips_and_accepts_writes(snapshot_db):
+    w = _db(snapshot_db, "test.db")
+    conn = w.conn
+    before = _dump(conn)
+
+    assert compact_snapshots(conn) == 5
+    assert db.snapshots_compacted(conn)
+    assert _dump(conn) == before
+    db.init_db(conn)  # keeps the view
+    assert db.snapshots_compacted(conn)
+
+    # Writes go through the view: duplicates are ignored, new modes get a key.
+    w.snapshot(10, 1, 99)
+    w.snapshot(20, 48, 12, mode="watch", bookmark_rate=0.12)
+    with pytest.raises(sqlite3.IntegrityError):
+        db.insert_snapshot(
+            conn,
+            {"account_id": "main", "illust_id": 20, "captured_at": "2026-03-05T09:00:00+09:00", "source_mode": "daily"},
+        )
+    db.commit(conn)
+    after = _dump(conn)
+    assert after[:5] == before
+    assert after[5][1:] == ("main", 20, "2026-03-03T00:00:00+00:00", 1772496000, 12, 0.12, None, 100, None, "watch")
+
+    assert expand_snapshots(conn) == 6
+    assert not db.snapshots_compacted(conn)
+    assert _dump(conn) == after
+    conn.close()
+
+
+def test_stages_cache_and_merge_read_the_compact_view(snapshot_db, tmp_path):
+    plain = _db(snapshot_db, "plain.db").conn
+    compact = _db(snapshot_db, "compact.db").conn
+    compact_snapshots(compact)
+
+    shard = _db(snapshot_db, "shard.db")
+    shard.snapshot(20, 30, 40)
+    db.commit(shard.conn)
+    shard.conn.close()
+    for conn in (plain, compact):
+        merge_shards(conn, [str(tmp_path / "shard.db")])
+        refresh_account_stages(conn, "main")
+        db.commit(conn)
+
+    assert _dump(compact) == _dump(plain)
+    for query in (
+        "SELECT illust_id, metric, horizon_hours, value FROM post_horizon_values ORDER BY 1, 2, 3",
+        "SELECT illust_id, date, bookmarks_gained, views_gained FROM post_daily_delta ORDER BY 1, 2",
+    ):
+        assert [tuple(r) for r in compact.execute(query)] == [tuple(r) for r in plain.execute(query)]
+
+    cache_dir = tmp_path / "compact.cache"
+    assert refresh_snapshot_cache(compact, cache_dir) == {"main": 4, "sub2": 1}
+    cached, direct = open_snapshot_store(compact, cache_dir, "main"), load_snapshot_store(plain, "main")
+    assert cached.post_ids.tolist() == direct.post_ids.tolist()
+    for m in METRICS:
+        assert cached.counters[m].tolist() == direct.counters[m].tolist()
+    plain.close()
+    compact.close()
@@ -15,13 +15,23 @@ def test_load_settings_parses_accounts_json(monkeypatch):
     monkeypatch.setenv("API_MIN_INTERVAL_SEC", "1.1")
     monkeypatch.setenv("API_JITTER_SEC", "0.2")
     monkeypatch.setenv("TZ", "UTC")
+    monkeypatch.setenv("DB_PROFILE", "archival")
+    monkeypatch.setenv("SHARD_DIR", "data/shards")
+    monkeypatch.setenv("MAX_DETAILS_PER_RUN", "300")
+    monkeypatch.setenv("ANALYTICS_CACHE", "false")
+    monkeypatch.setenv("WATCH_POLL_SEC", "120")
 
     settings = load_settings()
 
     assert settings.db_path == "data/test.db"
+    assert settings.db_profile == "archival"
+    assert settings.shard_dir == "data/shards"
     assert settings.snapshot_max_age_days == 60
     assert settings.user_illusts_max_pages == 2
     assert settings.max_details_per_account == 15
+    assert settings.max_details_per_run == 300
+    assert settings.analytics_cache is False
+    assert settings.watch_poll_sec == 120.0
     assert settings.api_min_interval_sec == 1.1
     assert settings.api_jitter_sec == 0.2
     assert len(settings.accounts) == 1
@@ -1,3 +1,9 @@
+import os
+import sqlite3
+import threading
+
+import pytest
+
 from src import db
 
 
@@ -71,3 +77,148 @@ def test_account_daily_upsert_updates_same_day(tmp_path):
     ).fetchone()
     assert row["followers"] == 95
     assert row["following"] == 50
+
+
+def test_account_daily_rollup_sums_accounts_per_date(tmp_path):
+    conn = db.connect_db(str(tmp_path / "test.db"))
+    db.init_db(conn)
+
+    for account_id, followers in [("main", 100), ("sub2", 40)]:
+        db.upsert_account_daily(
+            conn,
+            account_id=account_id,
+            date_yyyy_mm_dd="2026-02-06",
+            followers=followers,
+            following=None,
+            captured_at="2026-02-06T01:00:00+00:00",
+        )
+    db.refresh_account_daily_rollup(conn, ["2026-02-06"])
+    db.commit(conn)
+
+    row = conn.execute(
+        "SELECT followers, following, account_count FROM account_daily_rollup WHERE date='2026-02-06'"
+    ).fetchone()
+    assert row["followers"] == 140
+    assert row["following"] == 0
+    assert row["account_count"] == 2
+
+
+def test_init_db_backfills_epoch_columns_and_keeps_them_in_sync(tmp_path):
+    conn = db.connect_db(str(tmp_path / "test.db"))
+    conn.executescript(
+        """
+        CREATE TABLE posts (
+            account_id TEXT NOT NULL,
+            illust_id INTEGER NOT NULL,
+            create_date TEXT NOT NULL,
+            tags_json TEXT NOT NULL,
+            type TEXT,
+            page_count INTEGER,
+            x_restrict INTEGER,
+            title TEXT,
+            updated_at TEXT NOT NULL,
+            PRIMARY KEY (account_id, illust_id)
+        );
+        INSERT INTO posts(account_id, illust_id, create_date, tags_json, updated_at)
+        VALUES ('main', 1, '2026-02-06T09:00:00+09:00', '[]', '2026-02-06T00:00:00+00:00');
+        """
+    )
+    db.init_db(conn)
+
+    row = conn.execute("SELECT create_ts FROM posts WHERE illust_id = 1").fetchone()
+    assert row["create_ts"] == db.iso_to_epoch("2026-02-06T00:00:00+00:00")
+
+    conn.execute(
+        "INSERT INTO post_snapshots(account_id, illust_id, captured_at, source_mode) VALUES ('main', 1, '2026-02-06T01:00:00+00:00', 'daily')"
+    )
+    db.upsert_account_daily(conn, "main", "2026-02-06", 10, 1, "2026-02-06T01:00:00+00:00")
+    db.commit(conn)
+
+    snap = conn.execute("SELECT captured_ts FROM post_snapshots").fetchone()
+    daily = conn.execute("SELECT date_ts FROM account_daily").fetchone()
+    assert snap["captured_ts"] == row["create_ts"] + 3600
+    assert daily["date_ts"] == row["create_ts"]
+
+
+def test_publish_replica_copies_committed_state(tmp_path):
+    db_path = str(tmp_path / "test.db")
+    replica_path = str(tmp_path / "replica" / "ui.db")
+    conn = db.connect_db(db_path)
+    db.init_db(conn)
+    db.upsert_account(conn, "main", 123)
+    db.commit(conn)
+
+    assert db.replica_is_stale(db_path, replica_path) is True
+    db.publish_replica(conn, replica_path)
+    assert db.replica_is_stale(db_path, replica_path) is False
+
+    # Uncommitted work of a running collection is not visible to other readers.
+    db.upsert_account(conn, "sub2", 456)
+    reader = sqlite3.connect(db_path)
+    db.publish_replica(reader, replica_path)
+    reader.close()
+    replica = sqlite3.connect(replica_path)
+    assert replica.execute("SELECT account_id FROM accounts").fetchall() == [("main",)]
+    assert replica.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+    replica.close()
+    conn.close()
+
+
+def test_concurrent_replica_publishes_never_swap_in_a_partial_copy(tmp_path):
+    db_path = str(tmp_path / "test.db")
+    replica_path = str(tmp_path / "replica" / "ui.db")
+    conn = db.connect_db(db_path)
+    db.init_db(conn)
+    db.upsert_account(conn, "main", 123)
+    db.commit(conn)
+    conn.close()
+
+    errors = []
+
+    def publish():
+        # One connection per thread, as in resolve_read_path per UI session.
+        source = sqlite3.connect(db_path)
+        try:
+            for _ in range(20):
+                db.publish_replica(source, replica_path)
+                replica = sqlite3.connect(f"file:{replica_path}?mode=ro", uri=True)
+                try:
+                    assert replica.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+                    assert replica.execute("SELECT account_id FROM accounts").fetchall() == [("main",)]
+                finally:
+                    replica.close()
+        except Exception as exc:  # noqa: BLE001
+            errors.append(exc)
+        finally:
+            source.close()
+
+    threads = [threading.Thread(target=publish) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    assert os.listdir(tmp_path / "replica") == ["ui.db"]
+
+
+def test_connection_profiles_apply_pragmas_and_checkpoint_is_explicit(tmp_path):
+    db_path = str(tmp_path / "test.db")
+    conn = db.connect_db(db_path, "bulk_ingest")
+    db.init_db(conn)
+    assert conn.execute("PRAGMA wal_autocheckpoint").fetchone()[0] == 0
+    assert conn.execute("PRAGMA page_size").fetchone()[0] == 8192
+
+    db.upsert_account(conn, "main", 123)
+    db.commit(conn)
+    assert (tmp_path / "test.db-wal").stat().st_size > 0
+    busy, _, _ = db.checkpoint(conn)
+    assert busy == 0
+    assert (tmp_path / "test.db-wal").stat().st_size == 0
+    conn.close()
+
+    archival = db.connect_db(db_path, "archival")
+    assert archival.execute("PRAGMA synchronous").fetchone()[0] == 2
+    archival.close()
+
+    with pytest.raises(ValueError):
+        db.connect_db(db_path, "turbo")
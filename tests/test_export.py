@@ -0,0 +1,105 @@
+import csv
+import gzip
+import json
+import tracemalloc
+
+import pytest
+
+from src import db
+from src import export
+from src.export import export_table
+
+
+def _add_snapshots(conn, start: int, count: int, illust_id: int = 1) -> None:
+    for k in range(start, start + count):
+        db.insert_snapshot(
+            conn,
+            {
+                "account_id": "main",
+                "illust_id": illust_id,
+                "captured_at": f"2026-03-01T00:{k // 60:02d}:{k % 60:02d}+00:00",
+                "bookmark_count": k,
+                "source_mode": "daily",
+            },
+        )
+    db.commit(conn)
+
+
+def _setup(tmp_path):
+    db_path = str(tmp_path / "test.db")
+    conn = db.connect_db(db_path)
+    db.init_db(conn)
+    for illust_id, post_type in ((1, "illust"), (2, "manga")):
+        db.upsert_post(
+            conn,
+            {
+                "account_id": "main",
+                "illust_id": illust_id,
+                "create_date": "2026-03-01T00:00:00+00:00",
+                "tags_json": "[]",
+                "type": post_type,
+            },
+        )
+    return db_path, conn
+
+
+def test_export_resumes_from_watermark(tmp_path):
+    db_path, conn = _setup(tmp_path)
+    _add_snapshots(conn, 0, 25)
+    out = str(tmp_path / "snapshots.csv.gz")
+
+    assert export_table(db_path, "post_snapshots", out, resume=True, batch_size=10) == 25
+    assert export_table(db_path, "post_snapshots", out, resume=True, batch_size=10) == 0
+    _add_snapshots(conn, 25, 7)
+    assert export_table(db_path, "post_snapshots", out, resume=True, batch_size=10) == 7
+
+    with gzip.open(out, "rt", newline="") as fh:
+        rows = list(csv.DictReader(fh))
+    assert [int(r["bookmark_count"]) for r in rows] == list(range(32))
+
+    with pytest.raises(ValueError):
+        export_table(db_path, "post_snapshots", out, resume=True, account_id="sub2")
+
+
+@pytest.mark.parametrize("name", ["snapshots.csv", "snapshots.csv.gz"])
+def test_export_resume_after_crash_before_watermark_is_exactly_once(tmp_path, monkeypatch, name):
+    db_path, conn = _setup(tmp_path)
+    _add_snapshots(conn, 0, 25)
+    out = str(tmp_path / name)
+    save = export.save_watermark
+    calls = []
+
+    def crash_on_second_batch(*args):
+        calls.append(args)
+        if len(calls) == 2:
+            raise KeyboardInterrupt  # the batch is on disk, its watermark is not
+        save(*args)
+
+    monkeypatch.setattr(export, "save_watermark", crash_on_second_batch)
+    with pytest.raises(KeyboardInterrupt):
+        export_table(db_path, "post_snapshots", out, resume=True, batch_size=10)
+    monkeypatch.setattr(export, "save_watermark", save)
+
+    assert export_table(db_path, "post_snapshots", out, resume=True, batch_size=10) == 15
+    opener = gzip.open if name.endswith(".gz") else open
+    with opener(out, "rt", newline="") as fh:
+        rows = list(csv.DictReader(fh))
+    assert [int(r["bookmark_count"]) for r in rows] == list(range(25))
+
+
+def test_export_filters_and_streams_jsonl_in_bounded_memory(tmp_path):
+    db_path, conn = _setup(tmp_path)
+    _add_snapshots(conn, 0, 3000)
+    _add_snapshots(conn, 0, 10, illust_id=2)
+    out = str(tmp_path / "manga.jsonl")
+
+    assert export_table(db_path, "post_snapshots", out, fmt="jsonl", post_type="manga") == 10
+    with open(out, encoding="utf-8") as fh:
+        assert {json.loads(line)["illust_id"] for line in fh} == {2}
+
+    tracemalloc.start()
+    export_table(db_path, "post_snapshots", str(tmp_path / "all.jsonl"), fmt="jsonl", batch_size=100)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # 3010 rows are written, but only one 100-row batch is held at a time.
+    assert peak < 200_000
@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta, timezone
+
+from src import db
+from src.analytics.forecast import refresh_forecasts
+
+
+def _iso(dt: datetime) -> str:
+    return dt.replace(microsecond=0).isoformat()
+
+
+def _add_post(conn, illust_id: int, created: datetime, curve: list[tuple[float, int]]) -> None:
+    db.upsert_post(
+        conn,
+        {
+            "account_id": "main",
+            "illust_id": illust_id,
+            "create_date": _iso(created),
+            "tags_json": "[]",
+            "type": "illust",
+        },
+    )
+    for hours, bookmarks in curve:
+        db.insert_snapshot(
+            conn,
+            {
+                "account_id": "main",
+                "illust_id": illust_id,
+                "captured_at": _iso(created + timedelta(hours=hours)),
+                "bookmark_count": bookmarks,
+                "source_mode": "daily",
+            },
+        )
+
+
+def test_refresh_forecasts_projects_recent_posts_incrementally(tmp_path):
+    conn = db.connect_db(str(tmp_path / "test.db"))
+    db.init_db(conn)
+    now = datetime.now(timezone.utc)
+
+    # Mature posts all reach half of their 7-day total at 24h.
+    for k in range(6):
+        final = 100 * (k + 1)
+        _add_post(
+            conn,
+            illust_id=k + 1,
+            created=now - timedelta(days=30 + k),
+            curve=[(1, final // 10), (24, final // 2), (168, final), (400, final)],
+        )
+    _add_post(conn, illust_id=99, created=now - timedelta(hours=30), curve=[(24, 150)])
+    db.commit(conn)
+
+    assert refresh_forecasts(conn, "main") == 1
+    row = conn.execute(
+        "SELECT * FROM post_forecasts WHERE account_id='main' AND illust_id=99"
+    ).fetchone()
+    assert row["elapsed_hours"] == 24.0
+    assert row["observed_value"] == 150
+    assert 250 <= row["projected_value"] <= 350
+    assert row["lower_value"] <= row["projected_value"] <= row["upper_value"]
+    assert row["baseline_value"] == 350
+    assert row["sample_size"] == 6
+
+    # Nothing new captured for the post: no rewrite.
+    assert refresh_forecasts(conn, "main") == 0
@@ -0,0 +1,40 @@
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Cumulative import budget for the collector entry point (microseconds).
+COLLECTOR_IMPORT_BUDGET_US = 100_000
+HEAVY_MODULES = ("pixivpy3", "pydantic", "numpy", "pandas", "streamlit", "altair", "dateutil", "requests")
+
+
+def _importtime(statement: str) -> dict[str, int]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cum_us, name = line.split("|")
+        cumulative[name.strip()] = int(cum_us)
+    return cumulative
+
+
+def test_collector_entry_point_import_budget():
+    modules = _importtime("import src.main")
+
+    assert modules["src.main"] <= COLLECTOR_IMPORT_BUDGET_US
+    heavy = [m for m in modules if m.split(".")[0] in HEAVY_MODULES]
+    assert heavy == []
+
+
+def test_collector_modules_do_not_import_pixivpy3():
+    modules = _importtime("import src.collectors.accounts, src.collectors.posts")
+
+    assert not [m for m in modules if m.split(".")[0] in ("pixivpy3", "dateutil", "pandas")]
@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta, timezone
+
+from src import db
+from src.merge import list_shards, merge_shards, shard_path
+
+BASE = datetime(2026, 3, 1, tzinfo=timezone.utc)
+
+
+def _write_shard(shard_dir, account_id: str, days: int, followers: int) -> None:
+    conn = db.connect_db(shard_path(str(shard_dir), account_id))
+    db.init_db(conn)
+    db.upsert_account(conn, account_id, 100 if account_id == "main" else 200)
+    db.upsert_post(
+        conn,
+        {
+            "account_id": account_id,
+            "illust_id": 1,
+            "create_date": BASE.isoformat(),
+            "tags_json": "[]",
+            "type": "illust",
+        },
+    )
+    for day in range(days):
+        captured = BASE + timedelta(days=day, hours=1)
+        db.upsert_account_daily(
+            conn, account_id, captured.date().isoformat(), followers + day, 10, captured.isoformat()
+        )
+        db.insert_snapshot(
+            conn,
+            {
+                "account_id": account_id,
+                "illust_id": 1,
+                "captured_at": captured.isoformat(),
+                "bookmark_count": 10 * (day + 1),
+                "view_count": 100 * (day + 1),
+                "source_mode": "daily",
+            },
+        )
+    db.commit(conn)
+    conn.close()
+
+
+def _counts(conn) -> dict:
+    tables = ["accounts", "posts", "post_snapshots", "account_daily", "account_daily_performance"]
+    return {t: conn.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0] for t in tables}
+
+
+def test_merge_is_idempotent_and_prunes(tmp_path):
+    shard_dir = tmp_path / "shards"
+    _write_shard(shard_dir, "main", days=3, followers=50)
+    _write_shard(shard_dir, "sub2", days=2, followers=7)
+    shards = list_shards(str(shard_dir))
+    assert [p.rsplit("/", 1)[-1] for p in shards] == ["main.db", "sub2.db"]
+
+    conn = db.connect_db(str(tmp_path / "main.db"))
+    db.init_db(conn)
+    first = merge_shards(conn, shards)
+    assert first[shards[0]]["changes"]["post_snapshots"] == 3
+    assert first[shards[0]]["accounts"] == ["main"]
+    assert _counts(conn) == {
+        "accounts": 2,
+        "posts": 2,
+        "post_snapshots": 5,
+        "account_daily": 5,
+        "account_daily_performance": 5,
+    }
+    rollup = conn.execute("SELECT followers, account_count FROM account_daily_rollup WHERE date = '2026-03-02'")
+    assert tuple(rollup.fetchone()) == (51 + 8, 2)
+
+    # Re-merging (e.g. a retried job) changes nothing.
+    again = merge_shards(conn, shards, prune=True)
+    assert all(n == 0 for r in again.values() for n in r["changes"].values())
+    assert _counts(conn)["post_snapshots"] == 5
+
+    shard = db.connect_db(shards[0])
+    assert shard.execute("SELECT COUNT(*) FROM post_snapshots").fetchone()[0] == 0
+    assert shard.execute("SELECT COUNT(*) FROM posts").fetchone()[0] == 1
+    shard.close()
+    conn.close()
+
+
+def test_merge_keeps_newer_rows(tmp_path):
+    conn = db.connect_db(str(tmp_path / "main.db"))
+    db.init_db(conn)
+    db.upsert_account_daily(conn, "main", "2026-03-01", 999, 1, "2026-03-01T23:00:00+00:00")
+    db.commit(conn)
+
+    _write_shard(tmp_path / "shards", "main", days=1, followers=50)
+    merge_shards(conn, list_shards(str(tmp_path / "shards")))
+    row = conn.execute("SELECT followers FROM account_daily WHERE date = '2026-03-01'").fetchone()
+    assert row[0] == 999
+    conn.close()
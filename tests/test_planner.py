@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta, timezone
+
+from src import db
+from src.planner import PostHistory, load_post_history, plan_details, score_candidate
+from src.records import PostRecord
+
+NOW = datetime(2026, 3, 10, tzinfo=timezone.utc)
+NOW_TS = int(NOW.timestamp())
+HOUR = 3600
+
+
+def _candidate(account_id: str, illust_id: int, age_hours: float) -> PostRecord:
+    return PostRecord(account_id, illust_id, int(NOW_TS - age_hours * HOUR))
+
+
+def test_score_prefers_young_stale_and_fast_posts():
+    young = _candidate("main", 1, 6)
+    old = _candidate("main", 2, 24 * 30)
+    assert score_candidate(young, None, NOW_TS) > score_candidate(old, None, NOW_TS)
+
+    sampled_day_ago = PostHistory(last_ts=NOW_TS - 24 * HOUR)
+    sampled_hour_ago = PostHistory(last_ts=NOW_TS - 2 * HOUR)
+    assert score_candidate(old, sampled_day_ago, NOW_TS) > score_candidate(old, sampled_hour_ago, NOW_TS)
+    assert score_candidate(old, PostHistory(last_ts=NOW_TS - 600), NOW_TS) == 0.0
+
+    fast = PostHistory(last_ts=NOW_TS - 24 * HOUR, velocity=5.0)
+    slow = PostHistory(last_ts=NOW_TS - 24 * HOUR, velocity=0.0)
+    assert score_candidate(old, fast, NOW_TS) > score_candidate(old, slow, NOW_TS)
+
+
+def test_plan_shares_budget_with_fairness_floor():
+    # "busy" has many young posts, "quiet" a few old ones already sampled today.
+    busy = [_candidate("busy", i, 2 + i) for i in range(20)]
+    quiet = [_candidate("quiet", 100 + i, 24 * 40) for i in range(5)]
+    histories = {"quiet": {c.illust_id: PostHistory(last_ts=NOW_TS - 20 * HOUR) for c in quiet}}
+
+    plan = plan_details(busy + quiet, histories, budget=10, per_account_cap=8, now_ts=NOW_TS)
+    accounts = [p.account_id for p in plan]
+    assert len(plan) == 10
+    # Floor: 10 * 0.5 / 2 accounts = 2 quiet posts; the rest goes to busy up to its cap.
+    assert accounts.count("quiet") == 2
+    assert accounts.count("busy") == 8
+    # Served in priority order: the youngest busy posts first.
+    assert [p.illust_id for p in plan[:3]] == [0, 1, 2]
+
+    # Without competition a quiet account's budget is not wasted elsewhere.
+    alone = plan_details(busy, {}, budget=10, per_account_cap=50, now_ts=NOW_TS)
+    assert len(alone) == 10
+    assert plan_details(busy, {}, budget=0, per_account_cap=50, now_ts=NOW_TS) == []
+
+    # Without a per-account ceiling (the collector's setting) busy takes
+    # everything past quiet's floor that quiet has no candidates for.
+    few_quiet = quiet[:1]
+    shared = plan_details(busy + few_quiet, histories, budget=12, now_ts=NOW_TS)
+    assert [p.account_id for p in shared].count("busy") == 11
+
+
+def test_load_post_history_reads_latest_two_snapshots(tmp_path):
+    conn = db.connect_db(str(tmp_path / "test.db"))
+    db.init_db(conn)
+    for hours_ago, bookmarks in [(48, 10), (24, 20), (12, 32)]:
+        db.insert_snapshot(
+            conn,
+            {
+                "account_id": "main",
+                "illust_id": 1,
+                "captured_at": (NOW - timedelta(hours=hours_ago)).isoformat(),
+                "bookmark_count": bookmarks,
+                "source_mode": "daily",
+            },
+        )
+    db.insert_snapshot(
+        conn,
+        {
+            "account_id": "main",
+            "illust_id": 2,
+            "captured_at": (NOW - timedelta(hours=5)).isoformat(),
+            "bookmark_count": 3,
+            "source_mode": "daily",
+        },
+    )
+
+    history = load_post_history(conn, "main", [1, 2, 3])
+    assert history[1] == PostHistory(last_ts=NOW_TS - 12 * HOUR, velocity=1.0)
+    assert history[2] == PostHistory(last_ts=NOW_TS - 5 * HOUR)
+    assert 3 not in history
+    conn.close()
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from src.analytics.forecast import ALL_TYPES
+from src.analytics.ranking import (
+    decode_distribution,
+    horizon_values,
+    percentile_of,
+    refresh_rankings,
+    update_sorted,
+)
+from src.analytics.store import load_snapshot_store
+
+
+def test_percentile_of_uses_mid_ranks():
+    dist = np.array([1.0, 2.0, 2.0, 5.0])
+    assert percentile_of(dist, [0.0, 2.0, 5.0, 9.0]).tolist() == [0.0, 50.0, 87.5, 100.0]
+    assert np.isnan(percentile_of(dist, [np.nan])).all()
+    assert np.isnan(percentile_of(np.empty(0), [1.0])).all()
+
+
+def test_update_sorted_swaps_values_in_place():
+    dist = np.array([1.0, 2.0, 2.0, 2.0, 7.0])
+    assert update_sorted(dist, [2.0, 2.0], [3.0, 0.0]).tolist() == [0.0, 1.0, 2.0, 3.0, 7.0]
+    with pytest.raises(ValueError):
+        update_sorted(dist, [2.0, 2.0, 2.0, 2.0], [])
+
+
+def _post(w, illust_id: int, post_type: str) -> None:
+    # Post N is published N hours after BASE; snapshot times are relative to it.
+    w.post(illust_id, post_type, created=illust_id)
+
+
+def _snapshot(w, illust_id: int, hours: float, bookmarks: int, mode: str = "daily") -> None:
+    w.snapshot(illust_id, illust_id + hours, bookmarks, mode)
+
+
+def _distribution(conn, post_type: str, horizon: float = 24.0) -> list:
+    row = conn.execute(
+        """
+        SELECT n, sorted_values FROM metric_distributions
+        WHERE account_id = 'main' AND post_type = ? AND metric = 'bookmark_count' AND horizon_hours = ?
+        """,
+        (post_type, horizon),
+    ).fetchone()
+    values = decode_distribution(row["sorted_values"])
+    assert row["n"] == len(values)
+    return values.tolist()
+
+
+def test_refresh_rankings_updates_only_touched_posts(snapshot_db):
+    w = snapshot_db()
+    conn = w.conn
+    for illust_id, post_type in [(1, "illust"), (2, "illust"), (3, "manga")]:
+        _post(w, illust_id, post_type)
+    _snapshot(w, 1, 23, 10)
+    _snapshot(w, 2, 25, 30)
+    _snapshot(w, 3, 24, 20)
+    _snapshot(w, 3, 40, 25)  # outside the 24h tolerance
+
+    assert refresh_rankings(conn, "main") > 0
+    assert _distribution(conn, ALL_TYPES) == [10.0, 20.0, 30.0]
+    assert _distribution(conn, "illust") == [10.0, 30.0]
+    assert refresh_rankings(conn, "main") == 0
+
+    # Post 1 gets a snapshot nearer 24h (a manual one in the same minute as a
+    # daily row) and post 4 appears, both captured before the previous newest
+    # snapshot; post 2 is untouched.
+    _post(w, 4, "manga")
+    _snapshot(w, 4, 26, 5)
+    _snapshot(w, 1, 24, 12)
+    _snapshot(w, 1, 24, 15, mode="manual")
+    # 24h bookmarks of posts 1 and 4, 24h views of post 4 (post 1's are unchanged).
+    assert refresh_rankings(conn, "main") == 3
+    assert _distribution(conn, ALL_TYPES) == [5.0, 15.0, 20.0, 30.0]
+    assert _distribution(conn, "illust") == [15.0, 30.0]
+    assert _distribution(conn, "manga") == [5.0, 20.0]
+
+    store = load_snapshot_store(conn, "main")
+    _, full, _ = horizon_values(store, "bookmark_count", 24.0)
+    assert _distribution(conn, ALL_TYPES) == sorted(full.tolist())
+    conn.close()
@@ -0,0 +1,58 @@
+from datetime import datetime, timezone
+
+from src import db
+from src.records import PostRecord, RunClock
+
+ILLUST = {
+    "id": 123,
+    "create_date": "2026-03-01T09:30:15.500+09:00",
+    "tags": [{"name": "オリジナル"}, {"name": "girl"}],
+    "type": "illust",
+    "page_count": 2,
+    "x_restrict": 0,
+    "title": "t",
+}
+
+
+def test_post_record_normalizes_once():
+    record = PostRecord.from_illust("main", ILLUST)
+    assert record.create_date == "2026-03-01T00:30:15+00:00"
+    assert record.create_ts == db.iso_to_epoch(record.create_date)
+    assert record.tags_json == '["オリジナル", "girl"]'
+    assert PostRecord.from_illust("main", {"id": 1}) is None
+    assert not hasattr(record, "__dict__")
+
+
+def test_run_clock_and_record_rows_match_legacy_writes(tmp_path):
+    clock = RunClock.start(datetime(2026, 3, 10, 12, 34, 56, 789, tzinfo=timezone.utc))
+    assert clock.captured_at == "2026-03-10T12:34:00+00:00"
+    assert clock.captured_ts == db.iso_to_epoch(clock.captured_at)
+    assert clock.updated_at == "2026-03-10T12:34:56+00:00"
+    assert clock.date == "2026-03-10"
+
+    record = PostRecord.from_illust("main", ILLUST)
+    assert clock.is_within_days(record.create_ts, 10)
+    assert not clock.is_within_days(record.create_ts, 9)
+
+    conn = db.connect_db(str(tmp_path / "test.db"))
+    db.init_db(conn)
+    db.upsert_posts(conn, [record.db_row(clock.updated_at)])
+    batched = dict(conn.execute("SELECT * FROM posts").fetchone())
+    db.upsert_post(
+        conn,
+        {
+            "account_id": "main",
+            "illust_id": 123,
+            "create_date": record.create_date,
+            "tags_json": record.tags_json,
+            "type": "illust",
+            "page_count": 2,
+            "x_restrict": 0,
+            "title": "t",
+        },
+    )
+    single = dict(conn.execute("SELECT * FROM posts").fetchone())
+    assert {k: v for k, v in batched.items() if k != "updated_at"} == {
+        k: v for k, v in single.items() if k != "updated_at"
+    }
+    conn.close()
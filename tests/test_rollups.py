@@ -0,0 +1,80 @@
+from datetime import timedelta
+
+from src.analytics.rollups import refresh_daily_performance
+
+
+def _snapshot(w, illust_id: int, captured: timedelta, bookmarks: int, views: int, mode: str = "daily") -> None:
+    w.snapshot(illust_id, captured, bookmarks, mode, like_count=bookmarks // 2, view_count=views)
+
+
+def _performance(conn) -> dict:
+    rows = conn.execute(
+        "SELECT date, bookmarks_gained, views_gained, active_posts FROM account_daily_performance"
+    ).fetchall()
+    return {r["date"]: tuple(r)[1:] for r in rows}
+
+
+def test_daily_performance_is_incremental(snapshot_db):
+    w = snapshot_db()
+    conn = w.conn
+
+    # New post: its first snapshot counts from zero.
+    w.post(1)
+    _snapshot(w, 1, timedelta(hours=2), 10, 100)
+    _snapshot(w, 1, timedelta(days=1, hours=2), 30, 300)
+    # Same minute from a manual run collapses onto one sample.
+    _snapshot(w, 1, timedelta(days=1, hours=2), 31, 301, mode="manual")
+    # Old post first seen long after publication: baseline only.
+    w.post(2, created=-timedelta(days=200))
+    _snapshot(w, 2, timedelta(hours=3), 5000, 90000)
+
+    assert refresh_daily_performance(conn, "main") == 4
+    assert _performance(conn) == {
+        "2026-03-01": (10, 100, 1),
+        "2026-03-02": (21, 201, 1),
+    }
+
+    # Second run only reads newer snapshots but still diffs against older ones.
+    _snapshot(w, 1, timedelta(days=1, hours=20), 40, 350)
+    _snapshot(w, 2, timedelta(days=1, hours=3), 5004, 90100)
+    assert refresh_daily_performance(conn, "main") == 2
+    assert refresh_daily_performance(conn, "main") == 0
+    assert _performance(conn) == {
+        "2026-03-01": (10, 100, 1),
+        "2026-03-02": (34, 350, 2),
+    }
+
+
+def test_rows_older_than_the_last_refresh_are_rolled_up(snapshot_db):
+    # A late shard or a buffered watch flush appends rows whose captured_ts
+    # predates snapshots already rolled up.
+    w = snapshot_db()
+    conn = w.conn
+    w.post(1)
+    w.post(2)
+    _snapshot(w, 1, timedelta(hours=1), 10, 100)
+    _snapshot(w, 1, timedelta(days=2, hours=1), 30, 300)
+    assert refresh_daily_performance(conn, "main") == 2
+
+    _snapshot(w, 2, timedelta(hours=1), 5, 50)
+    _snapshot(w, 2, timedelta(days=1, hours=1), 8, 80)
+    # Lands between post 1's two rolled-up snapshots: both pairs change.
+    _snapshot(w, 1, timedelta(days=1, hours=1), 25, 250)
+    assert refresh_daily_performance(conn, "main") == 3
+    assert refresh_daily_performance(conn, "main") == 0
+
+    deltas = conn.execute(
+        "SELECT illust_id, date, bookmarks_gained FROM post_daily_delta ORDER BY illust_id, date"
+    ).fetchall()
+    assert [tuple(r) for r in deltas] == [
+        (1, "2026-03-01", 10),
+        (1, "2026-03-02", 15),
+        (1, "2026-03-03", 5),
+        (2, "2026-03-01", 5),
+        (2, "2026-03-02", 3),
+    ]
+    assert _performance(conn) == {
+        "2026-03-01": (15, 150, 2),
+        "2026-03-02": (18, 180, 2),
+        "2026-03-03": (5, 50, 1),
+    }
@@ -0,0 +1,57 @@
+import numpy as np
+
+from src.analytics.store import MISSING, SnapshotStore, load_snapshot_store
+
+
+def _store(snapshot_db) -> SnapshotStore:
+    w = snapshot_db()
+    w.post(20, "manga")
+    w.post(10, "illust")
+    w.post(30, "illust")  # no snapshots: not in the store
+    for hours, value in [(1, 5), (24, 20), (48, None)]:
+        w.snapshot(10, hours, value)
+    w.snapshot(10, 24, 21, mode="manual")
+    w.snapshot(20, 20, 7)
+    w.snapshot(20, 30, 9)
+    store = load_snapshot_store(w.conn, "main")
+    w.conn.close()
+    return store
+
+
+def test_store_is_csr_deduplicated_and_typed(snapshot_db):
+    store = _store(snapshot_db)
+    assert store.post_ids.tolist() == [10, 20]
+    assert store.offsets.tolist() == [0, 3, 5]
+    assert store.post_types().tolist() == ["illust", "manga"]
+    assert store.captured_ts.dtype == np.int64
+    assert store.counters["bookmark_count"].dtype == np.int32
+    # The same-minute manual row wins; NULL becomes the sentinel.
+    assert store.counters["bookmark_count"].tolist() == [5, 21, MISSING, 7, 9]
+    assert store.elapsed_hours().tolist() == [1, 24, 48, 20, 30]
+
+    ts, values = store.series(20)
+    assert values.tolist() == [7, 9]
+    assert np.shares_memory(values, store.counters["bookmark_count"])
+    assert store.series(99)[1].size == 0
+
+
+def test_store_curves_nearest_and_mmap_roundtrip(snapshot_db, tmp_path):
+    store = _store(snapshot_db)
+    curves = store.curves_on_grid("bookmark_count", np.array([1.0, 12.5, 25.0]))
+    assert curves[0, :2].tolist() == [5.0, 13.0]
+    assert np.isnan(curves[0, 2])
+    assert np.isnan(curves[1, 0]) and curves[1, 2] == 8.0
+
+    # Post 20 is 5h from 25h on both sides; the later snapshot wins the tie.
+    rows, elapsed = store.nearest_at("bookmark_count", 25.0, 6.0)
+    assert rows.tolist() == [1, 4]
+    assert elapsed.tolist() == [24.0, 30.0]
+    rows, _ = store.nearest_at("bookmark_count", 48.0, 6.0)
+    assert rows.tolist() == [-1, -1]
+
+    store.save(str(tmp_path / "cache"))
+    mapped = SnapshotStore.load(str(tmp_path / "cache"))
+    assert isinstance(mapped.captured_ts, np.memmap)
+    assert mapped.type_names == store.type_names
+    assert mapped.counters["bookmark_count"].tolist() == store.counters["bookmark_count"].tolist()
+    assert mapped.series(10)[1].tolist() == [5, 21, MISSING]
@@ -0,0 +1,141 @@
+import gzip
+import json
+import sys
+
+from src import db
+from ui.api import ResponseCache, handle_request
+
+
+def _setup_db(db_path, n_posts=30):
+    conn = db.connect_db(db_path)
+    db.init_db(conn)
+    db.upsert_account(conn, "main", 123)
+    db.upsert_account_daily(conn, "main", "2026-02-06", 100, 30, "2026-02-06T00:00:00+00:00")
+    for i in range(n_posts):
+        db.upsert_post(
+            conn,
+            {
+                "account_id": "main",
+                "illust_id": 100 + i,
+                "create_date": f"2026-02-{1 + i % 28:02d}T00:00:00+00:00",
+                "tags_json": "[]",
+                "type": "illust",
+                "title": f"title {i}",
+            },
+        )
+        db.insert_snapshot(
+            conn,
+            {
+                "account_id": "main",
+                "illust_id": 100 + i,
+                "captured_at": f"2026-02-{1 + i % 28:02d}T01:00:00+00:00",
+                "bookmark_count": i,
+                "like_count": i,
+                "view_count": 10 * i,
+                "comment_count": 0,
+                "source_mode": "daily",
+            },
+        )
+    db.commit(conn)
+    return conn
+
+
+def test_api_serves_json_with_etag_cache_and_gzip(tmp_path):
+    db_path = str(tmp_path / "api.db")
+    conn = _setup_db(db_path)
+    cache = ResponseCache(max_entries=8)
+
+    status, headers, body = handle_request(db_path, "/posts?account_id=main&page_size=10", {}, cache)
+    assert status == 200
+    payload = json.loads(body)
+    assert len(payload["rows"]) == 10
+    assert payload["next_after"] == [int(v) for v in headers["X-Next-After"].split(",")]
+
+    status, _, body = handle_request(
+        db_path,
+        f"/posts?account_id=main&page_size=10&after_ts={payload['next_after'][0]}&after_id={payload['next_after'][1]}",
+        {},
+        cache,
+    )
+    assert status == 200
+    assert json.loads(body)["rows"][0]["illust_id"] not in {r["illust_id"] for r in payload["rows"]}
+
+    status, _, _ = handle_request(
+        db_path, "/posts?account_id=main&page_size=10", {"If-None-Match": headers["ETag"]}, cache
+    )
+    assert status == 304
+
+    status, gz_headers, gz_body = handle_request(
+        db_path, "/posts?page_size=10&account_id=main", {"Accept-Encoding": "gzip"}, cache
+    )
+    assert gz_headers["ETag"] == headers["ETag"]
+    assert gz_headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(gz_body)) == payload
+
+    # A new commit changes the data version, so the old ETag no longer matches.
+    db.upsert_account_daily(conn, "main", "2026-02-07", 101, 30, "2026-02-07T00:00:00+00:00")
+    db.commit(conn)
+    status, new_headers, _ = handle_request(
+        db_path, "/posts?account_id=main&page_size=10", {"If-None-Match": headers["ETag"]}, cache
+    )
+    assert status == 200
+    assert new_headers["ETag"] != headers["ETag"]
+    conn.close()
+
+
+def test_api_arrow_and_errors(tmp_path):
+    import pyarrow as pa
+
+    db_path = str(tmp_path / "api.db")
+    _setup_db(db_path).close()
+    cache = ResponseCache()
+
+    status, headers, body = handle_request(
+        db_path, "/followers?account_id=main", {"Accept": "application/vnd.apache.arrow.stream"}, cache
+    )
+    assert status == 200
+    table = pa.ipc.open_stream(body).read_all()
+    assert table.column("followers").to_pylist() == [100]
+
+    # Without illust_id, /snapshots returns the filtered posts' snapshots in bulk.
+    status, _, body = handle_request(
+        db_path, "/snapshots?account_id=main&since=2026-02-27T00:00:00%2B00:00", {}, cache
+    )
+    assert status == 200
+    assert [r["illust_id"] for r in json.loads(body)["rows"]] == [126, 127]
+    report = "/growth_report?account_id=main&horizons=1,2&metrics=bookmark_count,view_count&tolerance_hours=0.5"
+    status, _, body = handle_request(db_path, report + "&limit=2", {}, cache)
+    assert status == 200
+    rows = json.loads(body)["rows"]
+    assert [(r["illust_id"], r["bookmark_count@1h"], r["view_count@1h"], r["view_count@2h"]) for r in rows] == [
+        (127, 27, 270, None),
+        (126, 26, 260, None),
+    ]
+    assert handle_request(db_path, "/growth_report?account_id=main&metrics=title", {}, cache)[0] == 400
+    assert handle_request(db_path, "/snapshots?account_id=main&since=notadate", {}, cache)[0] == 400
+    assert handle_request(db_path, "/snapshots?illust_id=100", {}, cache)[0] == 400
+    assert handle_request(db_path, "/nope", {}, cache)[0] == 404
+    assert handle_request(db_path, "/accounts?format=xml", {}, cache)[0] == 400
+
+
+def test_api_answers_unexpected_failures(tmp_path, monkeypatch):
+    import sqlite3
+
+    from ui import api
+
+    db_path = str(tmp_path / "api.db")
+    _setup_db(db_path).close()
+    cache = ResponseCache()
+
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+    status, headers, body = handle_request(db_path, "/accounts?format=arrow", {}, cache)
+    assert (status, headers["Content-Type"]) == (406, "application/json")
+    assert "pyarrow" in json.loads(body)["error"]
+
+    def broken(db_path):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(api, "load_accounts", broken)
+    status, _, body = handle_request(db_path, "/accounts", {}, cache)
+    assert status == 500
+    assert json.loads(body) == {"error": "internal error: OperationalError"}
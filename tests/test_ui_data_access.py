@@ -1,17 +1,42 @@
 import sqlite3
+from datetime import datetime, timedelta, timezone
 
+import pandas as pd
+import pytest
+
+from src import db
+from src.analytics.cache import cache_dir_for, refresh_snapshot_cache
+from src.analytics.ranking import refresh_rankings
 from ui.data_access import (
+    _connect,
+    _snapshot_query,
+    has_required_columns,
     has_required_tables,
     load_accounts,
+    load_daily_performance,
     load_follower_daily,
     load_growth_benchmark,
+    load_growth_report,
+    load_horizon_percentiles,
+    load_metric_distributions,
     load_post_snapshots,
+    load_posts_page,
     load_posts_with_latest_snapshot,
+    load_elapsed_curves,
+    iter_snapshot_chunks,
+    load_snapshots,
+    load_snapshots_for_posts,
+    page_cursor,
+    resolve_read_path,
+    search_posts,
 )
+from ui import profiling
+from ui.transform import align_elapsed_curves, elapsed_hours_grid, to_elapsed_hours_curve
 
 
 def _setup_db(db_path):
     conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
     conn.executescript(
         """
         CREATE TABLE accounts (
@@ -53,6 +78,8 @@ def _setup_db(db_path):
         );
         """
     )
+    # Legacy schema above is migrated (epoch columns, triggers) like a real DB.
+    db.init_db(conn)
     conn.execute(
         "INSERT INTO accounts(account_id, pixiv_user_id, updated_at) VALUES ('main', 123, '2026-02-06T00:00:00+00:00')"
     )
@@ -74,6 +101,7 @@ def test_data_access_queries(tmp_path):
     _setup_db(str(db_path))
 
     assert has_required_tables(str(db_path)) is True
+    assert has_required_columns(str(db_path)) is True
 
     accounts = load_accounts(str(db_path))
     assert len(accounts) == 1
@@ -103,3 +131,289 @@ def test_data_access_queries(tmp_path):
     )
     assert len(growth) == 1
     assert float(growth.iloc[0]["metric_per_hour_target"]) == 1.0
+
+
+def test_posts_keyset_pagination_and_search(tmp_path):
+    db_path = tmp_path / "ui.db"
+    _setup_db(str(db_path))
+    conn = sqlite3.connect(str(db_path))
+    for i in range(1, 6):
+        conn.execute(
+            "INSERT INTO posts(account_id,illust_id,create_date,tags_json,type,page_count,x_restrict,title,updated_at) VALUES ('main',?,?,'[]','illust',1,0,?,'2026-02-06T00:00:00+00:00')",
+            (100 + i, f"2026-02-0{i}T00:00:00+00:00", f"post{i}"),
+        )
+    conn.commit()
+    conn.close()
+
+    seen = []
+    cursor = None
+    while True:
+        page = load_posts_page(str(db_path), account_id="main", page_size=2, after=cursor)
+        seen.extend(int(x) for x in page["illust_id"])
+        cursor = page_cursor(page, 2)
+        if cursor is None:
+            break
+
+    assert seen == [10, 105, 104, 103, 102, 101]
+
+    found = search_posts(str(db_path), account_id="main", prefix="10")
+    assert set(int(x) for x in found["illust_id"]) == {10, 101, 102, 103, 104, 105}
+    found = search_posts(str(db_path), account_id="main", prefix="post3")
+    assert [int(x) for x in found["illust_id"]] == [103]
+    assert search_posts(str(db_path), account_id="main", prefix="%").empty
+
+
+def test_follower_daily_window_keeps_first_delta(tmp_path):
+    db_path = tmp_path / "ui.db"
+    _setup_db(str(db_path))
+    today = datetime.now(timezone.utc).date()
+    conn = sqlite3.connect(str(db_path))
+    conn.execute("DELETE FROM account_daily")
+    for offset, followers in [(10, 90), (5, 100), (2, 97), (1, 105)]:
+        conn.execute(
+            "INSERT INTO account_daily(account_id, date, followers, following, captured_at) VALUES ('main', ?, ?, 0, '2026-02-06T00:00:00+00:00')",
+            ((today - timedelta(days=offset)).isoformat(), followers),
+        )
+    conn.row_factory = sqlite3.Row
+    db.refresh_account_daily_rollup(conn, [r["date"] for r in conn.execute("SELECT date FROM account_daily")])
+    conn.commit()
+    conn.close()
+
+    full = load_follower_daily(str(db_path), "main")
+    assert list(full["followers_delta"]) == [0, 10, -3, 8]
+
+    recent = load_follower_daily(str(db_path), "main", days=3)
+    assert list(recent["followers"]) == [97, 105]
+    assert list(recent["followers_delta"]) == [-3, 8]
+
+    total = load_follower_daily(str(db_path), "ALL", days=3)
+    assert list(total["followers_delta"]) == [-3, 8]
+    assert set(total["account_id"]) == {"ALL"}
+
+
+def test_load_snapshots_for_posts_in_one_query(tmp_path):
+    db_path = tmp_path / "ui.db"
+    _setup_db(str(db_path))
+    conn = sqlite3.connect(str(db_path))
+    conn.execute(
+        "INSERT INTO posts(account_id,illust_id,create_date,tags_json,type,page_count,x_restrict,title,updated_at) VALUES ('main',11,'2026-02-06T00:00:00+00:00','[]','illust',1,0,'t2','2026-02-06T00:00:00+00:00')"
+    )
+    for hour, bookmarks in [(2, 5), (1, 3)]:
+        conn.execute(
+            "INSERT INTO post_snapshots(account_id,illust_id,captured_at,bookmark_count,bookmark_rate,like_count,view_count,comment_count,source_mode) VALUES ('main',11,?,?,NULL,0,10,0,'daily')",
+            (f"2026-02-06T0{hour}:00:00+00:00", bookmarks),
+        )
+    conn.commit()
+    conn.close()
+
+    snaps = load_snapshots_for_posts(str(db_path), [("main", 10), ("main", 11), ("main", 999)])
+
+    assert [int(x) for x in snaps["illust_id"]] == [10, 11, 11]
+    assert [int(x) for x in snaps["bookmark_count"]] == [1, 3, 5]
+    assert float(snaps.iloc[1]["bookmark_rate"]) == 0.3
+    assert load_snapshots_for_posts(str(db_path), []).empty
+
+
+def test_load_elapsed_curves_matches_transform_with_and_without_cache(tmp_path):
+    db_path = tmp_path / "ui.db"
+    _setup_db(str(db_path))
+    conn = sqlite3.connect(str(db_path))
+    conn.execute(
+        "INSERT INTO post_snapshots(account_id,illust_id,captured_at,bookmark_count,bookmark_rate,like_count,view_count,comment_count,source_mode) VALUES ('main',10,'2026-02-06T05:00:00+00:00',9,NULL,2,4,4,'daily')"
+    )
+    conn.commit()
+    grid = elapsed_hours_grid(6.0, points=7)
+    posts = [("main", 10), ("main", 999)]
+    expected = align_elapsed_curves(
+        to_elapsed_hours_curve(load_snapshots_for_posts(str(db_path), posts)), "bookmark_count", grid
+    )
+
+    uncached = load_elapsed_curves(str(db_path), posts, "bookmark_count", grid)
+    refresh_snapshot_cache(conn, cache_dir_for(str(db_path)))
+    conn.close()
+    cached = load_elapsed_curves(str(db_path), posts, "bookmark_count", grid)
+
+    pd.testing.assert_frame_equal(uncached, expected)
+    pd.testing.assert_frame_equal(cached, expected)
+
+
+def test_percentiles_read_stored_distributions_or_evaluate_the_store(tmp_path):
+    db_path = tmp_path / "ui.db"
+    _setup_db(str(db_path))
+    conn = db.connect_db(str(db_path))
+    for illust_id, bookmarks in [(11, 10), (12, 30), (13, 20)]:
+        db.upsert_post(
+            conn,
+            {
+                "account_id": "main",
+                "illust_id": illust_id,
+                "create_date": "2026-02-06T00:00:00+00:00",
+                "tags_json": "[]",
+                "type": "illust",
+            },
+        )
+        db.insert_snapshot(
+            conn,
+            {
+                "account_id": "main",
+                "illust_id": illust_id,
+                "captured_at": "2026-02-07T00:00:00+00:00",
+                "bookmark_count": bookmarks,
+                "source_mode": "daily",
+            },
+        )
+    refresh_rankings(conn, "main")
+    db.commit(conn)
+    conn.close()
+
+    stored = load_metric_distributions(str(db_path), ["main"], "bookmark_count", 24.0)
+    evaluated = load_metric_distributions(str(db_path), ["main"], "bookmark_count", 24.0, tolerance_hours=6.5)
+    assert stored["main"].tolist() == evaluated["main"].tolist() == [10.0, 20.0, 30.0]
+
+    pct = load_horizon_percentiles(str(db_path), [("main", 12), ("main", 13), ("main", 10)])
+    assert list(pct.columns) == ["account_id", "illust_id", "pct_24h", "pct_168h"]
+    assert pct["pct_24h"].tolist()[:2] == [pytest.approx(500 / 6), 50.0]
+    assert pct["pct_24h"].isna().tolist() == [False, False, True]
+    assert pct["pct_168h"].isna().all()
+
+
+def test_growth_report_matches_benchmark_for_every_horizon_in_one_pass(tmp_path):
+    db_path = str(tmp_path / "ui.db")
+    _setup_db(db_path)
+    conn = db.connect_db(db_path)
+    hours = {11: [4, 8, 23, 26, 170], 12: [24], 13: [300]}
+    for illust_id, observed in hours.items():
+        db.upsert_post(
+            conn,
+            {
+                "account_id": "main",
+                "illust_id": illust_id,
+                "create_date": "2026-02-06T00:00:00+00:00",
+                "tags_json": "[]",
+                "type": "illust",
+            },
+        )
+        for h in observed:
+            db.insert_snapshot(
+                conn,
+                {
+                    "account_id": "main",
+                    "illust_id": illust_id,
+                    "captured_at": (datetime(2026, 2, 6, tzinfo=timezone.utc) + timedelta(hours=h)).isoformat(),
+                    "bookmark_count": h if illust_id == 11 else 50,
+                    "view_count": 10 * h if illust_id == 11 else None,
+                    "source_mode": "daily",
+                },
+            )
+    db.commit(conn)
+    conn.close()
+
+    metrics = ["bookmark_count", "view_count"]
+    with profiling.profiling(profiling.Profiler()) as profiler:
+        one = load_growth_report(db_path, "main", [24], metrics)
+        report = load_growth_report(db_path, "main", [6, 24, 168], metrics)
+    # Post 13 has no snapshot near any horizon; the 8h snapshot wins the 6h tie.
+    assert report["illust_id"].tolist() == [12, 11, 10]
+    assert report["bookmark_count@6h"].tolist()[1:] == [8.0, 1.0]
+    assert len(profiler.records[0].statements) == len(profiler.records[1].statements)
+    assert one["bookmark_count@24h"].tolist() == report["bookmark_count@24h"].tolist()[:2] == [50.0, 23.0]
+
+    for h in (6, 24, 168):
+        for metric in metrics:
+            bench = load_growth_benchmark(db_path, "main", float(h), metric)
+            expected = dict(zip(bench["illust_id"], bench["metric_value"].astype(float)))
+            got = report.set_index("illust_id")[f"{metric}@{h}h"].dropna().to_dict()
+            assert got == expected
+
+    interpolated = load_growth_report(db_path, "main", [6, 24, 168], ["bookmark_count"], method="interpolate")
+    assert interpolated.iloc[1, -3:].tolist()[:2] == [6.0, 24.0]
+    assert pd.isna(interpolated.iloc[1, -1])
+    with pytest.raises(ValueError):
+        load_growth_report(db_path, "main", [24], ["title"])
+
+
+def test_bulk_snapshots_filter_and_stream_whole_posts(tmp_path):
+    db_path = tmp_path / "ui.db"
+    _setup_db(str(db_path))
+    conn = sqlite3.connect(str(db_path))
+    for illust_id, post_type, day in [(11, "manga", 7), (12, "illust", 8), (13, "illust", 9)]:
+        conn.execute(
+            "INSERT INTO posts(account_id,illust_id,create_date,tags_json,type,page_count,x_restrict,title,updated_at) VALUES ('main',?,?,'[]',?,1,0,'t','2026-02-06T00:00:00+00:00')",
+            (illust_id, f"2026-02-0{day}T00:00:00+00:00", post_type),
+        )
+        for hour in range(3):
+            conn.execute(
+                "INSERT INTO post_snapshots(account_id,illust_id,captured_at,bookmark_count,bookmark_rate,like_count,view_count,comment_count,source_mode) VALUES ('main',?,?,?,NULL,0,?,0,'daily')",
+                (illust_id, f"2026-02-0{day}T0{hour + 1}:00:00+00:00", hour, 10 * hour),
+            )
+    conn.commit()
+    conn.close()
+
+    chunks = list(iter_snapshot_chunks(str(db_path), account_id="main", chunk_rows=2))
+    assert [c["illust_id"].tolist() for c in chunks] == [[10], [11, 11, 11], [12, 12, 12], [13, 13, 13]]
+    # The bookmark_rate fallback; view_count 0 stays NULL.
+    assert chunks[1]["bookmark_rate"].tolist()[1:] == [0.1, 0.1]
+    assert chunks[1]["bookmark_rate"].isna().tolist()[0]
+
+    illusts = load_snapshots(
+        str(db_path), account_id="main", post_type="illust", created_since="2026-02-07T00:00:00+00:00"
+    )
+    assert sorted(set(illusts["illust_id"])) == [12, 13]
+    assert illusts["captured_ts"].is_monotonic_increasing
+    assert load_snapshots(str(db_path), created_until="2026-02-07T00:00:00+00:00")["illust_id"].tolist() == [10]
+    assert list(load_snapshots(str(db_path), posts=[("main", 999)]).columns) == list(
+        load_snapshots(str(db_path), posts=[("main", 10)]).columns
+    )
+
+    # Filtered posts drive the join, and their snapshots stream without a sort.
+    conn = sqlite3.connect(str(db_path))
+    query, params = _snapshot_query(None, "main", "illust", "2026-02-07T00:00:00+00:00", None)
+    plan = [r[3] for r in conn.execute(f"EXPLAIN QUERY PLAN {query}", params)]
+    conn.close()
+    assert plan[0].startswith("SEARCH p ")
+    assert "idx_post_snapshots_post_ts" in plan[1]
+    assert not any("TEMP B-TREE" in step for step in plan)
+
+
+def test_ui_reads_are_read_only_and_can_use_a_replica(tmp_path):
+    db_path = tmp_path / "ui.db"
+    replica_path = tmp_path / "ui_replica.db"
+    _setup_db(str(db_path))
+
+    read_path = resolve_read_path(str(db_path), str(replica_path))
+
+    assert read_path == str(replica_path)
+    assert replica_path.exists()
+    assert len(load_accounts(read_path)) == 1
+    assert resolve_read_path(str(db_path), None) == str(db_path)
+
+    conn = _connect(str(db_path))
+    with pytest.raises(sqlite3.OperationalError):
+        conn.execute("DELETE FROM accounts")
+    conn.close()
+
+    # Collector-side profiles only tune the read connection, never unlock writes.
+    conn = _connect(str(db_path), "bulk_ingest")
+    assert conn.execute("PRAGMA mmap_size").fetchone()[0] == 0
+    with pytest.raises(sqlite3.OperationalError):
+        conn.execute("DELETE FROM accounts")
+    conn.close()
+
+
+def test_load_daily_performance_reads_rollup(tmp_path):
+    from src.analytics.rollups import refresh_daily_performance
+
+    db_path = tmp_path / "ui.db"
+    _setup_db(str(db_path))
+    conn = db.connect_db(str(db_path))
+    conn.execute(
+        "INSERT INTO post_snapshots(account_id,illust_id,captured_at,bookmark_count,bookmark_rate,like_count,view_count,comment_count,source_mode) VALUES ('main',10,'2026-02-07T01:00:00+00:00',5,NULL,3,40,4,'daily')"
+    )
+    refresh_daily_performance(conn, "main")
+    db.commit(conn)
+    conn.close()
+
+    df = load_daily_performance(str(db_path), "main")
+    assert df["date"].tolist() == ["2026-02-06", "2026-02-07"]
+    assert df["bookmarks_gained"].tolist() == [1, 4]
+    assert load_daily_performance(str(db_path), "ALL")["views_gained"].tolist() == [4, 36]
@@ -0,0 +1,72 @@
+import json
+import sqlite3
+
+import pandas as pd
+
+from ui import profiling
+from ui.profiling import Profiler, profiled
+
+
+def _db(tmp_path) -> str:
+    db_path = str(tmp_path / "p.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE t (k INTEGER PRIMARY KEY, v TEXT)")
+    conn.executemany("INSERT INTO t VALUES (?, ?)", [(i, f"v{i}") for i in range(10)])
+    conn.commit()
+    conn.close()
+    return db_path
+
+
+def _read(db_path: str, k: int) -> pd.DataFrame:
+    conn = sqlite3.connect(db_path)
+    profiling.attach(conn, db_path)
+    try:
+        return pd.read_sql_query("SELECT k, v FROM t WHERE k >= ?", conn, params=(k,))
+    finally:
+        conn.close()
+
+
+@profiled
+def load_rows(db_path: str, k: int) -> pd.DataFrame:
+    return _read(db_path, k)
+
+
+@profiled
+def load_twice(db_path: str) -> pd.DataFrame:
+    return pd.concat([load_rows(db_path, 5), _read(db_path, 8)])
+
+
+def test_profiled_records_nested_calls_and_expanded_sql(tmp_path):
+    db_path = _db(tmp_path)
+    assert len(load_rows(db_path, 0)) == 10  # no profiler: plain call
+
+    with profiling.profiling(Profiler()) as profiler:
+        load_twice(db_path)
+
+    inner, outer = profiler.records
+    assert (inner.name, inner.depth, inner.rows) == ("test_ui_profiling.load_rows", 1, 5)
+    assert (outer.name, outer.depth, outer.rows) == ("test_ui_profiling.load_twice", 0, 7)
+    assert outer.nbytes > 0
+    assert [s.sql for s in inner.statements] == ["SELECT k, v FROM t WHERE k >= 5"]
+    assert [s.sql for s in outer.statements] == ["SELECT k, v FROM t WHERE k >= 8"]
+
+    frame = profiler.frame()
+    assert frame["call"].tolist() == ["  test_ui_profiling.load_rows", "test_ui_profiling.load_twice"]
+    assert frame["queries"].tolist() == [1, 1]
+    assert profiling.current() is None
+
+
+def test_slow_calls_are_logged_with_query_plans(tmp_path, monkeypatch):
+    db_path = _db(tmp_path)
+    log_path = tmp_path / "slow.jsonl"
+    monkeypatch.setenv("UI_SLOW_QUERY_LOG", str(log_path))
+    monkeypatch.setenv("UI_SLOW_QUERY_MS", "0")
+
+    load_rows(db_path, 3)
+
+    (entry,) = [json.loads(line) for line in log_path.read_text(encoding="utf-8").splitlines()]
+    assert entry["call"] == "test_ui_profiling.load_rows"
+    assert entry["rows"] == 7
+    (statement,) = entry["statements"]
+    assert statement["sql"] == "SELECT k, v FROM t WHERE k >= 3"
+    assert any("INTEGER PRIMARY KEY" in line for line in statement["plan"])
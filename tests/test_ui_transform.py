@@ -1,6 +1,18 @@
 import pandas as pd
 
-from ui.transform import add_follower_delta, mark_follower_decrease, safe_metric_series, to_elapsed_hours_curve
+import numpy as np
+
+from ui.transform import (
+    add_follower_delta,
+    align_elapsed_curves,
+    curve_percentile_bands,
+    downsample_follower_series,
+    downsample_series,
+    lttb_indices,
+    mark_follower_decrease,
+    safe_metric_series,
+    to_elapsed_hours_curve,
+)
 
 
 def test_add_follower_delta_and_decrease_flag():
@@ -34,3 +46,63 @@ def test_elapsed_hours_curve_and_metric_series():
 
     assert list(metric["elapsed_hours"]) == [1.0, 3.0]
     assert list(metric["view_count"]) == [10, 30]
+
+
+def test_lttb_keeps_endpoints_and_budget():
+    x = np.arange(1000, dtype="float64")
+    y = np.sin(x / 50.0)
+
+    idx = lttb_indices(x, y, 100)
+
+    assert len(idx) == 100
+    assert idx[0] == 0
+    assert idx[-1] == 999
+    assert list(idx) == sorted(idx)
+
+
+def test_downsample_keeps_peaks_and_decrease_days():
+    followers = np.arange(3000) * 2
+    followers[1500] = 10_000
+    followers[2000] = followers[1999] - 50
+    df = pd.DataFrame(
+        {
+            "date": pd.date_range("2018-01-01", periods=3000, freq="D").strftime("%Y-%m-%d"),
+            "followers": followers,
+        }
+    )
+    df = mark_follower_decrease(add_follower_delta(df))
+
+    out = downsample_follower_series(df, 200)
+
+    assert len(out) <= 3 * 200
+    assert out["followers"].max() == 10_000
+    assert set(df.loc[df["is_decrease"], "date"]) <= set(out["date"])
+
+    curve = pd.DataFrame({"elapsed_hours": np.linspace(0, 500, 5000), "view_count": np.arange(5000)})
+    window = downsample_series(curve, "elapsed_hours", "view_count", 100, x_range=(0, 100))
+    assert len(window) <= 100 + 2
+    assert window["elapsed_hours"].max() <= 100
+
+
+def test_align_elapsed_curves_interpolates_on_shared_grid():
+    df = pd.DataFrame(
+        {
+            "account_id": ["main", "main", "main", "sub", "sub"],
+            "illust_id": [1, 1, 1, 2, 2],
+            "elapsed_hours": [0.0, 2.0, 4.0, 1.0, 3.0],
+            "bookmark_count": [0, 20, 40, 10, 30],
+        }
+    )
+
+    wide = align_elapsed_curves(df, "bookmark_count", np.array([0.0, 1.0, 2.0, 3.0, 4.0]))
+
+    assert list(wide.columns) == ["main/1", "sub/2"]
+    assert wide["main/1"].tolist() == [0.0, 10.0, 20.0, 30.0, 40.0]
+    assert np.isnan(wide["sub/2"].iloc[0])
+    assert wide["sub/2"].tolist()[1:4] == [10.0, 20.0, 30.0]
+    assert np.isnan(wide["sub/2"].iloc[4])
+
+    bands = curve_percentile_bands(wide)
+    assert list(bands.columns) == ["elapsed_hours", "p25", "p50", "p75", "curve_count"]
+    assert bands["p50"].iloc[2] == 20.0
+    assert bands["curve_count"].tolist() == [1, 2, 2, 2, 1]
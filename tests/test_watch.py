@@ -0,0 +1,120 @@
+from datetime import datetime, timedelta, timezone
+
+from src import db
+from src.collectors.watch import WatchQueue, next_interval, run_watch
+
+START = datetime(2026, 3, 1, 12, tzinfo=timezone.utc)
+
+
+class FakeClock:
+    def __init__(self):
+        self.ts = START.timestamp()
+
+    def now(self) -> float:
+        return self.ts
+
+    def sleep(self, seconds: float) -> None:
+        self.ts += seconds
+
+
+class FakeClient:
+    def __init__(self, clock: FakeClock):
+        self.clock = clock
+        self.published = []
+        self.polls = 0
+        self.details = []
+
+    def publish(self, illust_id: int) -> None:
+        created = datetime.fromtimestamp(self.clock.ts, timezone.utc).isoformat()
+        self.published.insert(0, {"id": illust_id, "create_date": created, "tags": [], "type": "illust"})
+
+    def latest_user_illusts(self, user_id: int):
+        self.polls += 1
+        return list(self.published)
+
+    def illust_detail(self, illust_id: int):
+        self.details.append((illust_id, self.clock.ts))
+        return {"illust": {"total_bookmarks": len(self.details), "total_view": 100}}
+
+
+def test_schedule_decays_with_post_age():
+    assert next_interval(0) == 15 * 60
+    assert next_interval(6 * 3600) == 3600
+    assert next_interval(30 * 3600) == 3 * 3600
+    assert next_interval(72 * 3600) is None
+
+    queue = WatchQueue()
+    queue.push(20.0, "snapshot", "main", 2)
+    queue.push(10.0, "snapshot", "main", 1)
+    queue.push(10.0, "poll", "main")
+    assert [queue.pop()[1:] for _ in range(3)] == [("snapshot", "main", 1), ("poll", "main", 0), ("snapshot", "main", 2)]
+
+
+def test_watch_snapshots_new_posts_densely_in_batches(tmp_path):
+    conn = db.connect_db(str(tmp_path / "test.db"))
+    db.init_db(conn)
+    db.upsert_account(conn, "main", 1)
+    clock = FakeClock()
+    client = FakeClient(clock)
+    client.publish(100)
+
+    stats = run_watch(
+        {"main": conn},
+        {"main": client},
+        {"main": 1},
+        poll_sec=300,
+        duration_sec=2 * 3600,
+        now=clock.now,
+        sleep=clock.sleep,
+        batch_rows=4,
+        flush_sec=4 * 3600,
+    )
+
+    # Every 15 minutes over two hours, starting at the first poll.
+    times = [ts for illust_id, ts in client.details if illust_id == 100]
+    assert len(times) == 8
+    assert {b - a for a, b in zip(times, times[1:])} == {15 * 60.0}
+    assert stats["polls"] == client.polls == 24
+    assert stats["new_posts"] == 1
+    assert stats["flushes"] == 2
+
+    rows = conn.execute("SELECT source_mode, COUNT(*) FROM post_snapshots GROUP BY source_mode").fetchall()
+    assert [tuple(r) for r in rows] == [("watch", 8)]
+    assert conn.execute("SELECT COUNT(*) FROM posts").fetchone()[0] == 1
+    conn.close()
+
+
+def test_watch_picks_up_posts_published_later_and_resumes_from_db(tmp_path):
+    db_path = str(tmp_path / "test.db")
+    conn = db.connect_db(db_path)
+    db.init_db(conn)
+    db.upsert_account(conn, "main", 1)
+    clock = FakeClock()
+    client = FakeClient(clock)
+
+    def watch(minutes: float) -> dict:
+        return run_watch(
+            {"main": conn},
+            {"main": client},
+            {"main": 1},
+            poll_sec=300,
+            duration_sec=minutes * 60,
+            now=clock.now,
+            sleep=clock.sleep,
+        )
+
+    watch(10)
+    client.publish(200)
+    stats = watch(20)
+    # The next poll (up to 5 minutes later) finds it and snapshots right away.
+    assert stats["new_posts"] == 1
+    assert [illust_id for illust_id, _ in client.details] == [200, 200]
+    first = client.details[0][1]
+
+    # A restarted watch resumes the post's schedule from its last snapshot
+    # instead of snapshotting it again immediately.
+    clock.sleep(60)
+    watch(15)
+    assert [ts - first for _, ts in client.details] == [0, 15 * 60, 30 * 60]
+    assert conn.execute("SELECT COUNT(*) FROM post_snapshots").fetchone()[0] == 3
+    conn.close()
@@ -0,0 +1,305 @@
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sys
+import threading
+import traceback
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, Optional
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from ui.data_access import (
+    data_version,
+    load_accounts,
+    load_follower_daily,
+    load_growth_benchmark,
+    load_growth_report,
+    load_post_snapshots,
+    load_posts_page,
+    load_snapshots,
+    page_cursor,
+)
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+JSON_MEDIA_TYPE = "application/json"
+GZIP_MIN_BYTES = 1024
+DEFAULT_CACHE_ENTRIES = 256
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _param(query: Dict[str, list], name: str, default=None, cast: Callable = str):
+    values = query.get(name)
+    if not values or values[0] == "":
+        if default is None:
+            raise ApiError(400, f"missing parameter: {name}")
+        return default
+    try:
+        return cast(values[0])
+    except ValueError as exc:
+        raise ApiError(400, f"invalid parameter: {name}") from exc
+
+
+def _after(query: Dict[str, list]) -> Optional[tuple[int, int]]:
+    # Keyset cursor from the previous page's `next_after` (create_ts, illust_id).
+    if "after_ts" not in query:
+        return None
+    return (_param(query, "after_ts", cast=int), _param(query, "after_id", cast=int))
+
+
+def _accounts(db_path: str, query: Dict[str, list]) -> tuple[pd.DataFrame, Optional[tuple]]:
+    return load_accounts(db_path), None
+
+
+def _followers(db_path: str, query: Dict[str, list]) -> tuple[pd.DataFrame, Optional[tuple]]:
+    days = _param(query, "days", default=0, cast=int)
+    return load_follower_daily(db_path, _param(query, "account_id"), days=days or None), None
+
+
+def _posts(db_path: str, query: Dict[str, list]) -> tuple[pd.DataFrame, Optional[tuple]]:
+    page_size = _param(query, "page_size", default=50, cast=int)
+    df = load_posts_page(
+        db_path,
+        _param(query, "account_id"),
+        post_type=_param(query, "post_type", default="ALL"),
+        page_size=page_size,
+        after=_after(query),
+    )
+    return df, page_cursor(df, page_size)
+
+
+def _snapshots(db_path: str, query: Dict[str, list]) -> tuple[pd.DataFrame, Optional[tuple]]:
+    account_id = _param(query, "account_id")
+    if "illust_id" in query:
+        return load_post_snapshots(db_path, account_id, _param(query, "illust_id", cast=int)), None
+    # Without illust_id: every snapshot of the account's posts matching the
+    # type / create-date filter, in one query.
+    df = load_snapshots(
+        db_path,
+        account_id=account_id,
+        post_type=_param(query, "post_type", default="ALL"),
+        created_since=_param(query, "since", default="") or None,
+        created_until=_param(query, "until", default="") or None,
+    )
+    return df, None
+
+
+def _growth(db_path: str, query: Dict[str, list]) -> tuple[pd.DataFrame, Optional[tuple]]:
+    limit = _param(query, "limit", default=300, cast=int)
+    df = load_growth_benchmark(
+        db_path,
+        _param(query, "account_id"),
+        target_hours=_param(query, "target_hours", default=24.0, cast=float),
+        metric=_param(query, "metric", default="bookmark_count"),
+        post_type=_param(query, "post_type", default="ALL"),
+        tolerance_hours=_param(query, "tolerance_hours", default=6.0, cast=float),
+        limit=limit,
+        after=_after(query),
+    )
+    return df, page_cursor(df, limit)
+
+
+def _floats(raw: str) -> list[float]:
+    return [float(v) for v in raw.split(",") if v]
+
+
+def _growth_report(db_path: str, query: Dict[str, list]) -> tuple[pd.DataFrame, Optional[tuple]]:
+    # Wide multi-horizon variant of /growth: horizons=6,24,168&metrics=bookmark_count,view_count.
+    limit = _param(query, "limit", default=300, cast=int)
+    df = load_growth_report(
+        db_path,
+        _param(query, "account_id"),
+        horizons=_param(query, "horizons", default=[24.0], cast=_floats),
+        metrics=_param(query, "metrics", default="bookmark_count").split(","),
+        post_type=_param(query, "post_type", default="ALL"),
+        tolerance_hours=_param(query, "tolerance_hours", default=6.0, cast=float),
+        method=_param(query, "method", default="nearest"),
+        limit=limit,
+        after=_after(query),
+    )
+    return df, page_cursor(df, limit)
+
+
+ROUTES = {
+    "/accounts": _accounts,
+    "/followers": _followers,
+    "/posts": _posts,
+    "/snapshots": _snapshots,
+    "/growth": _growth,
+    "/growth_report": _growth_report,
+}
+
+
+def _render_json(df: pd.DataFrame, next_after: Optional[tuple]) -> bytes:
+    # to_json maps NaN/NaT to null, which json.dumps of records would not.
+    rows = df.to_json(orient="records", date_format="iso", force_ascii=False)
+    cursor = json.dumps(list(next_after) if next_after else None)
+    return f'{{"rows":{rows},"next_after":{cursor}}}'.encode("utf-8")
+
+
+def _render_arrow(df: pd.DataFrame) -> bytes:
+    # pyarrow comes with streamlit; a bare API install may lack it.
+    try:
+        import pyarrow as pa
+    except ImportError as exc:
+        raise ApiError(406, "format=arrow needs pyarrow; use format=json") from exc
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+class ResponseCache:
+    # LRU of rendered bodies. Keys embed the DB data version, so entries for an
+    # older version simply age out instead of needing invalidation.
+    def __init__(self, max_entries: int = DEFAULT_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, tuple[bytes, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> Optional[tuple[bytes, dict]]:
+        with self._lock:
+            hit = self._entries.get(key)
+            if hit is not None:
+                self._entries.move_to_end(key)
+            return hit
+
+    def put(self, key: tuple, value: tuple[bytes, dict]) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _wants(header: Optional[str], token: str) -> bool:
+    return bool(header) and token in header.lower()
+
+
+def handle_request(
+    db_path: str,
+    target: str,
+    headers: Dict[str, str],
+    cache: ResponseCache,
+) -> tuple[int, dict, bytes]:
+    url = urlsplit(target)
+    route = ROUTES.get(url.path.rstrip("/") or "/")
+    if route is None:
+        return _error(404, f"unknown path: {url.path}")
+    query = parse_qs(url.query)
+
+    fmt = _param(query, "format", default="")
+    if not fmt:
+        fmt = "arrow" if _wants(headers.get("Accept"), ARROW_MEDIA_TYPE) else "json"
+    if fmt not in {"json", "arrow"}:
+        return _error(400, f"unsupported format: {fmt}")
+    encoding = "gzip" if _wants(headers.get("Accept-Encoding"), "gzip") else "identity"
+
+    version = data_version(db_path)
+    canonical = (url.path, tuple(sorted((k, tuple(v)) for k, v in query.items() if k != "format")), fmt)
+    # Weak validator: gzip and identity bodies of one result share it.
+    etag = 'W/"' + hashlib.sha1(repr((version, canonical)).encode("utf-8")).hexdigest()[:20] + '"'
+    base_headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept, Accept-Encoding"}
+
+    if etag in [t.strip() for t in headers.get("If-None-Match", "").split(",")]:
+        return 304, base_headers, b""
+
+    key = (version, canonical, encoding)
+    hit = cache.get(key)
+    if hit is None:
+        # Loaders raise ValueError on bad input (dates, metrics, ...); anything
+        # else still gets a response instead of a dropped connection.
+        try:
+            df, next_after = route(db_path, query)
+            if fmt == "arrow":
+                body, content_type = _render_arrow(df), ARROW_MEDIA_TYPE
+            else:
+                body, content_type = _render_json(df, next_after), JSON_MEDIA_TYPE
+        except ApiError as exc:
+            return _error(exc.status, str(exc))
+        except ValueError as exc:
+            return _error(400, str(exc))
+        except Exception as exc:
+            traceback.print_exc(file=sys.stderr)
+            return _error(500, f"internal error: {type(exc).__name__}")
+        extra = {"Content-Type": content_type}
+        if next_after:
+            extra["X-Next-After"] = f"{next_after[0]},{next_after[1]}"
+        if encoding == "gzip" and len(body) >= GZIP_MIN_BYTES:
+            body = gzip.compress(body, compresslevel=6)
+            extra["Content-Encoding"] = "gzip"
+        hit = (body, extra)
+        cache.put(key, hit)
+
+    body, extra = hit
+    return 200, {**base_headers, **extra}, body
+
+
+def _error(status: int, message: str) -> tuple[int, dict, bytes]:
+    body = json.dumps({"error": message}).encode("utf-8")
+    return status, {"Content-Type": JSON_MEDIA_TYPE}, body
+
+
+def make_server(db_path: str, host: str, port: int, cache_entries: int = DEFAULT_CACHE_ENTRIES) -> ThreadingHTTPServer:
+    cache = ResponseCache(cache_entries)
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            status, headers, body = handle_request(db_path, self.path, dict(self.headers), cache)
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    return server
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Read-only HTTP API over the stats DB")
+    parser.add_argument("--db-path", default=os.environ.get("UI_DB_PATH", "data/pixiv_stats.db"))
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--cache-entries", type=int, default=DEFAULT_CACHE_ENTRIES)
+    args = parser.parse_args()
+
+    if not Path(args.db_path).exists():
+        raise SystemExit(f"DB not found: {args.db_path}")
+    server = make_server(args.db_path, args.host, args.port, args.cache_entries)
+    print(f"serving {args.db_path} on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
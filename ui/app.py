@@ -10,29 +10,63 @@ ROOT = Path(__file__).resolve().parent.parent
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
+from ui import profiling
 from ui.components import (
+    render_attribution,
+    render_daily_performance,
     render_follower_charts,
     render_growth_curve,
+    render_growth_overlay,
     render_latest_posts_table,
+    render_pager,
+    render_profile_panel,
 )
 from ui.data_access import (
+    REPORT_METHODS,
+    REPORT_METRICS,
     db_exists,
+    has_required_columns,
     has_required_tables,
     load_accounts,
+    load_attribution_summary,
+    load_daily_performance,
+    load_elapsed_curves,
     load_follower_daily,
+    load_follower_events,
     load_growth_benchmark,
+    load_growth_report,
+    load_horizon_percentiles,
+    load_metric_distributions,
     load_post_snapshots,
-    load_posts_with_latest_snapshot,
+    load_posts_page,
+    load_top_attributed_posts,
+    metric_percentiles,
+    page_cursor,
+    report_column,
+    resolve_read_path,
+    search_posts,
 )
 from ui.transform import (
+    DEFAULT_CHART_WIDTH_PX,
     add_follower_delta,
+    curve_label,
+    curve_percentile_bands,
+    downsample_follower_series,
+    downsample_series,
+    elapsed_hours_grid,
     mark_follower_decrease,
     parse_tags_json,
     safe_metric_series,
     to_elapsed_hours_curve,
+    viewport_point_budget,
 )
 
 
+# Most recent posts used as the "history" behind the overlay percentile bands.
+OVERLAY_HISTORY_POSTS = 200
+# Horizons offered by the multi-horizon Growth Compare mode.
+REPORT_HORIZON_OPTIONS = [1.0, 3.0, 6.0, 12.0, 24.0, 48.0, 72.0, 168.0, 336.0, 720.0]
+
 st.set_page_config(page_title="Pixiv Analysis UI", layout="wide")
 st.title("Pixiv Account Analysis")
 
@@ -45,18 +79,63 @@ def _ui_tz() -> str:
     return os.environ.get("UI_TZ", "UTC")
 
 
+def _default_replica_path() -> str:
+    return os.environ.get("UI_REPLICA_PATH", "")
+
+
+def _default_chart_width() -> int:
+    return int(os.environ.get("UI_CHART_WIDTH_PX", DEFAULT_CHART_WIDTH_PX))
+
+
+def _default_profile() -> bool:
+    return os.environ.get("UI_PROFILE", "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+def _page_cursors(key: str, scope: tuple) -> list:
+    # Keyset cursors of the pages visited so far; reset whenever filters change.
+    if st.session_state.get(f"{key}_scope") != scope:
+        st.session_state[f"{key}_scope"] = scope
+        st.session_state[f"{key}_cursors"] = [None]
+    return st.session_state[f"{key}_cursors"]
+
+
+def _pager(key: str, cursors: list, next_cursor) -> None:
+    action = render_pager(key, page_number=len(cursors), has_next=next_cursor is not None)
+    if action < 0:
+        cursors.pop()
+        st.rerun()
+    if action > 0:
+        cursors.append(next_cursor)
+        st.rerun()
+
+
 with st.sidebar:
     st.header("Filters")
     db_path = st.text_input("DB Path", value=_default_db_path())
+    replica_path = st.text_input("Replica Path (snapshot-copy mode)", value=_default_replica_path())
+    show_profile = st.checkbox("Profile data access", value=_default_profile())
+    # Streamlit does not report the browser width; charts span the main
+    # column, so this is the width their point budget is computed for.
+    chart_width_px = st.number_input(
+        "Chart Width (px)", value=_default_chart_width(), min_value=300, max_value=7680, step=100
+    )
+
+profiler = profiling.begin(show_profile)
 
 if not db_exists(db_path):
     st.error(f"DB file not found: {db_path}")
     st.stop()
 
+db_path = resolve_read_path(db_path, replica_path.strip() or None)
+
 if not has_required_tables(db_path):
     st.error("Required tables are missing. Run collector first.")
     st.stop()
 
+if not has_required_columns(db_path):
+    st.error("DB schema is outdated (epoch columns missing). Run collector once to migrate.")
+    st.stop()
+
 accounts_df = load_accounts(db_path)
 account_options = ["ALL"] + accounts_df["account_id"].tolist()
 
@@ -65,14 +144,23 @@ with st.sidebar:
     days = st.selectbox("Date Range", options=[30, 90, 365, 9999], index=1)
 
 st.subheader("Followers")
-follower_df = load_follower_daily(db_path, selected_account)
+follower_df = load_follower_daily(
+    db_path,
+    selected_account,
+    days=None if days == 9999 else days,
+)
 follower_df = add_follower_delta(follower_df)
 follower_df = mark_follower_decrease(follower_df)
-if not follower_df.empty and days != 9999:
-    cutoff = pd.Timestamp.now(tz="UTC") - pd.Timedelta(days=days)
-    follower_df = follower_df[follower_df["date"] >= cutoff]
 
-render_follower_charts(follower_df)
+chart_max_points = viewport_point_budget(int(chart_width_px))
+follower_events = load_follower_events(
+    db_path,
+    selected_account,
+    days=None if days == 9999 else days,
+)
+if not follower_events.empty:
+    follower_events["date"] = pd.to_datetime(follower_events["date"], utc=True)
+render_follower_charts(downsample_follower_series(follower_df, chart_max_points), follower_events)
 if not follower_df.empty and (follower_df["followers"].fillna(0) == 0).all():
     st.warning(
         "followers が全日0です。pixiv APIの返却値が0の可能性があります。"
@@ -87,29 +175,75 @@ if not follower_df.empty:
     st.markdown("**Follower Decrease Days**")
     st.dataframe(decreases, width="stretch", hide_index=True)
 
+if not follower_events.empty:
+    events_display = follower_events.copy()
+    events_display["date"] = events_display["date"].dt.strftime("%Y-%m-%d")
+    st.markdown("**Follower Events** (spike / drop: robust z-score, change_up / change_down: CUSUM)")
+    st.dataframe(events_display, width="stretch", hide_index=True)
+
+st.divider()
+st.subheader("Daily Performance")
+performance_df = load_daily_performance(
+    db_path,
+    selected_account,
+    days=None if days == 9999 else days,
+)
+if not performance_df.empty:
+    performance_df["date"] = pd.to_datetime(performance_df["date"])
+    st.caption(
+        f"期間合計: bookmark +{int(performance_df['bookmarks_gained'].sum()):,} / "
+        f"like +{int(performance_df['likes_gained'].sum()):,} / "
+        f"view +{int(performance_df['views_gained'].sum()):,}"
+    )
+render_daily_performance(performance_df)
+
+st.markdown("**Follower Attribution** (top posts by attributed follower gain)")
+attribution_summary = load_attribution_summary(db_path, selected_account, days=None if days == 9999 else days)
+if attribution_summary:
+    st.caption(
+        f"フォロワー増 {attribution_summary['followers_gained'] or 0:,.0f} のうち投稿由来 "
+        f"{attribution_summary['attributed_to_posts'] or 0:,.1f} / ベースライン "
+        f"{attribution_summary['baseline'] or 0:,.1f}"
+        f"（日次ラグ付き非負回帰、平均 R² {attribution_summary['mean_r2'] or 0:.2f}）"
+    )
+render_attribution(
+    load_top_attributed_posts(db_path, selected_account, days=None if days == 9999 else days)
+)
+
 st.divider()
 st.subheader("Post Growth")
 
 with st.sidebar:
     post_type = st.selectbox("Post Type", options=["ALL", "illust", "manga", "ugoira"], index=0)
+    page_size = st.selectbox("Page Size", options=[25, 50, 100], index=1)
 
-posts_df = load_posts_with_latest_snapshot(
+posts_cursors = _page_cursors("posts", (db_path, selected_account, post_type, page_size))
+posts_df = load_posts_page(
     db_path=db_path,
     account_id=selected_account,
-    limit=300,
     post_type=post_type,
+    page_size=page_size,
+    after=posts_cursors[-1],
 )
+posts_next_cursor = page_cursor(posts_df, page_size)
 posts_df = parse_tags_json(posts_df)
 
-if posts_df.empty:
+post_query = st.text_input("Search Post (illust_id / title prefix)", value="")
+if post_query.strip():
+    picker_df = search_posts(db_path, selected_account, post_query, post_type=post_type)
+else:
+    picker_df = posts_df
+
+if picker_df.empty:
     st.info("表示できる投稿がありません。")
 else:
-    posts_df["label"] = posts_df.apply(
+    picker_df = picker_df.copy()
+    picker_df["label"] = picker_df.apply(
         lambda r: f"{r['account_id']} / {r['illust_id']} / {r['title'] or '(untitled)'}",
         axis=1,
     )
-    selected_label = st.selectbox("Post", options=posts_df["label"].tolist(), index=0)
-    selected_row = posts_df[posts_df["label"] == selected_label].iloc[0]
+    selected_label = st.selectbox("Post", options=picker_df["label"].tolist(), index=0)
+    selected_row = picker_df[picker_df["label"] == selected_label].iloc[0]
 
     metric = st.radio(
         "Metric",
@@ -124,93 +258,233 @@ else:
     )
     curve_df = to_elapsed_hours_curve(snap_df)
     metric_df = safe_metric_series(curve_df, metric)
-    render_growth_curve(metric_df, metric)
+    render_growth_curve(
+        downsample_series(metric_df, "elapsed_hours", metric, chart_max_points),
+        metric,
+    )
 
 st.divider()
-st.subheader("Growth Compare (Across Illustrations)")
+st.subheader("Growth Overlay")
 
-col1, col2, col3, col4 = st.columns(4)
-with col1:
-    benchmark_hours = st.number_input("Target Hours Since Post", value=24.0, min_value=1.0, step=1.0)
-with col2:
-    benchmark_metric = st.selectbox(
-        "Benchmark Metric",
-        options=["bookmark_count", "view_count", "like_count", "comment_count"],
-        index=0,
+overlay_labels = {}
+if not posts_df.empty:
+    overlay_labels = {
+        f"{r.account_id} / {r.illust_id} / {r.title or '(untitled)'}": (r.account_id, int(r.illust_id))
+        for r in posts_df.itertuples(index=False)
+    }
+ov_col1, ov_col2, ov_col3 = st.columns([3, 1, 1])
+with ov_col1:
+    overlay_selected = st.multiselect(
+        "Posts to Overlay",
+        options=list(overlay_labels),
+        default=list(overlay_labels)[:5],
     )
-with col3:
-    rank_by = st.selectbox(
-        "Rank By",
-        options=["metric_per_hour_target", "metric_value", "bookmark_rate", "target_diff_hours"],
+with ov_col2:
+    overlay_metric = st.selectbox(
+        "Overlay Metric",
+        options=["bookmark_count", "like_count", "view_count", "comment_count"],
         index=0,
     )
-with col4:
-    tolerance_hours = st.number_input("Tolerance (hours)", value=6.0, min_value=0.5, step=0.5)
+with ov_col3:
+    overlay_hours = st.number_input("Overlay Hours", value=168.0, min_value=6.0, step=6.0)
+show_bands = st.checkbox("Show history bands (p25/p50/p75)", value=True)
 
-growth_compare_df = load_growth_benchmark(
-    db_path=db_path,
-    account_id=selected_account,
-    target_hours=float(benchmark_hours),
-    metric=benchmark_metric,
-    post_type=post_type,
-    tolerance_hours=float(tolerance_hours),
-    limit=300,
-)
-growth_compare_df = parse_tags_json(growth_compare_df)
+overlay_posts = [overlay_labels[label] for label in overlay_selected]
+band_posts = []
+if show_bands:
+    history_df = load_posts_page(
+        db_path=db_path,
+        account_id=selected_account,
+        post_type=post_type,
+        page_size=OVERLAY_HISTORY_POSTS,
+    )
+    band_posts = list(zip(history_df["account_id"], history_df["illust_id"].astype(int)))
+
+overlay_grid = elapsed_hours_grid(float(overlay_hours))
+overlay_wide = load_elapsed_curves(db_path, overlay_posts + band_posts, overlay_metric, overlay_grid)
+overlay_cols = [c for c in (curve_label(a, i) for a, i in overlay_posts) if c in overlay_wide.columns]
+band_cols = [c for c in (curve_label(a, i) for a, i in band_posts) if c in overlay_wide.columns]
+overlay_bands = curve_percentile_bands(overlay_wide[band_cols]) if band_cols else pd.DataFrame()
+render_growth_overlay(overlay_wide[overlay_cols], overlay_bands, overlay_metric)
+
+st.divider()
+st.subheader("Growth Compare (Across Illustrations)")
+
+growth_mode = st.radio("Compare Mode", options=["Single target", "Multi-horizon"], horizontal=True)
+if growth_mode == "Multi-horizon":
+    rep_col1, rep_col2, rep_col3, rep_col4 = st.columns([2, 2, 1, 1])
+    with rep_col1:
+        report_horizons = st.multiselect(
+            "Horizons (hours)",
+            options=REPORT_HORIZON_OPTIONS,
+            default=[6.0, 24.0, 168.0],
+            format_func=lambda h: f"{h:g}h",
+        )
+    with rep_col2:
+        report_metrics = st.multiselect("Metrics", options=list(REPORT_METRICS), default=["bookmark_count"])
+    with rep_col3:
+        report_method = st.selectbox("Method", options=list(REPORT_METHODS), index=0)
+    with rep_col4:
+        report_tolerance = st.number_input(
+            "Tolerance (hours)", value=6.0, min_value=0.5, step=0.5, key="report_tolerance"
+        )
+
+    if not report_horizons or not report_metrics:
+        st.info("Horizon と Metric を1つ以上選んでください。")
+    else:
+        report_horizons = sorted(report_horizons)
+        report_cols = [report_column(m, h) for m in report_metrics for h in report_horizons]
+        report_rank_by = st.selectbox("Rank By", options=report_cols, index=0, key="report_rank_by")
+        report_cursors = _page_cursors(
+            "growth_report",
+            (
+                db_path,
+                selected_account,
+                post_type,
+                page_size,
+                tuple(report_horizons),
+                tuple(report_metrics),
+                report_method,
+                report_tolerance,
+            ),
+        )
+        # Every horizon/metric column comes from one snapshot read per page.
+        report_df = load_growth_report(
+            db_path=db_path,
+            account_id=selected_account,
+            horizons=report_horizons,
+            metrics=report_metrics,
+            post_type=post_type,
+            tolerance_hours=float(report_tolerance),
+            method=report_method,
+            limit=page_size,
+            after=report_cursors[-1],
+        )
+        report_next_cursor = page_cursor(report_df, page_size)
+        report_df = parse_tags_json(report_df)
 
-if growth_compare_df.empty:
-    st.info("比較用のスナップショットがありません。")
+        if report_df.empty:
+            st.info("比較用のスナップショットがありません。")
+        else:
+            report_df = report_df.sort_values(report_rank_by, ascending=False, na_position="last")
+            report_df[report_cols] = report_df[report_cols].round(2)
+            st.dataframe(
+                report_df[["account_id", "illust_id", "title", "tags", "type", *report_cols]],
+                width="stretch",
+                hide_index=True,
+            )
+        _pager("growth_report", report_cursors, report_next_cursor)
 else:
-    for col in [
-        "bookmark_rate",
-        "elapsed_hours",
-        "metric_per_hour_target",
-        "metric_per_hour_actual",
-        "target_diff_hours",
-        "metric_value",
-    ]:
-        if col in growth_compare_df.columns:
-            growth_compare_df[col] = pd.to_numeric(growth_compare_df[col], errors="coerce")
-    growth_compare_df = growth_compare_df.sort_values(rank_by, ascending=False, na_position="last")
-    growth_compare_df["bookmark_rate"] = (growth_compare_df["bookmark_rate"] * 100.0).round(2)
-    growth_compare_df["elapsed_hours"] = growth_compare_df["elapsed_hours"].round(2)
-    growth_compare_df["metric_per_hour_target"] = growth_compare_df["metric_per_hour_target"].round(2)
-    growth_compare_df["metric_per_hour_actual"] = growth_compare_df["metric_per_hour_actual"].round(2)
-    growth_compare_df["target_diff_hours"] = growth_compare_df["target_diff_hours"].round(2)
-    growth_compare_df["metric_value"] = growth_compare_df["metric_value"].round(2)
-    show_cols = [
-        "account_id",
-        "illust_id",
-        "title",
-        "tags",
-        "type",
-        "elapsed_hours",
-        "target_diff_hours",
-        "metric_value",
-        "metric_per_hour_target",
-        "metric_per_hour_actual",
-        "bookmark_rate",
-        "bookmark_count",
-        "view_count",
-        "captured_at",
-    ]
-    st.dataframe(
-        growth_compare_df[show_cols].rename(
-            columns={
-                "bookmark_rate": "bookmark_rate(%)",
-                "metric_per_hour_target": f"{benchmark_metric}/h@{benchmark_hours:.0f}h",
-                "metric_per_hour_actual": f"{benchmark_metric}/h(actual)",
-            }
-        ),
-        width="stretch",
-        hide_index=True,
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        benchmark_hours = st.number_input("Target Hours Since Post", value=24.0, min_value=1.0, step=1.0)
+    with col2:
+        benchmark_metric = st.selectbox(
+            "Benchmark Metric",
+            options=["bookmark_count", "view_count", "like_count", "comment_count"],
+            index=0,
+        )
+    with col3:
+        rank_by = st.selectbox(
+            "Rank By",
+            options=["metric_per_hour_target", "metric_value", "percentile", "bookmark_rate", "target_diff_hours"],
+            index=0,
+        )
+    with col4:
+        tolerance_hours = st.number_input("Tolerance (hours)", value=6.0, min_value=0.5, step=0.5)
+
+    growth_cursors = _page_cursors(
+        "growth",
+        (db_path, selected_account, post_type, page_size, benchmark_hours, benchmark_metric, tolerance_hours),
+    )
+    growth_compare_df = load_growth_benchmark(
+        db_path=db_path,
+        account_id=selected_account,
+        target_hours=float(benchmark_hours),
+        metric=benchmark_metric,
+        post_type=post_type,
+        tolerance_hours=float(tolerance_hours),
+        limit=page_size,
+        after=growth_cursors[-1],
     )
+    growth_next_cursor = page_cursor(growth_compare_df, page_size)
+    growth_compare_df = parse_tags_json(growth_compare_df)
+
+    if growth_compare_df.empty:
+        st.info("比較用のスナップショットがありません。")
+    else:
+        for col in [
+            "bookmark_rate",
+            "elapsed_hours",
+            "metric_per_hour_target",
+            "metric_per_hour_actual",
+            "target_diff_hours",
+            "metric_value",
+        ]:
+            if col in growth_compare_df.columns:
+                growth_compare_df[col] = pd.to_numeric(growth_compare_df[col], errors="coerce")
+        benchmark_distributions = load_metric_distributions(
+            db_path,
+            growth_compare_df["account_id"].unique().tolist(),
+            benchmark_metric,
+            float(benchmark_hours),
+            post_type=post_type,
+            tolerance_hours=float(tolerance_hours),
+        )
+        growth_compare_df["percentile"] = metric_percentiles(
+            benchmark_distributions, growth_compare_df["account_id"], growth_compare_df["metric_value"]
+        ).round(1)
+        growth_compare_df = growth_compare_df.sort_values(rank_by, ascending=False, na_position="last")
+        growth_compare_df["bookmark_rate"] = (growth_compare_df["bookmark_rate"] * 100.0).round(2)
+        growth_compare_df["elapsed_hours"] = growth_compare_df["elapsed_hours"].round(2)
+        growth_compare_df["metric_per_hour_target"] = growth_compare_df["metric_per_hour_target"].round(2)
+        growth_compare_df["metric_per_hour_actual"] = growth_compare_df["metric_per_hour_actual"].round(2)
+        growth_compare_df["target_diff_hours"] = growth_compare_df["target_diff_hours"].round(2)
+        growth_compare_df["metric_value"] = growth_compare_df["metric_value"].round(2)
+        show_cols = [
+            "account_id",
+            "illust_id",
+            "title",
+            "tags",
+            "type",
+            "elapsed_hours",
+            "target_diff_hours",
+            "metric_value",
+            "percentile",
+            "metric_per_hour_target",
+            "metric_per_hour_actual",
+            "bookmark_rate",
+            "bookmark_count",
+            "view_count",
+            "captured_at",
+        ]
+        st.dataframe(
+            growth_compare_df[show_cols].rename(
+                columns={
+                    "bookmark_rate": "bookmark_rate(%)",
+                    "percentile": f"{benchmark_metric} pct@{benchmark_hours:.0f}h",
+                    "metric_per_hour_target": f"{benchmark_metric}/h@{benchmark_hours:.0f}h",
+                    "metric_per_hour_actual": f"{benchmark_metric}/h(actual)",
+                }
+            ),
+            width="stretch",
+            hide_index=True,
+        )
+    _pager("growth", growth_cursors, growth_next_cursor)
 
 st.divider()
 st.subheader("Latest Posts")
 
 latest_display = posts_df.copy() if not posts_df.empty else pd.DataFrame()
 if not latest_display.empty:
+    latest_percentiles = load_horizon_percentiles(
+        db_path,
+        list(zip(latest_display["account_id"], latest_display["illust_id"].astype(int))),
+        metric="bookmark_count",
+        horizons=(24.0, 168.0),
+        post_type=post_type,
+    )
+    latest_display = latest_display.merge(latest_percentiles, on=["account_id", "illust_id"], how="left")
     show_cols = [
         "account_id",
         "illust_id",
@@ -226,8 +500,28 @@ if not latest_display.empty:
         "comment_count",
         "captured_at",
         "source_mode",
+        "forecast_value",
+        "forecast_lower",
+        "forecast_upper",
+        "forecast_baseline",
+        "pct_24h",
+        "pct_168h",
     ]
     latest_display = latest_display[show_cols]
+    for col in ["forecast_value", "forecast_lower", "forecast_upper", "forecast_baseline"]:
+        latest_display[col] = pd.to_numeric(latest_display[col], errors="coerce").round(0)
+    for col in ["pct_24h", "pct_168h"]:
+        latest_display[col] = pd.to_numeric(latest_display[col], errors="coerce").round(1)
+    latest_display = latest_display.rename(
+        columns={
+            "forecast_value": "bookmark@7d(forecast)",
+            "forecast_lower": "forecast_low",
+            "forecast_upper": "forecast_high",
+            "forecast_baseline": "bookmark@7d(typical)",
+            "pct_24h": "bookmark pct@24h",
+            "pct_168h": "bookmark pct@7d",
+        }
+    )
     latest_display["create_date"] = (
         pd.to_datetime(latest_display["create_date"], utc=True, errors="coerce")
         .dt.tz_convert(_ui_tz())
@@ -241,3 +535,7 @@ if not latest_display.empty:
     latest_display["bookmark_rate"] = (pd.to_numeric(latest_display["bookmark_rate"], errors="coerce") * 100.0).round(2)
 
 render_latest_posts_table(latest_display)
+_pager("posts", posts_cursors, posts_next_cursor)
+
+if profiler is not None:
+    render_profile_panel(profiler.frame(), profiler.slow_ms)
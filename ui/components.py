@@ -1,9 +1,19 @@
+from typing import Optional
+
 import altair as alt
 import pandas as pd
 import streamlit as st
 
 
-def render_follower_charts(df: pd.DataFrame) -> None:
+EVENT_COLORS = {
+    "spike": "#2b7a4b",
+    "drop": "#c83f3f",
+    "change_up": "#1f77b4",
+    "change_down": "#ff7f0e",
+}
+
+
+def render_follower_charts(df: pd.DataFrame, events: Optional[pd.DataFrame] = None) -> None:
     if df.empty:
         st.info("フォロワー日次データがありません。")
         return
@@ -18,6 +28,21 @@ def render_follower_charts(df: pd.DataFrame) -> None:
         )
         .properties(height=260)
     )
+    if events is not None and not events.empty:
+        rules = (
+            alt.Chart(events)
+            .mark_rule(strokeDash=[4, 3])
+            .encode(
+                x="date:T",
+                color=alt.Color(
+                    "kind:N",
+                    title="Event",
+                    scale=alt.Scale(domain=list(EVENT_COLORS), range=list(EVENT_COLORS.values())),
+                ),
+                tooltip=["date:T", "account_id:N", "kind:N", "delta:Q", "score:Q"],
+            )
+        )
+        line = alt.layer(line, rules)
 
     bars = (
         alt.Chart(df)
@@ -39,6 +64,63 @@ def render_follower_charts(df: pd.DataFrame) -> None:
     st.altair_chart(bars, width="stretch")
 
 
+def render_daily_performance(df: pd.DataFrame) -> None:
+    if df.empty:
+        st.info("日次パフォーマンスの集計がありません。収集を一度実行してください。")
+        return
+
+    long_df = df.melt(
+        id_vars=["date", "active_posts"],
+        value_vars=["bookmarks_gained", "likes_gained"],
+        var_name="metric",
+        value_name="gained",
+    )
+    bars = (
+        alt.Chart(long_df)
+        .mark_bar()
+        .encode(
+            x=alt.X("date:T", title="Date"),
+            y=alt.Y("gained:Q", title="Gained / Day"),
+            color=alt.Color("metric:N", title="Metric"),
+            xOffset="metric:N",
+            tooltip=["date:T", "metric:N", "gained:Q", "active_posts:Q"],
+        )
+        .properties(height=220)
+    )
+    views = (
+        alt.Chart(df)
+        .mark_line(point=True, color="#6a5acd")
+        .encode(
+            x=alt.X("date:T", title="Date"),
+            y=alt.Y("views_gained:Q", title="Views Gained / Day"),
+            tooltip=["date:T", "views_gained:Q", "active_posts:Q"],
+        )
+        .properties(height=180)
+    )
+    st.altair_chart(bars, width="stretch")
+    st.altair_chart(views, width="stretch")
+
+
+def render_attribution(df: pd.DataFrame) -> None:
+    if df.empty:
+        st.info("フォロワー増加の投稿別寄与がまだ計算されていません。")
+        return
+
+    chart_df = df.assign(label=df["illust_id"].astype(str) + " " + df["title"].fillna("").str.slice(0, 20))
+    bars = (
+        alt.Chart(chart_df)
+        .mark_bar()
+        .encode(
+            x=alt.X("attributed_followers:Q", title="Attributed Followers"),
+            y=alt.Y("label:N", title=None, sort="-x"),
+            tooltip=["account_id:N", "illust_id:Q", "title:N", "attributed_followers:Q", "bookmarks_gained:Q"],
+        )
+        .properties(height=max(120, 28 * len(chart_df)))
+    )
+    st.altair_chart(bars, width="stretch")
+    st.dataframe(df, width="stretch", hide_index=True)
+
+
 def render_growth_curve(df_metric: pd.DataFrame, metric_name: str) -> None:
     if df_metric.empty:
         st.info("選択投稿のスナップショットが不足しています。")
@@ -57,8 +139,84 @@ def render_growth_curve(df_metric: pd.DataFrame, metric_name: str) -> None:
     st.altair_chart(chart, width="stretch")
 
 
+def render_growth_overlay(wide: pd.DataFrame, bands: pd.DataFrame, metric_name: str) -> None:
+    if wide.shape[1] == 0 and bands.empty:
+        st.info("重ねて表示できるスナップショットがありません。")
+        return
+
+    layers = []
+    if not bands.empty:
+        band_area = (
+            alt.Chart(bands)
+            .mark_area(opacity=0.2, color="#888888")
+            .encode(
+                x=alt.X("elapsed_hours:Q", title="Hours Since Post"),
+                y=alt.Y("p25:Q", title=metric_name),
+                y2="p75:Q",
+                tooltip=["elapsed_hours:Q", "p25:Q", "p50:Q", "p75:Q", "curve_count:Q"],
+            )
+        )
+        median = (
+            alt.Chart(bands)
+            .mark_line(strokeDash=[4, 3], color="#555555")
+            .encode(x="elapsed_hours:Q", y="p50:Q")
+        )
+        layers += [band_area, median]
+
+    if wide.shape[1] > 0:
+        long_df = (
+            wide.reset_index()
+            .melt(id_vars="elapsed_hours", var_name="post", value_name=metric_name)
+            .dropna(subset=[metric_name])
+        )
+        lines = (
+            alt.Chart(long_df)
+            .mark_line()
+            .encode(
+                x=alt.X("elapsed_hours:Q", title="Hours Since Post"),
+                y=alt.Y(f"{metric_name}:Q", title=metric_name),
+                color=alt.Color("post:N", title="Post"),
+                tooltip=["post:N", "elapsed_hours:Q", f"{metric_name}:Q"],
+            )
+        )
+        layers.append(lines)
+
+    st.altair_chart(alt.layer(*layers).properties(height=320), width="stretch")
+
+
 def render_latest_posts_table(df: pd.DataFrame) -> None:
     if df.empty:
         st.info("投稿データがありません。")
         return
     st.dataframe(df, width="stretch", hide_index=True)
+
+
+def render_pager(key: str, page_number: int, has_next: bool) -> int:
+    prev_col, info_col, next_col = st.columns([1, 2, 1])
+    with prev_col:
+        go_prev = st.button("← Newer", key=f"{key}_prev", disabled=page_number <= 1)
+    with info_col:
+        st.caption(f"Page {page_number}")
+    with next_col:
+        go_next = st.button("Older →", key=f"{key}_next", disabled=not has_next)
+    if go_prev:
+        return -1
+    if go_next:
+        return 1
+    return 0
+
+
+def render_profile_panel(df: pd.DataFrame, slow_ms: float) -> None:
+    with st.sidebar.expander("Profile (this rerun)", expanded=True):
+        if df.empty:
+            st.caption("計測された呼び出しがありません。")
+            return
+        top_level = ~df["call"].str.startswith(" ")
+        slow = int((df["ms"] >= slow_ms).sum())
+        st.caption(
+            f"data access / transform 合計 {df.loc[top_level, 'ms'].sum():,.0f} ms"
+            f"（SQL {int(df['queries'].sum())} 本、{slow_ms:.0f} ms 以上 {slow} 件）"
+        )
+        display = df.copy()
+        display["kb"] = (pd.to_numeric(display.pop("bytes"), errors="coerce") / 1024).round(1)
+        st.dataframe(display.round({"ms": 1, "sql_ms": 1}), width="stretch", hide_index=True)
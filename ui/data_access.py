@@ -1,15 +1,43 @@
+import json
+import os
 import sqlite3
+from datetime import datetime, time, timedelta, timezone
 from pathlib import Path
+from typing import Iterator, Optional, Sequence
 
+import numpy as np
 import pandas as pd
 
+from src.analytics.cache import cache_dir_for, open_snapshot_store
+from src.analytics.curves import values_at_horizons
+from src.analytics.forecast import ALL_TYPES
+from src.analytics.ranking import HORIZONS, TOLERANCE_HOURS, decode_distribution, horizon_values, percentile_of
+from src.db import apply_profile, iso_to_epoch, publish_replica, replica_is_stale
+from ui.profiling import attach, profiled
+from ui.transform import curve_label
+
 
 REQUIRED_TABLES = {"accounts", "posts", "post_snapshots", "account_daily"}
 
+# Epoch-second columns added by src.db.init_db; older DBs need one collector run.
+REQUIRED_COLUMNS = {
+    "posts": {"create_ts"},
+    "post_snapshots": {"captured_ts"},
+    "account_daily": {"date_ts"},
+}
+
+# Keyset pagination cursor: (create_ts, illust_id) of the last row on a page.
+PageCursor = tuple[int, int]
 
-def _connect(db_path: str) -> sqlite3.Connection:
-    conn = sqlite3.connect(db_path)
+
+def _connect(db_path: str, profile: Optional[str] = None) -> sqlite3.Connection:
+    # Read-only URI open: the UI can never take a write lock, and under WAL it
+    # keeps reading the last committed state while the collector writes.
+    conn = sqlite3.connect(f"{Path(db_path).resolve().as_uri()}?mode=ro", uri=True)
     conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA query_only = ON")
+    apply_profile(conn, profile or os.environ.get("UI_DB_PROFILE", "interactive_read"))
+    attach(conn, db_path)
     return conn
 
 
@@ -17,11 +45,38 @@ def db_exists(db_path: str) -> bool:
     return Path(db_path).exists()
 
 
+def data_version(db_path: str) -> str:
+    # Changes on every commit (the main file or its WAL is rewritten), so it can
+    # key response caches and ETags without opening the DB.
+    parts = []
+    for path in (Path(db_path), Path(f"{db_path}-wal")):
+        if path.exists():
+            stat = path.stat()
+            parts.append(f"{stat.st_mtime_ns}:{stat.st_size}")
+    return "-".join(parts)
+
+
+@profiled
+def resolve_read_path(db_path: str, replica_path: Optional[str] = None) -> str:
+    # Snapshot-copy mode: serve reads from a replica rebuilt (atomically, via the
+    # backup API) whenever the source DB has changed since the last copy.
+    if not replica_path:
+        return db_path
+    if replica_is_stale(db_path, replica_path):
+        conn = _connect(db_path)
+        try:
+            publish_replica(conn, replica_path)
+        finally:
+            conn.close()
+    return replica_path
+
+
+@profiled
 def has_required_tables(db_path: str) -> bool:
     conn = _connect(db_path)
     try:
         rows = conn.execute(
-            "SELECT name FROM sqlite_master WHERE type='table'"
+            "SELECT name FROM sqlite_master WHERE type IN ('table', 'view')"
         ).fetchall()
         names = {r["name"] for r in rows}
         return REQUIRED_TABLES.issubset(names)
@@ -29,6 +84,20 @@ def has_required_tables(db_path: str) -> bool:
         conn.close()
 
 
+@profiled
+def has_required_columns(db_path: str) -> bool:
+    conn = _connect(db_path)
+    try:
+        for table, columns in REQUIRED_COLUMNS.items():
+            names = {r["name"] for r in conn.execute(f"PRAGMA table_info({table})").fetchall()}
+            if not columns.issubset(names):
+                return False
+        return True
+    finally:
+        conn.close()
+
+
+@profiled
 def load_accounts(db_path: str) -> pd.DataFrame:
     conn = _connect(db_path)
     try:
@@ -40,80 +109,390 @@ def load_accounts(db_path: str) -> pd.DataFrame:
         conn.close()
 
 
-def load_follower_daily(db_path: str, account_id: str) -> pd.DataFrame:
+def _has_table(conn: sqlite3.Connection, name: str) -> bool:
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name = ?",
+        (name,),
+    ).fetchone()
+    return row is not None
+
+
+def follower_since_date(days: int, now: Optional[datetime] = None) -> str:
+    # First calendar date whose midnight (UTC) falls inside the last `days` days.
+    now = now or datetime.now(timezone.utc)
+    cutoff = now - timedelta(days=days)
+    first = cutoff.date()
+    if cutoff.timetz() != time(0, tzinfo=cutoff.tzinfo):
+        first += timedelta(days=1)
+    return first.isoformat()
+
+
+@profiled
+def load_follower_daily(
+    db_path: str,
+    account_id: str,
+    days: Optional[int] = None,
+) -> pd.DataFrame:
     conn = _connect(db_path)
     try:
         if account_id == "ALL":
-            query = """
-            SELECT
-                date,
-                SUM(COALESCE(followers, 0)) AS followers,
-                SUM(COALESCE(following, 0)) AS following,
-                MAX(captured_at) AS captured_at,
-                'ALL' AS account_id
+            if _has_table(conn, "account_daily_rollup"):
+                source_sql = """
+                SELECT date, date_ts, followers, following, captured_at
+                FROM account_daily_rollup
+                """
+            else:
+                source_sql = """
+                SELECT
+                    date,
+                    MAX(date_ts) AS date_ts,
+                    SUM(COALESCE(followers, 0)) AS followers,
+                    SUM(COALESCE(following, 0)) AS following,
+                    MAX(captured_at) AS captured_at
+                FROM account_daily
+                GROUP BY date
+                """
+            source_params: list = []
+            account_sql = "'ALL'"
+        else:
+            source_sql = """
+            SELECT date, date_ts, followers, following, captured_at
             FROM account_daily
-            GROUP BY date
-            ORDER BY date
+            WHERE account_id = ?
             """
-            return pd.read_sql_query(query, conn)
+            source_params = [account_id]
+            account_sql = "?"
 
-        return pd.read_sql_query(
+        window_sql = ""
+        window_params: list = []
+        since_ts = None
+        if days is not None:
+            since_ts = iso_to_epoch(follower_since_date(days))
+            # One extra row before the window so the first delta is still exact.
+            window_sql = """
+            WHERE date_ts >= COALESCE(
+                (SELECT MAX(prev.date_ts) FROM source prev WHERE prev.date_ts < ?),
+                ?
+            )
             """
-            SELECT account_id, date, followers, following, captured_at
-            FROM account_daily
-            WHERE account_id = ?
-            ORDER BY date
+            window_params = [since_ts, since_ts]
+
+        query = f"""
+        WITH source AS ({source_sql}),
+        windowed AS (
+            SELECT
+                date,
+                date_ts,
+                followers,
+                following,
+                captured_at,
+                followers - LAG(followers) OVER (ORDER BY date_ts) AS followers_delta
+            FROM source
+            {window_sql}
+        )
+        SELECT
+            {account_sql} AS account_id,
+            date,
+            followers,
+            following,
+            captured_at,
+            COALESCE(followers_delta, 0) AS followers_delta
+        FROM windowed
+        WHERE ? IS NULL OR date_ts >= ?
+        ORDER BY date_ts
+        """
+        params = source_params + window_params
+        if account_sql == "?":
+            params.append(account_id)
+        params += [since_ts, since_ts]
+        return pd.read_sql_query(query, conn, params=params)
+    finally:
+        conn.close()
+
+
+FOLLOWER_EVENT_COLUMNS = ["account_id", "date", "kind", "delta", "score", "baseline"]
+
+
+@profiled
+def load_follower_events(
+    db_path: str,
+    account_id: str,
+    days: Optional[int] = None,
+) -> pd.DataFrame:
+    conn = _connect(db_path)
+    try:
+        if not _has_table(conn, "follower_events"):
+            return pd.DataFrame(columns=FOLLOWER_EVENT_COLUMNS)
+
+        since_ts = iso_to_epoch(follower_since_date(days)) if days is not None else None
+        params: list = [since_ts, since_ts]
+        account_sql = ""
+        if account_id != "ALL":
+            account_sql = "AND account_id = ?"
+            params.append(account_id)
+        return pd.read_sql_query(
+            f"""
+            SELECT account_id, date, kind, delta, score, baseline
+            FROM follower_events
+            WHERE (? IS NULL OR date_ts >= ?) {account_sql}
+            ORDER BY date_ts, account_id, kind
             """,
             conn,
-            params=(account_id,),
+            params=params,
         )
     finally:
         conn.close()
 
 
-def load_posts_with_latest_snapshot(
+@profiled
+def load_top_attributed_posts(
     db_path: str,
     account_id: str,
-    limit: int = 200,
-    post_type: str = "ALL",
+    days: Optional[int] = None,
+    limit: int = 10,
 ) -> pd.DataFrame:
+    # Posts ranked by followers attributed to them (src.analytics.attribution).
     conn = _connect(db_path)
     try:
-        where_parts = []
-        params = []
+        columns = ["account_id", "illust_id", "title", "attributed_followers", "bookmarks_gained", "active_days"]
+        if not _has_table(conn, "post_attribution"):
+            return pd.DataFrame(columns=columns)
 
+        since_ts = iso_to_epoch(follower_since_date(days)) if days is not None else None
+        params: list = [since_ts, since_ts]
+        account_sql = ""
         if account_id != "ALL":
-            where_parts.append("p.account_id = ?")
+            account_sql = "AND pa.account_id = ?"
             params.append(account_id)
+        params.append(limit)
+        return pd.read_sql_query(
+            f"""
+            SELECT
+                pa.account_id,
+                pa.illust_id,
+                p.title,
+                SUM(pa.attributed_followers) AS attributed_followers,
+                SUM(pa.bookmarks_gained) AS bookmarks_gained,
+                COUNT(*) AS active_days
+            FROM post_attribution pa
+            LEFT JOIN posts p
+              ON p.account_id = pa.account_id
+             AND p.illust_id = pa.illust_id
+            WHERE (? IS NULL OR pa.date_ts >= ?) {account_sql}
+            GROUP BY pa.account_id, pa.illust_id
+            ORDER BY attributed_followers DESC
+            LIMIT ?
+            """,
+            conn,
+            params=params,
+        )
+    finally:
+        conn.close()
 
-        if post_type != "ALL":
-            where_parts.append("p.type = ?")
-            params.append(post_type)
 
-        where_sql = ""
-        if where_parts:
-            where_sql = "WHERE " + " AND ".join(where_parts)
+@profiled
+def load_attribution_summary(
+    db_path: str,
+    account_id: str,
+    days: Optional[int] = None,
+) -> dict:
+    conn = _connect(db_path)
+    try:
+        if not _has_table(conn, "attribution_fits"):
+            return {}
+        since_ts = iso_to_epoch(follower_since_date(days)) if days is not None else None
+        params: list = [since_ts, since_ts]
+        account_sql = ""
+        if account_id != "ALL":
+            account_sql = "AND account_id = ?"
+            params.append(account_id)
+        row = conn.execute(
+            f"""
+            SELECT
+                COUNT(*) AS fitted_days,
+                SUM(followers_delta) AS followers_gained,
+                SUM(fitted - intercept) AS attributed_to_posts,
+                SUM(intercept) AS baseline,
+                AVG(r2) AS mean_r2
+            FROM attribution_fits
+            WHERE (? IS NULL OR date_ts >= ?) {account_sql}
+            """,
+            params,
+        ).fetchone()
+        return dict(row) if row["fitted_days"] else {}
+    finally:
+        conn.close()
+
+
+DAILY_PERFORMANCE_COLUMNS = [
+    "account_id",
+    "date",
+    "bookmarks_gained",
+    "views_gained",
+    "likes_gained",
+    "active_posts",
+]
+
+
+@profiled
+def load_daily_performance(
+    db_path: str,
+    account_id: str,
+    days: Optional[int] = None,
+) -> pd.DataFrame:
+    # Reads the rollup maintained by src.analytics.rollups: O(days), no snapshots.
+    conn = _connect(db_path)
+    try:
+        if not _has_table(conn, "account_daily_performance"):
+            return pd.DataFrame(columns=DAILY_PERFORMANCE_COLUMNS)
+
+        since_ts = iso_to_epoch(follower_since_date(days)) if days is not None else None
+        if account_id == "ALL":
+            account_sql, where_sql, params = "'ALL'", "", []
+        else:
+            account_sql, where_sql, params = "account_id", "AND account_id = ?", [account_id]
+        query = f"""
+        SELECT
+            {account_sql} AS account_id,
+            date,
+            SUM(bookmarks_gained) AS bookmarks_gained,
+            SUM(views_gained) AS views_gained,
+            SUM(likes_gained) AS likes_gained,
+            SUM(active_posts) AS active_posts
+        FROM account_daily_performance
+        WHERE (? IS NULL OR date_ts >= ?) {where_sql}
+        GROUP BY date_ts, date
+        ORDER BY date_ts
+        """
+        return pd.read_sql_query(query, conn, params=[since_ts, since_ts] + params)
+    finally:
+        conn.close()
+
+
+LATEST_SNAPSHOT_ROWID_SQL = """
+    SELECT ls.rowid
+    FROM post_snapshots ls
+    WHERE ls.account_id = p.account_id AND ls.illust_id = p.illust_id
+    ORDER BY ls.captured_ts DESC, ls.source_mode DESC
+    LIMIT 1
+"""
+
+
+def _post_filters(account_id: str, post_type: str) -> tuple[list[str], list]:
+    where_parts: list[str] = []
+    params: list = []
+
+    if account_id != "ALL":
+        where_parts.append("p.account_id = ?")
+        params.append(account_id)
 
+    if post_type != "ALL":
+        where_parts.append("p.type = ?")
+        params.append(post_type)
+
+    return where_parts, params
+
+
+def _keyset_filter(after: Optional[PageCursor]) -> tuple[list[str], list]:
+    if after is None:
+        return [], []
+    create_ts, illust_id = after
+    return ["(p.create_ts, p.illust_id) < (?, ?)"], [int(create_ts), int(illust_id)]
+
+
+def _where_sql(where_parts: list[str]) -> str:
+    if not where_parts:
+        return ""
+    return "WHERE " + " AND ".join(where_parts)
+
+
+def page_cursor(df: pd.DataFrame, page_size: int) -> Optional[PageCursor]:
+    if df.empty or len(df) < page_size:
+        return None
+    last = df.iloc[-1]
+    return (int(last["create_ts"]), int(last["illust_id"]))
+
+
+def _forecast_join(conn: sqlite3.Connection, metric: str, horizon_hours: float) -> tuple[str, str, list]:
+    if not _has_table(conn, "post_forecasts"):
+        columns = """
+            NULL AS forecast_value,
+            NULL AS forecast_lower,
+            NULL AS forecast_upper,
+            NULL AS forecast_baseline"""
+        return columns, "", []
+    columns = """
+            pf.projected_value AS forecast_value,
+            pf.lower_value AS forecast_lower,
+            pf.upper_value AS forecast_upper,
+            pf.baseline_value AS forecast_baseline"""
+    join = """
+        LEFT JOIN post_forecasts pf
+            ON pf.account_id = p.account_id
+            AND pf.illust_id = p.illust_id
+            AND pf.metric = ?
+            AND pf.horizon_hours = ?"""
+    return columns, join, [metric, horizon_hours]
+
+
+@profiled
+def load_posts_page(
+    db_path: str,
+    account_id: str,
+    post_type: str = "ALL",
+    page_size: int = 50,
+    after: Optional[PageCursor] = None,
+    forecast_metric: str = "bookmark_count",
+    forecast_horizon_hours: float = 168.0,
+) -> pd.DataFrame:
+    conn = _connect(db_path)
+    try:
+        forecast_cols, forecast_join, forecast_params = _forecast_join(
+            conn, forecast_metric, forecast_horizon_hours
+        )
+        where_parts, params = _post_filters(account_id, post_type)
+        keyset_parts, keyset_params = _keyset_filter(after)
+        where_parts += keyset_parts
+        params += keyset_params + [page_size] + forecast_params
+
+        # The page is picked first and only its latest snapshots are joined:
+        # with the compact layout (src.compact) post_snapshots is a join view,
+        # which SQLite would materialize whole as the right side of a LEFT JOIN.
         query = f"""
-        WITH ranked_snapshots AS (
+        WITH page AS (
+            SELECT p.*, ({LATEST_SNAPSHOT_ROWID_SQL}) AS latest_rowid
+            FROM posts p
+            {_where_sql(where_parts)}
+            ORDER BY p.create_ts DESC, p.illust_id DESC
+            LIMIT ?
+        ),
+        latest AS (
             SELECT
-                ps.*,
-                ROW_NUMBER() OVER (
-                    PARTITION BY ps.account_id, ps.illust_id
-                    ORDER BY ps.captured_at DESC, ps.source_mode DESC
-                ) AS rn
-            FROM post_snapshots ps
+                page.account_id,
+                page.illust_id,
+                ls.captured_at,
+                ls.captured_ts,
+                ls.bookmark_count,
+                ls.bookmark_rate,
+                ls.like_count,
+                ls.view_count,
+                ls.comment_count,
+                ls.source_mode
+            FROM page
+            JOIN post_snapshots ls ON ls.rowid = page.latest_rowid
         )
         SELECT
             p.account_id,
             p.illust_id,
             p.title,
             p.create_date,
+            p.create_ts,
             p.tags_json,
             p.type,
             p.page_count,
             p.x_restrict,
             rs.captured_at,
+            rs.captured_ts,
             rs.bookmark_count,
             CASE
                 WHEN rs.bookmark_rate IS NOT NULL THEN rs.bookmark_rate
@@ -123,14 +502,52 @@ def load_posts_with_latest_snapshot(
             rs.like_count,
             rs.view_count,
             rs.comment_count,
-            rs.source_mode
+            rs.source_mode,{forecast_cols}
+        FROM page p
+        LEFT JOIN latest rs
+            ON rs.account_id = p.account_id AND rs.illust_id = p.illust_id{forecast_join}
+        ORDER BY p.create_ts DESC, p.illust_id DESC
+        """
+        return pd.read_sql_query(query, conn, params=params)
+    finally:
+        conn.close()
+
+
+def load_posts_with_latest_snapshot(
+    db_path: str,
+    account_id: str,
+    limit: int = 200,
+    post_type: str = "ALL",
+) -> pd.DataFrame:
+    return load_posts_page(db_path, account_id, post_type=post_type, page_size=limit)
+
+
+@profiled
+def search_posts(
+    db_path: str,
+    account_id: str,
+    prefix: str,
+    post_type: str = "ALL",
+    limit: int = 20,
+) -> pd.DataFrame:
+    prefix = prefix.strip()
+    if not prefix:
+        return pd.DataFrame(columns=["account_id", "illust_id", "title", "create_date", "create_ts", "type"])
+
+    conn = _connect(db_path)
+    try:
+        where_parts, params = _post_filters(account_id, post_type)
+        pattern = _escape_like(prefix) + "%"
+        where_parts.append(
+            "(CAST(p.illust_id AS TEXT) LIKE ? ESCAPE '\\' OR p.title LIKE ? ESCAPE '\\')"
+        )
+        params += [pattern, pattern]
+
+        query = f"""
+        SELECT p.account_id, p.illust_id, p.title, p.create_date, p.create_ts, p.type
         FROM posts p
-        LEFT JOIN ranked_snapshots rs
-            ON p.account_id = rs.account_id
-            AND p.illust_id = rs.illust_id
-            AND rs.rn = 1
-        {where_sql}
-        ORDER BY p.create_date DESC
+        {_where_sql(where_parts)}
+        ORDER BY p.create_ts DESC, p.illust_id DESC
         LIMIT ?
         """
         params.append(limit)
@@ -139,45 +556,304 @@ def load_posts_with_latest_snapshot(
         conn.close()
 
 
+def _escape_like(raw: str) -> str:
+    return raw.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+SNAPSHOT_COLUMNS = [
+    "account_id",
+    "illust_id",
+    "captured_at",
+    "bookmark_count",
+    "bookmark_rate",
+    "like_count",
+    "view_count",
+    "comment_count",
+    "source_mode",
+    "captured_ts",
+    "create_date",
+    "create_ts",
+    "title",
+]
+SNAPSHOT_CHUNK_ROWS = 50_000
+
+
+def _snapshot_query(
+    posts: Optional[Sequence[tuple[str, int]]],
+    account_id: str,
+    post_type: str,
+    created_since: Optional[str],
+    created_until: Optional[str],
+) -> tuple[str, list]:
+    # Posts are resolved first (an explicit list bound as one JSON parameter,
+    # or the account/type/create-date filter), then each post's snapshots are
+    # read through idx_post_snapshots_post_ts. CROSS JOIN fixes that order:
+    # left to the planner, the filter form walked every snapshot of the
+    # account and checked its post afterwards. For the filter form posts come
+    # off their primary key, so rows stream in (account_id, illust_id,
+    # captured_ts) order without a sort (the compact layout's view still
+    # sorts when account_id is ALL).
+    where_parts, params = _post_filters(account_id, post_type)
+    # Unary + keeps the planner on the posts primary key (see above); the
+    # create_ts test is a cheap check per post.
+    if created_since:
+        where_parts.append("+p.create_ts >= ?")
+        params.append(iso_to_epoch(created_since))
+    if created_until:
+        where_parts.append("+p.create_ts < ?")
+        params.append(iso_to_epoch(created_until))
+
+    wanted_sql, source = "", "posts p"
+    if posts is not None:
+        wanted_sql = """
+        WITH wanted AS (
+            SELECT DISTINCT
+                json_extract(value, '$[0]') AS account_id,
+                json_extract(value, '$[1]') AS illust_id
+            FROM json_each(?)
+        )"""
+        source = """wanted w
+        JOIN posts p
+          ON p.account_id = w.account_id
+         AND p.illust_id = w.illust_id"""
+        params.insert(0, json.dumps([[str(a), int(i)] for a, i in posts]))
+
+    columns = ",\n            ".join(
+        f"{'p' if c in ('create_date', 'create_ts', 'title') else 'ps'}.{c}" for c in SNAPSHOT_COLUMNS
+    )
+    query = f"""{wanted_sql}
+        SELECT
+            {columns}
+        FROM {source}
+        CROSS JOIN post_snapshots ps
+          ON ps.account_id = p.account_id
+         AND ps.illust_id = p.illust_id
+        {_where_sql(where_parts)}
+        ORDER BY p.account_id, p.illust_id, ps.captured_ts
+        """
+    return query, params
+
+
+def _snapshot_frame(rows: list) -> pd.DataFrame:
+    # bookmark_rate falls back to bookmark_count / view_count, vectorized over
+    # the whole chunk instead of a CASE per row.
+    df = pd.DataFrame.from_records(rows, columns=SNAPSHOT_COLUMNS)
+    views = pd.to_numeric(df["view_count"], errors="coerce")
+    fallback = pd.to_numeric(df["bookmark_count"], errors="coerce") / views.where(views > 0)
+    df["bookmark_rate"] = pd.to_numeric(df["bookmark_rate"], errors="coerce").fillna(fallback)
+    return df
+
+
+def iter_snapshot_chunks(
+    db_path: str,
+    posts: Optional[Sequence[tuple[str, int]]] = None,
+    account_id: str = "ALL",
+    post_type: str = "ALL",
+    created_since: Optional[str] = None,
+    created_until: Optional[str] = None,
+    chunk_rows: int = SNAPSHOT_CHUNK_ROWS,
+) -> Iterator[pd.DataFrame]:
+    # One query for every matching post's snapshots, yielded as DataFrames of
+    # about chunk_rows rows. A post never straddles two chunks, so each chunk
+    # can be grouped by (account_id, illust_id) on its own.
+    if posts is not None and not posts:
+        return
+    query, params = _snapshot_query(posts, account_id, post_type, created_since, created_until)
+    conn = _connect(db_path)
+    try:
+        cursor = conn.cursor()
+        cursor.row_factory = None
+        cursor.execute(query, params)
+        carry: list = []
+        while True:
+            rows = cursor.fetchmany(chunk_rows)
+            if not rows:
+                break
+            rows = carry + rows
+            # Hold back the last post's rows; more of them may be in the next fetch.
+            cut = len(rows)
+            while cut > 0 and rows[cut - 1][:2] == rows[-1][:2]:
+                cut -= 1
+            carry = rows[cut:]
+            if cut:
+                yield _snapshot_frame(rows[:cut])
+        if carry:
+            yield _snapshot_frame(carry)
+    finally:
+        conn.close()
+
+
+@profiled
+def load_snapshots(
+    db_path: str,
+    posts: Optional[Sequence[tuple[str, int]]] = None,
+    account_id: str = "ALL",
+    post_type: str = "ALL",
+    created_since: Optional[str] = None,
+    created_until: Optional[str] = None,
+) -> pd.DataFrame:
+    chunks = list(
+        iter_snapshot_chunks(db_path, posts, account_id, post_type, created_since, created_until)
+    )
+    if not chunks:
+        return pd.DataFrame(columns=SNAPSHOT_COLUMNS)
+    return pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
+
+
+@profiled
 def load_post_snapshots(
     db_path: str,
     account_id: str,
     illust_id: int,
 ) -> pd.DataFrame:
+    return load_snapshots(db_path, posts=[(account_id, illust_id)])
+
+
+@profiled
+def load_snapshots_for_posts(
+    db_path: str,
+    posts: Sequence[tuple[str, int]],
+) -> pd.DataFrame:
+    return load_snapshots(db_path, posts=posts)
+
+
+@profiled
+def load_elapsed_curves(
+    db_path: str,
+    posts: Sequence[tuple[str, int]],
+    metric: str,
+    grid_hours: np.ndarray,
+) -> pd.DataFrame:
+    # Same wide frame as transform.align_elapsed_curves, read from the mapped
+    # analytics cache when it is current instead of materializing snapshots.
+    grid_hours = np.asarray(grid_hours, dtype="float64")
+    by_account: dict[str, list[int]] = {}
+    for account_id, illust_id in dict.fromkeys((str(a), int(i)) for a, i in posts):
+        by_account.setdefault(account_id, []).append(illust_id)
+
+    frames = []
     conn = _connect(db_path)
     try:
-        return pd.read_sql_query(
+        for account_id, ids in by_account.items():
+            store = open_snapshot_store(conn, cache_dir_for(db_path), account_id)
+            values = store.curves_on_grid(metric, grid_hours, ids)
+            has_data = ~np.isnan(values).all(axis=1)
+            frames.append(
+                pd.DataFrame(
+                    values[has_data].T.astype("float32"),
+                    columns=[curve_label(account_id, i) for i, ok in zip(ids, has_data) if ok],
+                )
+            )
+    finally:
+        conn.close()
+    wide = pd.concat(frames, axis=1) if frames else pd.DataFrame(dtype="float32")
+    wide.index = pd.Index(grid_hours, name="elapsed_hours")
+    return wide
+
+
+@profiled
+def load_metric_distributions(
+    db_path: str,
+    account_ids: Sequence[str],
+    metric: str,
+    horizon_hours: float,
+    post_type: str = "ALL",
+    tolerance_hours: float = TOLERANCE_HOURS,
+) -> dict[str, np.ndarray]:
+    # Sorted per-account distributions of the metric at the horizon. Horizons
+    # maintained by analytics.ranking are read as stored blobs; any other
+    # horizon/tolerance is evaluated from the (cached) snapshot store.
+    type_key = ALL_TYPES if post_type == "ALL" else post_type
+    conn = _connect(db_path)
+    try:
+        if (
+            float(horizon_hours) in HORIZONS
+            and float(tolerance_hours) == TOLERANCE_HOURS
+            and _has_table(conn, "metric_distributions")
+        ):
+            rows = conn.execute(
+                """
+                SELECT account_id, sorted_values
+                FROM metric_distributions
+                WHERE account_id IN (SELECT value FROM json_each(?))
+                  AND post_type = ? AND metric = ? AND horizon_hours = ?
+                """,
+                (json.dumps(list(account_ids)), type_key, metric, float(horizon_hours)),
+            ).fetchall()
+            stored = {r["account_id"]: decode_distribution(r["sorted_values"]) for r in rows}
+            return {a: stored.get(a, np.empty(0)) for a in account_ids}
+
+        distributions = {}
+        for account_id in account_ids:
+            store = open_snapshot_store(conn, cache_dir_for(db_path), account_id)
+            _, values, types = horizon_values(store, metric, float(horizon_hours), float(tolerance_hours))
+            if type_key != ALL_TYPES:
+                values = values[types == type_key]
+            distributions[account_id] = np.sort(values)
+        return distributions
+    finally:
+        conn.close()
+
+
+def metric_percentiles(
+    distributions: dict[str, np.ndarray],
+    account_ids: Sequence[str],
+    values: Sequence[float],
+) -> np.ndarray:
+    # Percentile of each value within its own account's distribution.
+    account_ids = np.asarray(account_ids, dtype=object)
+    values = pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(dtype="float64")
+    out = np.full(len(values), np.nan)
+    for account_id, dist in distributions.items():
+        mask = account_ids == account_id
+        out[mask] = percentile_of(dist, values[mask])
+    return out
+
+
+@profiled
+def load_horizon_percentiles(
+    db_path: str,
+    posts: Sequence[tuple[str, int]],
+    metric: str = "bookmark_count",
+    horizons: Sequence[float] = (24.0, 168.0),
+    post_type: str = "ALL",
+) -> pd.DataFrame:
+    # One row per (account_id, illust_id) with pct_<h>h columns: where the
+    # post's value at each horizon sits in its account's distribution. NaN
+    # until the post has been observed around the horizon.
+    columns = ["account_id", "illust_id"] + [f"pct_{h:g}h" for h in horizons]
+    wanted = list(dict.fromkeys((str(a), int(i)) for a, i in posts))
+    conn = _connect(db_path)
+    try:
+        if not wanted or not _has_table(conn, "post_horizon_values"):
+            return pd.DataFrame(columns=columns)
+        values = pd.read_sql_query(
             """
-            SELECT
-                ps.account_id,
-                ps.illust_id,
-                ps.captured_at,
-                ps.bookmark_count,
-                CASE
-                    WHEN ps.bookmark_rate IS NOT NULL THEN ps.bookmark_rate
-                    WHEN ps.view_count > 0 THEN (1.0 * ps.bookmark_count / ps.view_count)
-                    ELSE NULL
-                END AS bookmark_rate,
-                ps.like_count,
-                ps.view_count,
-                ps.comment_count,
-                ps.source_mode,
-                p.create_date,
-                p.title
-            FROM post_snapshots ps
-            JOIN posts p
-              ON p.account_id = ps.account_id
-             AND p.illust_id = ps.illust_id
-            WHERE ps.account_id = ? AND ps.illust_id = ?
-            ORDER BY ps.captured_at ASC
+            SELECT hv.account_id, hv.illust_id, hv.horizon_hours, hv.value
+            FROM post_horizon_values hv
+            JOIN (
+                SELECT json_extract(value, '$[0]') AS account_id, json_extract(value, '$[1]') AS illust_id
+                FROM json_each(?)
+            ) w
+              ON w.account_id = hv.account_id AND w.illust_id = hv.illust_id
+            WHERE hv.metric = ? AND hv.horizon_hours IN (SELECT value FROM json_each(?))
             """,
             conn,
-            params=(account_id, illust_id),
+            params=(json.dumps(wanted), metric, json.dumps([float(h) for h in horizons])),
         )
     finally:
         conn.close()
 
+    out = pd.DataFrame(wanted, columns=["account_id", "illust_id"])
+    accounts = sorted({a for a, _ in wanted})
+    for h in horizons:
+        at_h = out.merge(values[values["horizon_hours"] == float(h)], on=["account_id", "illust_id"], how="left")
+        distributions = load_metric_distributions(db_path, accounts, metric, float(h), post_type)
+        out[f"pct_{h:g}h"] = metric_percentiles(distributions, at_h["account_id"], at_h["value"])
+    return out[columns]
+
 
+@profiled
 def load_growth_benchmark(
     db_path: str,
     account_id: str,
@@ -186,37 +862,34 @@ def load_growth_benchmark(
     post_type: str = "ALL",
     tolerance_hours: float = 6.0,
     limit: int = 300,
+    after: Optional[PageCursor] = None,
 ) -> pd.DataFrame:
     metric_map = {
-        "bookmark_count": "ps.bookmark_count",
-        "view_count": "ps.view_count",
-        "like_count": "ps.like_count",
-        "comment_count": "ps.comment_count",
+        "bookmark_count": "ns.bookmark_count",
+        "view_count": "ns.view_count",
+        "like_count": "ns.like_count",
+        "comment_count": "ns.comment_count",
     }
-    metric_col = metric_map.get(metric, "ps.bookmark_count")
+    nearest_metric_col = metric_map.get(metric, "ns.bookmark_count")
+    metric_col = nearest_metric_col.replace("ns.", "ps.")
 
     conn = _connect(db_path)
     try:
-        where_parts = [f"{metric_col} IS NOT NULL"]
-        params: list = []
-
-        if account_id != "ALL":
-            where_parts.append("p.account_id = ?")
-            params.append(account_id)
-        if post_type != "ALL":
-            where_parts.append("p.type = ?")
-            params.append(post_type)
-
-        where_sql = "WHERE " + " AND ".join(where_parts)
+        where_parts, filter_params = _post_filters(account_id, post_type)
+        keyset_parts, keyset_params = _keyset_filter(after)
+        where_parts += keyset_parts
 
+        # The snapshot nearest to target_hours is resolved per post through the
+        # post_snapshots primary key, so a page only reads its own posts' rows.
         query = f"""
-        WITH base AS (
+        WITH picked AS (
             SELECT
                 p.account_id,
                 p.illust_id,
                 p.title,
                 p.tags_json,
                 p.create_date,
+                p.create_ts,
                 p.type,
                 ps.captured_at,
                 ps.bookmark_count,
@@ -228,27 +901,33 @@ def load_growth_benchmark(
                 ps.like_count,
                 ps.view_count,
                 ps.comment_count,
-                ((julianday(ps.captured_at) - julianday(p.create_date)) * 24.0) AS elapsed_hours,
+                ((ps.captured_ts - p.create_ts) / 3600.0) AS elapsed_hours,
                 {metric_col} AS metric_value
             FROM posts p
             JOIN post_snapshots ps
-              ON p.account_id = ps.account_id
-             AND p.illust_id = ps.illust_id
-            {where_sql}
-        ),
-        ranked AS (
-            SELECT
-                *,
-                ROW_NUMBER() OVER (
-                    PARTITION BY account_id, illust_id
-                    ORDER BY
-                        ABS(elapsed_hours - ?) ASC,
-                        CASE WHEN elapsed_hours >= ? THEN 0 ELSE 1 END
-                ) AS rn
-            FROM base
-            WHERE
-                elapsed_hours >= 0
-                AND ABS(elapsed_hours - ?) <= ?
+              ON ps.rowid = (
+                SELECT cand.snapshot_rowid
+                FROM (
+                    SELECT
+                        ns.rowid AS snapshot_rowid,
+                        ((ns.captured_ts - p.create_ts) / 3600.0) AS elapsed_hours
+                    FROM post_snapshots ns
+                    WHERE
+                        ns.account_id = p.account_id
+                        AND ns.illust_id = p.illust_id
+                        AND {nearest_metric_col} IS NOT NULL
+                ) cand
+                WHERE
+                    cand.elapsed_hours >= 0
+                    AND ABS(cand.elapsed_hours - ?) <= ?
+                ORDER BY
+                    ABS(cand.elapsed_hours - ?) ASC,
+                    CASE WHEN cand.elapsed_hours >= ? THEN 0 ELSE 1 END
+                LIMIT 1
+              )
+            {_where_sql(where_parts)}
+            ORDER BY p.create_ts DESC, p.illust_id DESC
+            LIMIT ?
         )
         SELECT
             account_id,
@@ -256,6 +935,7 @@ def load_growth_benchmark(
             title,
             tags_json,
             create_date,
+            create_ts,
             type,
             captured_at,
             elapsed_hours,
@@ -274,23 +954,137 @@ def load_growth_benchmark(
                 ELSE NULL
             END AS metric_per_hour_actual,
             ABS(elapsed_hours - ?) AS target_diff_hours
-        FROM ranked
-        WHERE rn = 1
-        ORDER BY metric_per_hour_target DESC
-        LIMIT ?
+        FROM picked
+        ORDER BY create_ts DESC, illust_id DESC
         """
-        params.extend(
-            [
-                target_hours,
-                target_hours,
-                target_hours,
-                tolerance_hours,
-                target_hours,
-                target_hours,
-                target_hours,
-                limit,
-            ]
-        )
+        params = [target_hours, tolerance_hours, target_hours, target_hours]
+        params += filter_params + keyset_params
+        params += [limit, target_hours, target_hours, target_hours]
         return pd.read_sql_query(query, conn, params=params)
     finally:
         conn.close()
+
+
+REPORT_METRICS = ("bookmark_count", "view_count", "like_count", "comment_count")
+REPORT_METHODS = ("nearest", "interpolate")
+
+
+def report_column(metric: str, horizon_hours: float) -> str:
+    return f"{metric}@{horizon_hours:g}h"
+
+
+@profiled
+def load_growth_report(
+    db_path: str,
+    account_id: str,
+    horizons: Sequence[float],
+    metrics: Sequence[str] = ("bookmark_count",),
+    post_type: str = "ALL",
+    tolerance_hours: float = 6.0,
+    method: str = "nearest",
+    limit: int = 300,
+    after: Optional[PageCursor] = None,
+) -> pd.DataFrame:
+    # load_growth_benchmark for several horizons and metrics at once: one row
+    # per post with a <metric>@<h>h column for every pair. The page's
+    # snapshots inside [min(h) - tolerance, max(h) + tolerance] are read in a
+    # single ordered query and every column is evaluated from those rows, so
+    # the cost does not grow with the number of horizons. A page holds the
+    # posts observed anywhere in that window.
+    horizons = list(dict.fromkeys(float(h) for h in horizons))
+    metrics = list(dict.fromkeys(metrics))
+    if not horizons:
+        raise ValueError("at least one horizon is required")
+    unknown = [m for m in metrics if m not in REPORT_METRICS]
+    if unknown or not metrics:
+        raise ValueError(f"metrics must be among {', '.join(REPORT_METRICS)}: {unknown}")
+    if method not in REPORT_METHODS:
+        raise ValueError(f"method must be one of {', '.join(REPORT_METHODS)}: {method}")
+
+    post_columns = ["account_id", "illust_id", "title", "tags_json", "create_date", "create_ts", "type"]
+    value_columns = [report_column(m, h) for m in metrics for h in horizons]
+    window = [max(min(horizons) - tolerance_hours, 0.0) * 3600.0, (max(horizons) + tolerance_hours) * 3600.0]
+
+    conn = _connect(db_path)
+    try:
+        where_parts, filter_params = _post_filters(account_id, post_type)
+        keyset_parts, keyset_params = _keyset_filter(after)
+        where_parts += keyset_parts
+        where_parts.append(
+            """EXISTS (
+                SELECT 1
+                FROM post_snapshots ps
+                WHERE ps.account_id = p.account_id
+                  AND ps.illust_id = p.illust_id
+                  AND ps.captured_ts BETWEEN p.create_ts + ? AND p.create_ts + ?
+            )"""
+        )
+        page = pd.read_sql_query(
+            f"""
+            SELECT {", ".join(f"p.{c}" for c in post_columns)}
+            FROM posts p
+            {_where_sql(where_parts)}
+            ORDER BY p.create_ts DESC, p.illust_id DESC
+            LIMIT ?
+            """,
+            conn,
+            params=filter_params + keyset_params + window + [limit],
+        )
+        if page.empty:
+            return pd.DataFrame(columns=post_columns + value_columns)
+
+        wanted = json.dumps(
+            [[a, int(i), int(ts)] for a, i, ts in zip(page["account_id"], page["illust_id"], page["create_ts"])]
+        )
+        cursor = conn.cursor()
+        cursor.row_factory = None
+        cursor.execute(
+            f"""
+            WITH wanted AS (
+                SELECT
+                    CAST(key AS INTEGER) AS pos,
+                    json_extract(value, '$[0]') AS account_id,
+                    json_extract(value, '$[1]') AS illust_id,
+                    json_extract(value, '$[2]') AS create_ts
+                FROM json_each(?)
+            )
+            SELECT
+                w.pos,
+                ps.captured_ts - w.create_ts,
+                {", ".join(f"ps.{m}" for m in metrics)}
+            FROM wanted w
+            JOIN post_snapshots ps
+              ON ps.account_id = w.account_id
+             AND ps.illust_id = w.illust_id
+             AND ps.captured_ts BETWEEN w.create_ts + ? AND w.create_ts + ?
+            ORDER BY w.pos, ps.captured_ts, ps.source_mode DESC
+            """,
+            [wanted] + window,
+        )
+        rows = np.array(cursor.fetchall(), dtype="float64").reshape(-1, 2 + len(metrics))
+    finally:
+        conn.close()
+
+    # Same-minute daily/manual/watch rows: the first (highest source_mode) wins.
+    keep = np.ones(len(rows), dtype=bool)
+    keep[1:] = (rows[1:, 0] != rows[:-1, 0]) | (rows[1:, 1] != rows[:-1, 1])
+    rows = rows[keep]
+    # Elapsed seconds are exact in float64, so tolerance ties resolve exactly.
+    codes, elapsed = rows[:, 0].astype(np.int64), rows[:, 1]
+    grid = np.asarray(horizons) * 3600.0
+    for j, metric in enumerate(metrics):
+        values = rows[:, 2 + j]
+        ok = ~np.isnan(values)
+        sampled = values_at_horizons(
+            codes[ok],
+            elapsed[ok],
+            values[ok],
+            grid,
+            n_series=len(page),
+            tolerance=tolerance_hours * 3600.0,
+            interpolate=method == "interpolate",
+        )
+        for k, h in enumerate(horizons):
+            page[report_column(metric, h)] = sampled[:, k]
+    return page[post_columns + value_columns]
+
@@ -0,0 +1,226 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from functools import wraps
+from pathlib import Path
+from typing import Any, Callable, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_SLOW_QUERY_MS = 250.0
+
+
+@dataclass
+class Statement:
+    db_path: str
+    sql: str
+    started: float
+    seconds: float = 0.0
+
+
+@dataclass
+class CallRecord:
+    name: str
+    depth: int
+    seconds: float = 0.0
+    rows: Optional[int] = None
+    nbytes: Optional[int] = None
+    statements: List[Statement] = field(default_factory=list)
+
+
+def _result_size(result: Any) -> tuple[Optional[int], Optional[int]]:
+    if isinstance(result, pd.DataFrame):
+        return len(result), int(result.memory_usage(index=True, deep=True).sum())
+    if isinstance(result, np.ndarray):
+        return len(result), int(result.nbytes)
+    if isinstance(result, dict):
+        arrays = [v for v in result.values() if isinstance(v, np.ndarray)]
+        return len(result), sum(int(a.nbytes) for a in arrays) if arrays else None
+    if isinstance(result, (list, tuple)):
+        return len(result), None
+    return None, None
+
+
+def explain(db_path: str, sql: str) -> List[str]:
+    # EXPLAIN QUERY PLAN of a traced statement (bound parameters are already
+    # expanded into the text), on a fresh read-only connection.
+    if not sql.lstrip().upper().startswith(("SELECT", "WITH")):
+        return []
+    conn = sqlite3.connect(f"{Path(db_path).resolve().as_uri()}?mode=ro", uri=True)
+    try:
+        return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+    except sqlite3.Error as exc:
+        return [f"(explain failed: {exc})"]
+    finally:
+        conn.close()
+
+
+class Profiler:
+    # Collects one CallRecord per profiled call (nested calls get depth + 1)
+    # and the SQL each call ran on connections passed to attach(). Calls
+    # slower than slow_ms are appended to log_path as JSON lines with the
+    # query plans of their statements.
+    def __init__(self, slow_ms: Optional[float] = None, log_path: Optional[str] = None, keep: bool = True):
+        self.slow_ms = DEFAULT_SLOW_QUERY_MS if slow_ms is None else slow_ms
+        self.log_path = log_path
+        self.keep = keep
+        self.records: List[CallRecord] = []
+        self._stack: List[CallRecord] = []
+
+    def attach(self, conn: sqlite3.Connection, db_path: str) -> None:
+        def trace(sql: str) -> None:
+            if not self._stack:
+                return
+            now = time.perf_counter()
+            statements = self._stack[-1].statements
+            if statements and not statements[-1].seconds:
+                statements[-1].seconds = now - statements[-1].started
+            statements.append(Statement(db_path, sql, now))
+
+        conn.set_trace_callback(trace)
+
+    def call(self, name: str, fn: Callable, args: tuple, kwargs: dict) -> Any:
+        record = CallRecord(name, depth=len(self._stack))
+        self._stack.append(record)
+        started = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        finally:
+            ended = time.perf_counter()
+            self._stack.pop()
+            record.seconds = ended - started
+            # Statement times run until the next statement or the call's end,
+            # so they include fetching and decoding the rows.
+            if record.statements and not record.statements[-1].seconds:
+                record.statements[-1].seconds = ended - record.statements[-1].started
+            if self.keep:
+                self.records.append(record)
+        record.rows, record.nbytes = _result_size(result)
+        if self.log_path and record.seconds * 1000 >= self.slow_ms:
+            self._log_slow(record)
+        return result
+
+    def _log_slow(self, record: CallRecord) -> None:
+        entry = {
+            "at": datetime.now(timezone.utc).replace(microsecond=0).isoformat(),
+            "call": record.name,
+            "ms": round(record.seconds * 1000, 2),
+            "rows": record.rows,
+            "bytes": record.nbytes,
+            "statements": [
+                {"ms": round(s.seconds * 1000, 2), "sql": s.sql, "plan": explain(s.db_path, s.sql)}
+                for s in record.statements
+            ],
+        }
+        with open(self.log_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def frame(self) -> pd.DataFrame:
+        # Calls in completion order (children before their parent).
+        return pd.DataFrame(
+            [
+                {
+                    "call": "  " * r.depth + r.name,
+                    "ms": r.seconds * 1000,
+                    "rows": r.rows,
+                    "bytes": r.nbytes,
+                    "queries": len(r.statements),
+                    "sql_ms": sum(s.seconds for s in r.statements) * 1000,
+                }
+                for r in self.records
+            ],
+            columns=["call", "ms", "rows", "bytes", "queries", "sql_ms"],
+        )
+
+    def summary(self) -> pd.DataFrame:
+        # Per function over every recorded call: count, median and total time.
+        if not self.records:
+            return pd.DataFrame(columns=["call", "calls", "median_ms", "total_ms", "rows", "queries"])
+        df = pd.DataFrame(
+            [(r.name, r.seconds * 1000, r.rows, len(r.statements)) for r in self.records],
+            columns=["call", "ms", "rows", "queries"],
+        )
+        return (
+            df.groupby("call", sort=False)
+            .agg(
+                calls=("ms", "size"),
+                median_ms=("ms", "median"),
+                total_ms=("ms", "sum"),
+                rows=("rows", "max"),
+                queries=("queries", "max"),
+            )
+            .reset_index()
+        )
+
+
+_current: ContextVar[Optional[Profiler]] = ContextVar("ui_profiler", default=None)
+_log_only = threading.local()
+
+
+def current() -> Optional[Profiler]:
+    # The active profiler, or a record-free one (per thread, as the API server
+    # is threaded) that only writes the slow query log when UI_SLOW_QUERY_LOG
+    # is set.
+    profiler = _current.get()
+    if profiler is not None:
+        return profiler
+    log_path = os.environ.get("UI_SLOW_QUERY_LOG", "").strip()
+    if not log_path:
+        return None
+    key = (log_path, os.environ.get("UI_SLOW_QUERY_MS", ""))
+    if getattr(_log_only, "key", None) != key:
+        _log_only.key = key
+        _log_only.profiler = Profiler(slow_ms=_slow_ms(), log_path=log_path, keep=False)
+    return _log_only.profiler
+
+
+def _slow_ms() -> float:
+    raw = os.environ.get("UI_SLOW_QUERY_MS", "").strip()
+    return float(raw) if raw else DEFAULT_SLOW_QUERY_MS
+
+
+def begin(enabled: bool = True) -> Optional[Profiler]:
+    # Script-level activation for the Streamlit app, which reruns top to
+    # bottom on one thread and may stop early: every rerun replaces the
+    # previous profiler (or clears it when disabled).
+    profiler = Profiler(slow_ms=_slow_ms(), log_path=os.environ.get("UI_SLOW_QUERY_LOG") or None) if enabled else None
+    _current.set(profiler)
+    return profiler
+
+
+@contextmanager
+def profiling(profiler: Optional[Profiler] = None) -> Iterator[Profiler]:
+    profiler = profiler or Profiler(slow_ms=_slow_ms(), log_path=os.environ.get("UI_SLOW_QUERY_LOG") or None)
+    token = _current.set(profiler)
+    try:
+        yield profiler
+    finally:
+        _current.reset(token)
+
+
+def attach(conn: sqlite3.Connection, db_path: str) -> None:
+    profiler = current()
+    if profiler is not None:
+        profiler.attach(conn, db_path)
+
+
+def profiled(fn: Callable) -> Callable:
+    # Wall time, result size and SQL of each call while a profiler is active;
+    # a plain call otherwise.
+    name = f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__name__}"
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        profiler = current()
+        if profiler is None:
+            return fn(*args, **kwargs)
+        return profiler.call(name, fn, args, kwargs)
+
+    return wrapper
@@ -1,8 +1,19 @@
 import json
+from typing import Optional
 
+import numpy as np
 import pandas as pd
 
+from src.analytics.curves import interp_on_grid
+from ui.profiling import profiled
 
+# Roughly one point per 2px of chart width; the app passes the width set in
+# its sidebar (UI_CHART_WIDTH_PX), this is the fallback.
+DEFAULT_CHART_WIDTH_PX = 1200
+PX_PER_POINT = 2.0
+
+
+@profiled
 def add_follower_delta(df: pd.DataFrame) -> pd.DataFrame:
     if df.empty:
         return df.copy()
@@ -11,11 +22,16 @@ def add_follower_delta(df: pd.DataFrame) -> pd.DataFrame:
     out["date"] = pd.to_datetime(out["date"], utc=True, errors="coerce")
     out = out.sort_values("date")
     out["followers"] = pd.to_numeric(out["followers"], errors="coerce")
-    out["followers_delta"] = out["followers"].diff()
+    if "followers_delta" in out.columns:
+        # Already computed in SQL (load_follower_daily), possibly over a window.
+        out["followers_delta"] = pd.to_numeric(out["followers_delta"], errors="coerce")
+    else:
+        out["followers_delta"] = out["followers"].diff()
     out["followers_delta"] = out["followers_delta"].fillna(0).astype("int64")
     return out
 
 
+@profiled
 def mark_follower_decrease(df: pd.DataFrame) -> pd.DataFrame:
     if df.empty:
         return df.copy()
@@ -27,17 +43,25 @@ def mark_follower_decrease(df: pd.DataFrame) -> pd.DataFrame:
     return out
 
 
+@profiled
 def to_elapsed_hours_curve(df_snapshots: pd.DataFrame) -> pd.DataFrame:
     if df_snapshots.empty:
         return df_snapshots.copy()
 
     out = df_snapshots.copy()
-    out["create_date"] = pd.to_datetime(out["create_date"], utc=True, errors="coerce")
-    out["captured_at"] = pd.to_datetime(out["captured_at"], utc=True, errors="coerce")
-    out = out.dropna(subset=["create_date", "captured_at"])
-    out["elapsed_hours"] = (
-        (out["captured_at"] - out["create_date"]).dt.total_seconds() / 3600.0
-    )
+    if {"create_ts", "captured_ts"}.issubset(out.columns):
+        # Epoch-second columns from the DB: no per-row datetime parsing needed.
+        out["create_ts"] = pd.to_numeric(out["create_ts"], errors="coerce")
+        out["captured_ts"] = pd.to_numeric(out["captured_ts"], errors="coerce")
+        out = out.dropna(subset=["create_ts", "captured_ts"])
+        out["elapsed_hours"] = (out["captured_ts"] - out["create_ts"]) / 3600.0
+    else:
+        out["create_date"] = pd.to_datetime(out["create_date"], utc=True, errors="coerce")
+        out["captured_at"] = pd.to_datetime(out["captured_at"], utc=True, errors="coerce")
+        out = out.dropna(subset=["create_date", "captured_at"])
+        out["elapsed_hours"] = (
+            (out["captured_at"] - out["create_date"]).dt.total_seconds() / 3600.0
+        )
     out = out[out["elapsed_hours"] >= 0]
     out = out.sort_values("elapsed_hours")
     return out
@@ -55,6 +79,7 @@ def safe_metric_series(df: pd.DataFrame, metric_name: str) -> pd.DataFrame:
     return out
 
 
+@profiled
 def parse_tags_json(df: pd.DataFrame, col: str = "tags_json") -> pd.DataFrame:
     if df.empty or col not in df.columns:
         return df.copy()
@@ -74,3 +99,208 @@ def parse_tags_json(df: pd.DataFrame, col: str = "tags_json") -> pd.DataFrame:
 
     out["tags"] = out[col].map(_parse)
     return out
+
+
+def viewport_point_budget(width_px: int = DEFAULT_CHART_WIDTH_PX, px_per_point: float = PX_PER_POINT) -> int:
+    return max(3, int(width_px / px_per_point))
+
+
+def _numeric_x(series: pd.Series) -> np.ndarray:
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series.astype("int64").to_numpy(dtype="float64")
+    return pd.to_numeric(series, errors="coerce").to_numpy(dtype="float64")
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    # Largest-Triangle-Three-Buckets: keeps first/last points and, per bucket,
+    # the point forming the largest triangle with its neighbours.
+    n = len(x)
+    if max_points >= n or max_points < 3:
+        return np.arange(n)
+
+    edges = np.floor(np.linspace(1, n - 1, max_points - 1)).astype(np.int64)
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    prev = 0
+    for i in range(max_points - 2):
+        start, end = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_x = x[end:edges[i + 2]].mean()
+            next_y = y[end:edges[i + 2]].mean()
+        else:
+            next_x, next_y = x[n - 1], y[n - 1]
+        area = np.abs(
+            (x[prev] - next_x) * (y[start:end] - y[prev])
+            - (x[prev] - x[start:end]) * (next_y - y[prev])
+        )
+        prev = start + int(np.argmax(area))
+        selected[i + 1] = prev
+    return selected
+
+
+def minmax_indices(y: np.ndarray, max_points: int) -> np.ndarray:
+    n = len(y)
+    if max_points >= n or max_points < 2:
+        return np.arange(n)
+
+    buckets = max(1, max_points // 2)
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    picked = []
+    for start, end in zip(edges[:-1], edges[1:]):
+        if end <= start:
+            continue
+        chunk = y[start:end]
+        picked.append(start + int(np.argmin(chunk)))
+        picked.append(start + int(np.argmax(chunk)))
+    return np.unique(np.asarray(picked, dtype=np.int64))
+
+
+def _extrema(y: np.ndarray) -> np.ndarray:
+    if len(y) == 0 or np.isnan(y).all():
+        return np.empty(0, dtype=np.int64)
+    return np.array([np.nanargmin(y), np.nanargmax(y)], dtype=np.int64)
+
+
+def _slice_range(df: pd.DataFrame, x_col: str, x_range: Optional[tuple]) -> pd.DataFrame:
+    if x_range is None:
+        return df
+    lower, upper = x_range
+    mask = pd.Series(True, index=df.index)
+    if lower is not None:
+        mask &= df[x_col] >= lower
+    if upper is not None:
+        mask &= df[x_col] <= upper
+    return df[mask]
+
+
+@profiled
+def downsample_series(
+    df: pd.DataFrame,
+    x_col: str,
+    y_col: str,
+    max_points: int,
+    keep_col: Optional[str] = None,
+    x_range: Optional[tuple] = None,
+) -> pd.DataFrame:
+    if df.empty:
+        return df.copy()
+
+    out = _slice_range(df, x_col, x_range)
+    out = out.dropna(subset=[x_col, y_col]).sort_values(x_col)
+    if len(out) <= max_points:
+        return out.copy()
+
+    x = _numeric_x(out[x_col])
+    y = pd.to_numeric(out[y_col], errors="coerce").to_numpy(dtype="float64")
+    keep = np.union1d(lttb_indices(x, y, max_points), _extrema(y))
+
+    if keep_col is not None and keep_col in out.columns:
+        flagged = np.flatnonzero(out[keep_col].fillna(False).to_numpy(dtype=bool))
+        if len(flagged) > max_points:
+            flagged = flagged[lttb_indices(x[flagged], y[flagged], max_points)]
+        keep = np.union1d(keep, flagged)
+
+    return out.iloc[np.unique(keep)].copy()
+
+
+@profiled
+def downsample_follower_series(
+    df: pd.DataFrame,
+    max_points: int,
+    x_range: Optional[tuple] = None,
+) -> pd.DataFrame:
+    # Line shape via LTTB on followers, delta spikes via min/max buckets, and
+    # every flagged decrease day (capped at max_points) so none are dropped.
+    if df.empty:
+        return df.copy()
+
+    out = _slice_range(df, "date", x_range)
+    out = out.dropna(subset=["date"]).sort_values("date")
+    if len(out) <= max_points:
+        return out.copy()
+
+    x = _numeric_x(out["date"])
+    followers = pd.to_numeric(out["followers"], errors="coerce").fillna(0).to_numpy(dtype="float64")
+    keep = np.union1d(lttb_indices(x, followers, max_points), _extrema(followers))
+
+    delta = np.zeros(len(out), dtype="float64")
+    if "followers_delta" in out.columns:
+        delta = pd.to_numeric(out["followers_delta"], errors="coerce").fillna(0).to_numpy(dtype="float64")
+        keep = np.union1d(keep, minmax_indices(delta, max_points))
+
+    if "is_decrease" in out.columns:
+        flagged = np.flatnonzero(out["is_decrease"].fillna(False).to_numpy(dtype=bool))
+        if len(flagged) > max_points:
+            flagged = flagged[np.argsort(delta[flagged], kind="stable")[:max_points]]
+        keep = np.union1d(keep, flagged)
+
+    return out.iloc[np.unique(keep)].copy()
+
+
+def curve_label(account_id: str, illust_id: int) -> str:
+    return f"{account_id}/{int(illust_id)}"
+
+
+def elapsed_hours_grid(max_hours: float, points: int = 97) -> np.ndarray:
+    return np.linspace(0.0, float(max_hours), max(2, int(points)))
+
+
+@profiled
+def align_elapsed_curves(
+    df_curves: pd.DataFrame,
+    metric_name: str,
+    grid_hours: np.ndarray,
+) -> pd.DataFrame:
+    # Wide float32 frame: one row per grid hour, one column per post. Values are
+    # linearly interpolated inside each post's observed range and NaN outside it.
+    grid_hours = np.asarray(grid_hours, dtype="float64")
+    if df_curves.empty or metric_name not in df_curves.columns:
+        return pd.DataFrame(index=pd.Index(grid_hours, name="elapsed_hours"), dtype="float32")
+
+    curves = df_curves[["account_id", "illust_id", "elapsed_hours", metric_name]].copy()
+    curves[metric_name] = pd.to_numeric(curves[metric_name], errors="coerce")
+    curves = curves.dropna(subset=["elapsed_hours", metric_name])
+    curves = curves.drop_duplicates(subset=["account_id", "illust_id", "elapsed_hours"], keep="last")
+    curves = curves.sort_values(["account_id", "illust_id", "elapsed_hours"])
+    if curves.empty:
+        return pd.DataFrame(index=pd.Index(grid_hours, name="elapsed_hours"), dtype="float32")
+
+    keys = curves[["account_id", "illust_id"]].drop_duplicates()
+    codes = curves.groupby(["account_id", "illust_id"], sort=False).ngroup().to_numpy()
+    values = interp_on_grid(
+        codes,
+        curves["elapsed_hours"].to_numpy(dtype="float64"),
+        curves[metric_name].to_numpy(dtype="float64"),
+        grid_hours,
+        n_series=len(keys),
+    )
+
+    columns = [curve_label(a, i) for a, i in keys.itertuples(index=False)]
+    return pd.DataFrame(
+        values.T.astype("float32"),
+        index=pd.Index(grid_hours, name="elapsed_hours"),
+        columns=columns,
+    )
+
+
+@profiled
+def curve_percentile_bands(
+    wide: pd.DataFrame,
+    percentiles: tuple = (25, 50, 75),
+) -> pd.DataFrame:
+    cols = [f"p{int(p)}" for p in percentiles]
+    if wide.empty or wide.shape[1] == 0:
+        return pd.DataFrame(columns=["elapsed_hours", *cols])
+
+    values = wide.to_numpy(dtype="float64")
+    has_data = ~np.isnan(values).all(axis=1)
+    bands = np.full((len(percentiles), values.shape[0]), np.nan)
+    if has_data.any():
+        bands[:, has_data] = np.nanpercentile(values[has_data], percentiles, axis=1)
+
+    out = pd.DataFrame(bands.T, columns=cols)
+    out.insert(0, "elapsed_hours", wide.index.to_numpy())
+    out["curve_count"] = (~np.isnan(values)).sum(axis=1)
+    return out